@@ -0,0 +1,114 @@
+# bench_company_stats.py
+# /api/company/{name}/stats 성능 비교: 기존 방식(ORM 전체 행 로드 + 파이썬 루프) vs 그룹 SQL 집계
+#   python bench_company_stats.py --rows 1000000 --companies 10
+# 가장 접수 건수가 많은 사업장 기준으로 응답 시간과 최대 메모리(tracemalloc peak)를 측정합니다.
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from models import Checkup, CompanyMap, ExamRule, Patient
+from bench_ingest import make_synthetic_csv, fresh_engine
+from ingest import ingest_csv
+from stats_kernels import compute_company_stats
+
+# ---------------------------------------------------------
+# 기존 방식 (main.py 구버전 그대로)
+# ---------------------------------------------------------
+def legacy_company_stats(db, name, years=None):
+    related_names = [name]
+    for m in db.query(CompanyMap.original_name).filter(CompanyMap.standard_name == name).all():
+        related_names.append(m.original_name)
+
+    q = db.query(Checkup).filter(Checkup.company_name.in_(related_names))
+    if years:
+        q = q.filter(Checkup.year.in_(years))
+    results = q.all()
+
+    rules = db.query(ExamRule).order_by(ExamRule.priority).all()
+    if not rules:
+        rules = [ExamRule(category_name="종합검진", keywords="종합", priority=1),
+                 ExamRule(category_name="기타", keywords="", priority=99)]
+
+    cY, cM, cPkg = {}, {}, {}
+    cType = {r.category_name: 0 for r in rules}
+    if "기타" not in cType: cType["기타"] = 0
+
+    for r in results:
+        if not r.year: continue
+        y, m = r.year, (r.month or 0) - 1
+        amt = r.total_price or 0
+        if y not in cY: cY[y] = {'r': 0, 'c': 0}
+        cY[y]['r'] += amt
+        cY[y]['c'] += 1
+        if y not in cM: cM[y] = {'r': [0]*12, 'c': [0]*12}
+        if 0 <= m < 12:
+            cM[y]['r'][m] += amt
+            cM[y]['c'][m] += 1
+        if r.package_code:
+            for p in r.package_code.split(','):
+                p = p.strip()
+                if p: cPkg[p] = cPkg.get(p, 0) + 1
+        c_check_type = (r.checkup_type or "").strip()
+        found_key = "기타"
+        if c_check_type:
+            for rule in rules:
+                keywords = [k.strip() for k in rule.keywords.split(',') if k.strip()]
+                if any(k in c_check_type for k in keywords):
+                    found_key = rule.category_name
+                    break
+        cType[found_key] += 1
+    for y, d in cY.items():
+        d['avg'] = int(d['r'] / d['c']) if d['c'] > 0 else 0
+
+    cDemo = {k: {'M': 0, 'F': 0} for k in ('20', '30', '40', '50', '60')}
+    q_demo = db.query(Checkup.age, Patient.gender, func.count(Checkup.receipt_no))\
+        .join(Patient, Checkup.patient_id == Patient.id)\
+        .filter(Checkup.company_name.in_(related_names))
+    if years: q_demo = q_demo.filter(Checkup.year.in_(years))
+    for age, sex, cnt in q_demo.group_by(Checkup.age, Patient.gender).all():
+        age = age or 0
+        a_key = '20' if age < 30 else '30' if age < 40 else '40' if age < 50 else '50' if age < 60 else '60'
+        s_key = 'F' if sex and ('여' in sex or 'F' in sex.upper()) else 'M'
+        cDemo[a_key][s_key] += cnt
+    return {"annual": cY, "monthly": cM, "packages": cPkg, "exam_types": cType, "demographics": cDemo}
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--companies', type=int, default=10, help='사업장 수 (적을수록 사업장당 건수 증가)')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_company_')
+    csv_path = os.path.join(work, 'csv_bench.csv')
+    make_synthetic_csv(csv_path, args.rows, companies=args.companies)
+    engine = fresh_engine(os.path.join(work, 'bench.db'))
+    ingest_csv(engine, csv_path)
+
+    db = sessionmaker(bind=engine)()
+    name, cnt = db.query(Checkup.company_name, func.count(Checkup.receipt_no))\
+        .group_by(Checkup.company_name).order_by(func.count(Checkup.receipt_no).desc()).first()
+    print(f"대상 사업장: {name} ({cnt:,}건)")
+
+    old, old_sec, old_mb = measure(legacy_company_stats, db, name)
+    db.expunge_all()
+    new, new_sec, new_mb = measure(compute_company_stats, db, name)
+
+    same = all(old[k] == new[k] for k in ("annual", "monthly", "packages", "exam_types", "demographics"))
+    print(f"[legacy] {old_sec:.2f}초 / peak {old_mb:,.1f} MB")
+    print(f"[sql]    {new_sec:.2f}초 / peak {new_mb:,.1f} MB")
+    print(f"속도 {old_sec / new_sec:.1f}x / 메모리 {old_mb / max(new_mb, 0.01):.1f}x, 결과 일치: {same}")
+    db.close()
@@ -0,0 +1,124 @@
+# bench_concurrency.py
+# 동시 접속 부하 측정: /api/stats p50 / p99 지연 (기존 롤백 저널 vs WAL + 읽기 전용 풀)
+#   python bench_concurrency.py --rows 300000 --clients 1,8,32
+# 합성 DB로 uvicorn 서버를 모드별로 띄우고, 클라이언트 수마다 일 단위 기간 조회(캐시 미적중)를 보냅니다.
+# --writer 옵션이면 측정 중에 검진분류 규칙 저장(전체 재분류 + 큐브 재계산)을 계속 반복합니다.
+# --same 옵션이면 모든 클라이언트가 같은 기간을 동시에 조회합니다. (아침 대시보드 동시 접속, single-flight 확인)
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_ingest import make_synthetic_csv, fresh_engine
+from ingest import ingest_csv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = [("rollback journal", "0"), ("WAL + read pool", "1")]
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        return json.loads(resp.read())
+
+def start_server(db_path, wal, port):
+    env = dict(os.environ, BIZHEALTH_DB_PATH=db_path, BIZHEALTH_SQLITE_WAL=wal)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR, env=env,
+    )
+    for _ in range(300):
+        try:
+            request(f"http://127.0.0.1:{port}/api/years")
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("서버 시작 실패")
+
+def random_range(rng):
+    start = f"{rng.randint(2021, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(2, 28):02d}"
+    return start, f"{int(start[:4]) + 1}{start[4:]}"
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run_load(base, clients, per_client, seed, same=False):
+    def client(i):
+        rng = random.Random(seed * 1000 + i)
+        shared = random.Random(seed)
+        latencies = []
+        for _ in range(per_client):
+            start, end = random_range(shared if same else rng)
+            suffix = f"&_={shared.random()}" if same else f"&_={rng.random()}"
+            t = time.perf_counter()
+            request(f"{base}/api/stats?start_date={start}&end_date={end}{suffix}")
+            latencies.append(time.perf_counter() - t)
+        return latencies
+
+    with ThreadPoolExecutor(clients) as pool:
+        return [x for result in pool.map(client, range(clients)) for x in result]
+
+WRITE_RULES = [
+    {"category_name": "종합검진", "keywords": "종합", "priority": 1},
+    {"category_name": "기업검진", "keywords": "기업,채용", "priority": 2},
+    {"category_name": "특수검진", "keywords": "특수", "priority": 3},
+    {"category_name": "공단검진", "keywords": "공단,일반,생활", "priority": 4},
+    {"category_name": "기타", "keywords": "추가,기타", "priority": 99},
+]
+
+def run_writer(base, stop, counter):
+    body = WRITE_RULES
+    while not stop.is_set():
+        request(f"{base}/api/config/exam-rules", body)
+        counter[0] += 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--clients', default="1,8,32")
+    parser.add_argument('--requests', type=int, default=10, help='클라이언트당 요청 수')
+    parser.add_argument('--writer', action='store_true', help='측정 중 규칙 저장(쓰기) 반복')
+    parser.add_argument('--same', action='store_true', help='모든 클라이언트가 같은 요청을 동시에 보냄')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_conc_')
+    csv_path = os.path.join(work, 'csv_bench.csv')
+    make_synthetic_csv(csv_path, args.rows)
+    source_db = os.path.join(work, 'source.db')
+    ingest_csv(fresh_engine(source_db), csv_path)
+
+    for label, wal in MODES:
+        db_path = os.path.join(work, f'bench_wal{wal}.db')
+        shutil.copy(source_db, db_path)
+        proc = start_server(db_path, wal, args.port)
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            print(f"[{label}]")
+            for n, clients in enumerate(int(c) for c in args.clients.split(',')):
+                stop, writes = threading.Event(), [0]
+                writer = threading.Thread(target=run_writer, args=(base, stop, writes)) if args.writer else None
+                if writer: writer.start()
+                t = time.perf_counter()
+                latencies = run_load(base, clients, args.requests, seed=n, same=args.same)
+                elapsed = time.perf_counter() - t
+                stop.set()
+                if writer: writer.join()
+                print(f"  clients {clients:>3}: p50 {percentile(latencies, 50) * 1000:8.1f}ms  "
+                      f"p99 {percentile(latencies, 99) * 1000:8.1f}ms  {len(latencies) / elapsed:6.1f} req/s"
+                      + (f"  (쓰기 {writes[0]}회)" if writer else ""))
+            sf = request(f"{base}/api/cache/stats").get("single_flight")
+            if sf: print(f"    single-flight: 계산 {sf['computed']}회 / 합쳐진 요청 {sf['collapsed']}회")
+        finally:
+            proc.terminate()
+            proc.wait()
@@ -0,0 +1,208 @@
+# bench_endpoints.py
+# 규모별 적재 + API 응답 시간 측정 (synthetic.py 합성 데이터, FastAPI TestClient로 서버 없이 호출)
+#   python bench_endpoints.py                               (10만 건)
+#   python bench_endpoints.py --scales 100000 1000000 10000000 --label "WAL 적용 후"
+#   python bench_endpoints.py --scales 1000000 --data-dir ./bench_data   (합성 CSV 재사용)
+# 규모마다 별도 프로세스에서 DB를 새로 만들고(BIZHEALTH_DB_PATH) 아래 순서로 측정합니다.
+#   1. 적재: 사업장 매핑 / 제외 / 검진분류 규칙 등록 후 연도별 CSV 5개 적재 (ingest_files)
+#   2. API: 각 요청을 캐시를 비운 상태(cold, 실제 계산)와 캐시 적중(warm)으로 --repeat번씩 호출 -> 중앙값
+# 결과는 --results 파일(JSON Lines)에 한 줄씩 추가되고, 같은 규모의 직전 기록과 비교해 출력합니다.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import synthetic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(BASE_DIR, "bench_results.jsonl")
+
+# (이름, 경로, 쿼리 파라미터) - 화면에서 실제로 부르는 요청 위주
+CASES = [
+    ("years", "/api/years", {}),
+    ("company-list", "/api/company-list", {}),
+    ("stats", "/api/stats", {}),
+    ("stats 연도 필터", "/api/stats", {"years": [2024, 2025]}),
+    ("stats 일 단위 기간", "/api/stats", {"start_date": "2022-03-05", "end_date": "2024-11-20"}),
+    ("stats 제외 지정", "/api/stats", {"exclude_companies": ["(주)사업장00001", "(주)사업장00002"]}),
+    ("stats columnar", "/api/stats", {"shape": "columnar"}),
+    ("stats 상위 20", "/api/stats", {"limit": 20, "sort": "rev"}),
+    ("stats/period", "/api/stats/period", {"start_date": "2023-01-15", "end_date": "2024-06-30"}),
+    ("stats/period 페이지", "/api/stats/period", {"start_date": "2023-01-15", "end_date": "2024-06-30", "limit": 100}),
+    ("stats/periods 2구간", "/api/stats/periods", {"period": ["2024-01-01,2024-12-31", "2023-01-01,2023-12-31"]}),
+    ("stats/retention", "/api/stats/retention", {"years": [2022, 2023, 2024, 2025]}),
+    ("stats/retention 상세", "/api/stats/retention", {"years": [2024, 2025], "detail": "new", "limit": 20}),
+    ("stats/revisit/person", "/api/stats/revisit/person", {}),
+    ("company stats (최대 사업장)", "/api/company/(주)사업장00000/stats", {}),
+    ("stats/items", "/api/stats/items", {}),
+    ("stats/items 월별", "/api/stats/items", {"by": "month", "years": [2024]}),
+    ("stats/items 사업장별", "/api/stats/items", {"by": "company", "code": ["A000", "A001"]}),
+    ("stats/items/affinity", "/api/stats/items/affinity", {}),
+    ("stats/items/affinity 코드", "/api/stats/items/affinity", {"code": ["A000"], "years": [2024]}),
+]
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 2)
+
+# ---------------------------------------------------------
+# [측정] 규모 1개 (별도 프로세스: DB 경로가 import 시점에 정해지므로)
+# ---------------------------------------------------------
+def prepare_data(data_dir, rows, seed):
+    """합성 CSV 생성 (같은 rows / seed로 이미 만든 폴더가 있으면 재사용)"""
+    directory = os.path.join(data_dir, f"rows{rows}_seed{seed}")
+    marker = os.path.join(directory, "dataset.json")
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            return json.load(f), 0.0
+    t = time.perf_counter()
+    spec = synthetic.make_dataset(directory, rows, seed=seed)
+    elapsed = time.perf_counter() - t
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+    return spec, elapsed
+
+def load(db_path, spec, workers):
+    """빈 DB 생성 -> 설정 등록 -> 코드 마스터 -> 검진 CSV 적재"""
+    from database import make_engine
+    from migrate import upgrade
+    from ingest import ingest_files
+    from init_db import load_codes
+
+    engine = make_engine(db_path)
+    upgrade(engine)
+    synthetic.apply_config(engine, spec["config"])
+    load_codes(engine, spec["code_csv"])
+    t = time.perf_counter()
+    results = ingest_files(engine, spec["files"], workers=workers, log=lambda msg: None)
+    elapsed = time.perf_counter() - t
+    engine.dispose()
+    return {
+        "sec": round(elapsed, 2),
+        "rows_per_sec": int(spec["rows"] / elapsed) if elapsed > 0 else 0,
+        "parse_sec": round(sum(r["parse_sec"] for r in results), 2),
+        "write_sec": round(sum(r["write_sec"] for r in results), 2),
+        "inserted": sum(r["inserted"] for r in results),
+        "db_mb": round(os.path.getsize(db_path) / 1024 / 1024, 1),
+    }
+
+def measure_endpoints(repeat):
+    from fastapi.testclient import TestClient
+    import main
+    from cache import response_cache
+
+    out = {}
+    with TestClient(main.app) as client:
+        for label, path, params in CASES:
+            cold, warm, size = [], [], 0
+            for _ in range(repeat):
+                response_cache.clear()
+                t = time.perf_counter()
+                resp = client.get(path, params=params)
+                cold.append(time.perf_counter() - t)
+                if resp.status_code != 200:
+                    raise RuntimeError(f"{label}: {resp.status_code} {resp.text[:200]}")
+                size = len(resp.content)
+            for _ in range(repeat):
+                t = time.perf_counter()
+                client.get(path, params=params)
+                warm.append(time.perf_counter() - t)
+            out[label] = {"cold_ms": median_ms(cold), "warm_ms": median_ms(warm), "kb": round(size / 1024, 1)}
+    return out
+
+def run_scale(args):
+    """--child 모드: 규모 1개를 측정하고 결과 JSON을 마지막 줄에 출력"""
+    spec, generate_sec = prepare_data(args.data_dir, args.rows, args.seed)
+    result = {"rows": args.rows, "companies": spec["companies"], "generate_sec": round(generate_sec, 2)}
+    result["ingest"] = load(os.environ["BIZHEALTH_DB_PATH"], spec, args.workers)
+    result["endpoints"] = measure_endpoints(args.repeat)
+    print(json.dumps(result, ensure_ascii=False))
+
+def spawn_scale(args, rows, work):
+    db_path = os.path.join(work, f"bench_{rows}.db")
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    env = dict(os.environ, BIZHEALTH_DB_PATH=db_path)
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--rows", str(rows), "--seed", str(args.seed),
+           "--repeat", str(args.repeat), "--workers", str(args.workers), "--data-dir", args.data_dir]
+    proc = subprocess.run(cmd, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ {rows:,}건 측정 실패\n{proc.stderr[-3000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# ---------------------------------------------------------
+# [기록] JSON Lines 저장 + 직전 기록과 비교
+# ---------------------------------------------------------
+def previous_record(results_path, rows, seed):
+    if not os.path.exists(results_path):
+        return None
+    last = None
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("rows") == rows and record.get("seed") == seed:
+                last = record
+    return last
+
+def _change(new, old):
+    if not old:
+        return ""
+    return f" ({(new - old) / old * 100:+5.0f}%)"
+
+def report(record, prev):
+    ing = record["ingest"]
+    old_ing = (prev or {}).get("ingest", {})
+    print(f"\n📊 {record['rows']:,}건 / 사업장 {record['companies']:,}곳"
+          + (f" - 직전 기록 {prev['at']} ({prev.get('commit') or '-'}, {prev.get('label') or '-'})" if prev else ""))
+    print(f"  적재 {ing['sec']:8.2f}초{_change(ing['sec'], old_ing.get('sec'))} -> {ing['rows_per_sec']:,} rows/s "
+          f"(파싱 {ing['parse_sec']}초 / 쓰기 {ing['write_sec']}초, DB {ing['db_mb']} MB)")
+    old_eps = (prev or {}).get("endpoints", {})
+    for label, m in record["endpoints"].items():
+        old = old_eps.get(label, {})
+        print(f"  cold {m['cold_ms']:9.2f}ms{_change(m['cold_ms'], old.get('cold_ms')):9} / "
+              f"warm {m['warm_ms']:7.2f}ms{_change(m['warm_ms'], old.get('warm_ms')):9} / {m['kb']:9,.1f} KB  {label}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[100_000], help='검진 건수 목록 (예: 100000 1000000 10000000)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='요청별 반복 횟수 (중앙값 사용)')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='CSV 파싱 프로세스 수')
+    parser.add_argument('--data-dir', default=None, help='합성 CSV 폴더 (지정하면 다음 실행 때 재사용)')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='결과 기록 파일 (JSON Lines)')
+    parser.add_argument('--label', default=None, help='기록에 남길 설명 (예: 변경 내용)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_scale(args)
+        raise SystemExit
+
+    work = tempfile.mkdtemp(prefix='bench_endpoints_')
+    args.data_dir = os.path.abspath(args.data_dir or work)
+    for rows in args.scales:
+        print(f"⏳ {rows:,}건 측정 중...", flush=True)
+        record = {"at": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(), "label": args.label,
+                  "seed": args.seed, "repeat": args.repeat, "workers": args.workers,
+                  "stats_engine": os.environ.get("BIZHEALTH_STATS_ENGINE", "sql"),
+                  **spawn_scale(args, rows, work)}
+        prev = previous_record(args.results, rows, args.seed)
+        report(record, prev)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"\n📝 결과 기록: {args.results}")
@@ -0,0 +1,146 @@
+# bench_ingest.py
+# 적재 성능 비교: 기존 행 단위 루프(init_db.py 구버전) vs ingest.py 벌크 엔진
+#   python bench_ingest.py --rows 1000000 --legacy-rows 50000
+#   python bench_ingest.py --rows 1000000 --files 5 --workers 1,2,4   (파일 여러 개 병렬 파싱 비교)
+# 기존 루프는 행마다 SELECT를 수행해 100만 행 전체 측정에 수십 분이 걸리므로,
+# --legacy-rows 만큼만 측정해 rows/s로 비교합니다.
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from models import Base, Patient, Checkup
+from ingest import ingest_csv, ingest_files
+from synthetic import make_checkup_csv as make_synthetic_csv  # init_db.py가 읽는 컬럼 구성과 동일
+
+# ---------------------------------------------------------
+# 기존 방식 (행 단위 iterrows + 행마다 중복 조회 + session.add)
+# ---------------------------------------------------------
+LegacyBase = declarative_base()
+
+class CheckupDetail(LegacyBase):  # 구버전 상세 테이블 (접수 x 코드마다 문자열 행 1개)
+    __tablename__ = 'tb_checkup_detail'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    receipt_no = Column(String)
+    medical_code = Column(String)
+
+def legacy_ingest(engine, path, nrows=None):
+    LegacyBase.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    df = pd.read_csv(path, nrows=nrows)
+    df.columns = [c.strip() for c in df.columns]
+
+    def parse_int(val):
+        try:
+            return int(str(val).replace(',', '').replace('"', '').split('.')[0])
+        except:
+            return 0
+
+    def convert_date(val):
+        s = str(val).strip()
+        if len(s) == 8 and s.isdigit():
+            return f"{s[:4]}-{s[4:6]}-{s[6:]}"
+        return s
+
+    patient_cache = {}
+    for _, row in df.iterrows():
+        lc = str(row['LifeCode']).strip()
+        rn = str(row['주민번호']).strip()
+        if lc.endswith('.0'): lc = lc[:-2]
+        if not lc or lc == 'nan' or not rn or rn == 'nan': continue
+
+        key = (lc, rn)
+        if key not in patient_cache:
+            p = session.query(Patient).filter_by(life_code=lc, resident_no=rn).first()
+            if not p:
+                p = Patient(life_code=lc, resident_no=rn,
+                            name=str(row.get('성명', row.get('가족성명', ''))), gender=str(row.get('성별', '')))
+                session.add(p)
+                session.flush()
+            patient_cache[key] = p.id
+
+        receipt = str(row['접수번호']).strip()
+        if session.query(Checkup).filter_by(receipt_no=receipt).first(): continue
+        session.add(Checkup(
+            receipt_no=receipt, patient_id=patient_cache[key],
+            checkup_date=convert_date(row.get('검진일', '')),
+            package_name=str(row.get('패키지', '')), package_code=str(row.get('패키지코드', '')),
+            send_type=str(row.get('발송구분', '')), remarks=str(row.get('비고', '')),
+            age=parse_int(row.get('나이', 0)), company_name=str(row.get('거래처명', '')),
+            department=str(row.get('부서', '')), checkup_type=str(row.get('검진종류', '')),
+            total_price=parse_int(row.get('검사금액', 0)), user_price=parse_int(row.get('본인금액', 0)),
+            corp_price=parse_int(row.get('회사금액', 0)), nhis_price=parse_int(row.get('공단금액', 0)),
+        ))
+        codes = set()
+        for val in (str(row.get('검진항목메모', '')), str(row.get('패키지코드', ''))):
+            if val and val != 'nan':
+                codes.update(c.strip() for c in val.split(',') if c.strip())
+        for code in codes:
+            session.add(CheckupDetail(receipt_no=receipt, medical_code=code))
+    session.commit()
+    session.close()
+    return len(df)
+
+def fresh_engine(path):
+    if os.path.exists(path): os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    return engine
+
+def bench_parallel(work, rows, files, workers_list):
+    """rows행을 files개 파일로 나눠 워커 수별 전체 적재 시간 비교 (쓰기는 항상 1개)"""
+    per_file = rows // files
+    paths = []
+    for i in range(files):
+        path = os.path.join(work, f'csv{2021 + i}.csv')
+        make_synthetic_csv(path, per_file, seed=42 + i, receipt_start=i * per_file)
+        paths.append(path)
+    print(f"합성 CSV {files}개 x {per_file:,}행")
+    for workers in workers_list:
+        engine = fresh_engine(os.path.join(work, f'parallel_{workers}.db'))
+        t = time.perf_counter()
+        results = ingest_files(engine, paths, workers=workers, log=lambda msg: None)
+        wall = time.perf_counter() - t
+        parse = sum(r['parse_sec'] for r in results)
+        wait = sum(r.get('wait_sec', r['parse_sec']) for r in results)
+        write = sum(r['write_sec'] for r in results)
+        print(f"[workers {workers}] 전체 {wall:.1f}초 -> {int(rows / wall):,} rows/s "
+              f"(파싱 합계 {parse:.1f}초 / 파싱 대기 {wait:.1f}초 / 쓰기 {write:.1f}초)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--legacy-rows', type=int, default=50_000, help='0이면 기존 방식 측정 생략')
+    parser.add_argument('--files', type=int, default=1, help='2 이상이면 파일 여러 개 병렬 파싱 비교')
+    parser.add_argument('--workers', default="1,2,4", help='--files 비교 시 파싱 워커 수 목록')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_ingest_')
+    if args.files > 1:
+        bench_parallel(work, args.rows, args.files, [int(w) for w in args.workers.split(',')])
+        raise SystemExit
+    csv_path = os.path.join(work, 'csv_bench.csv')
+
+    t = time.perf_counter()
+    make_synthetic_csv(csv_path, args.rows)
+    print(f"합성 CSV {args.rows:,}행 생성: {time.perf_counter() - t:.1f}초 ({csv_path})")
+
+    legacy_rps = None
+    if args.legacy_rows:
+        engine = fresh_engine(os.path.join(work, 'legacy.db'))
+        t = time.perf_counter()
+        n = legacy_ingest(engine, csv_path, nrows=args.legacy_rows)
+        elapsed = time.perf_counter() - t
+        legacy_rps = n / elapsed
+        print(f"[legacy] {n:,}행 {elapsed:.1f}초 -> {legacy_rps:,.0f} rows/s")
+
+    engine = fresh_engine(os.path.join(work, 'bulk.db'))
+    stats = ingest_csv(engine, csv_path)
+    print(f"[bulk]   {stats['rows']:,}행 {stats['elapsed']}초 (파싱 {stats['parse_sec']}초 / 쓰기 {stats['write_sec']}초)"
+          f" -> {stats['rows_per_sec']:,} rows/s")
+    if legacy_rps:
+        print(f"속도 향상: {stats['rows_per_sec'] / legacy_rps:.1f}x")
@@ -0,0 +1,70 @@
+# bench_serialize.py
+# 대용량 통계 응답 직렬화 / 전송 크기 비교
+#   python bench_serialize.py
+#   python bench_serialize.py --companies 1000 5000 20000
+# 이전: jsonable_encoder + json.dumps (무압축) / 이후: orjson (cache.dumps) + gzip, ?shape=columnar
+# /api/stats 응답(YT / MO / CL)과 /api/company-list(사업장명 목록)를 사업장 수별로 만들어 측정합니다.
+import argparse
+import gzip
+import json
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+import cache
+from cache import GZIP_LEVEL
+from stats_kernels import company_columns
+
+YEARS = [2021, 2022, 2023, 2024, 2025]
+
+def make_dashboard_payload(companies, seed=42):
+    """사업장 수만큼의 CL + 연도별 YT / MO (일부 사업장은 일부 연도에만 기록)"""
+    rng = np.random.default_rng(seed)
+    CL = {}
+    for i in range(companies):
+        name = f"(주)사업장{i:05d} {'제조' if i % 3 else '서비스'}"
+        active = [y for y in YEARS if rng.random() < 0.7] or [YEARS[-1]]
+        rev = {y: int(rng.integers(1, 5000)) * 10000 for y in active}
+        cnt = {y: int(rng.integers(1, 400)) for y in active}
+        CL[name] = {"t": sum(rev.values()), "y": rev, "c": cnt}
+    YT = {y: {"rev": sum(v["y"].get(y, 0) for v in CL.values()), "cnt": sum(v["c"].get(y, 0) for v in CL.values())} for y in YEARS}
+    MO = {y: [YT[y]["rev"] // 12] * 12 for y in YEARS}
+    return {"CL": CL, "MO": MO, "YT": YT}
+
+def old_dumps(result):
+    return json.dumps(
+        jsonable_encoder(result), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def report(label, payload, repeat):
+    old_body, old_sec = timed(lambda: old_dumps(payload), repeat)
+    new_body, new_sec = timed(lambda: cache.dumps(payload), repeat)
+    gz_body, gz_sec = timed(lambda: gzip.compress(new_body, compresslevel=GZIP_LEVEL, mtime=0), repeat)
+    assert json.loads(old_body) == json.loads(new_body)
+    print(f"{label:<28} 직렬화 {old_sec * 1000:8.1f}ms -> {new_sec * 1000:7.1f}ms ({old_sec / new_sec:4.1f}x) / "
+          f"전송 {len(old_body) / 1024:8.1f}KB -> gzip {len(gz_body) / 1024:7.1f}KB "
+          f"({len(gz_body) / len(old_body) * 100:4.1f}%, 압축 {gz_sec * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--companies', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=5, help='반복 측정 후 최솟값 사용')
+    args = parser.parse_args()
+
+    print(f"serializer: {'orjson' if cache.orjson is not None else 'json (orjson 미설치)'} / gzip level {GZIP_LEVEL}")
+    for companies in args.companies:
+        stats = make_dashboard_payload(companies)
+        report(f"/api/stats ({companies:,}곳)", stats, args.repeat)
+        columnar_stats = dict(stats, CL=company_columns(stats["CL"]))
+        report(f"  ?shape=columnar", columnar_stats, args.repeat)
+        report(f"/api/company-list ({companies:,}곳)", sorted(stats["CL"]), args.repeat)
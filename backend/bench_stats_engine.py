@@ -0,0 +1,62 @@
+# bench_stats_engine.py
+# 통계 엔진 비교: sql (SQLite 집계) vs columnar (columnar.py 인메모리 NumPy)
+#   python bench_stats_engine.py --rows 1000000
+#   python bench_stats_engine.py --rows 10000000 --repeat 1
+# 응답 캐시를 거치지 않고 compute_* 함수를 직접 호출해 측정하며, 두 엔진의 결과 일치 여부도 확인합니다.
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from bench_ingest import make_synthetic_csv, fresh_engine
+from ingest import ingest_csv
+import columnar
+import stats_kernels
+
+CASES = [
+    ("dashboard (일 단위 기간)", lambda db: stats_kernels.compute_dashboard_stats(db, "2022-03-05", "2024-11-20")),
+    ("dashboard (연도 필터)", lambda db: stats_kernels.compute_dashboard_stats(db, "2022-03-05", "2025-12-31", [2024, 2025])),
+    ("period", lambda db: stats_kernels.compute_period_stats(db, "2023-01-15", "2024-06-30")),
+    ("retention", lambda db: stats_kernels.compute_retention_stats(db, [2022, 2023, 2024, 2025])),
+]
+
+def use_engine(name):
+    stats_kernels.STATS_ENGINE = name
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--companies', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3, help='반복 측정 후 최솟값 사용')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_engine_')
+    csv_path = os.path.join(work, 'csv_bench.csv')
+    make_synthetic_csv(csv_path, args.rows, companies=args.companies)
+    engine = fresh_engine(os.path.join(work, 'bench.db'))
+    ingest_csv(engine, csv_path)
+    db = sessionmaker(bind=engine)()
+
+    t = time.perf_counter()
+    store = columnar.get_store(db.connection())
+    print(f"{args.rows:,}행 columnar 적재: {time.perf_counter() - t:.2f}초 / {store.nbytes / 1024 / 1024:,.1f} MB")
+
+    for label, fn in CASES:
+        use_engine("sql")
+        sql_result, sql_sec = timed(lambda: fn(db), args.repeat)
+        use_engine("columnar")
+        col_result, col_sec = timed(lambda: fn(db), args.repeat)
+        print(f"{label:<24} sql {sql_sec:7.3f}초 / columnar {col_sec:7.3f}초 "
+              f"-> {sql_sec / col_sec:5.1f}x, 결과 일치: {sql_result == col_result}")
+    db.close()
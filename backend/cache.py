@@ -0,0 +1,289 @@
+# cache.py
+# /api/stats* 응답 캐시 (LRU + TTL)
+# 캐시 키 = (데이터/설정 세대 번호, 정규화된 경로 + 쿼리 파라미터)
+# 세대 번호(tb_app_meta.generation)는 적재 및 설정 변경 시 증가하므로
+# 변경 이후의 요청은 자동으로 새 키를 사용하게 됩니다. (별도 프로세스인 init_db.py 적재도 반영)
+# 같은 키의 요청이 동시에 캐시를 놓치면 계산은 한 번만 하고 나머지는 그 결과를 기다려 공유합니다. (single-flight)
+# 응답 본문은 orjson으로 직렬화하고, 큰 응답은 캐시에 넣을 때 gzip 본문도 함께 만들어 둡니다. (적중 시 재압축 없음)
+# ETag는 인코딩별로 다름 (gzip 본문은 "-gzip" 접미사) -> 프록시 / 브라우저가 두 본문을 섞지 않음
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from models import AppMeta
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 - 없으면 jsonable_encoder + json.dumps
+    orjson = None
+
+GENERATION_KEY = 'generation'
+
+# 이 크기(바이트) 이상인 응답은 gzip (0이면 압축 안 함) - 캐시 응답 + 그 외 응답(GZipMiddleware, main.py) 공통
+GZIP_MIN_SIZE = int(os.getenv("BIZHEALTH_GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = 6
+
+# ---------------------------------------------------------
+# [세대 번호] 데이터/설정 변경 카운터
+# ---------------------------------------------------------
+def get_generation(conn) -> int:
+    value = conn.execute(
+        text(f"SELECT value FROM {AppMeta.__tablename__} WHERE key = :key"), {"key": GENERATION_KEY}
+    ).scalar()
+    return value or 0
+
+def bump_generation(conn):
+    """현재 트랜잭션에서 세대 번호 증가 (커밋 시점에 반영)"""
+    conn.execute(text(
+        f"INSERT INTO {AppMeta.__tablename__} (key, value) VALUES (:key, 1) "
+        "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+    ), {"key": GENERATION_KEY})
+
+# ---------------------------------------------------------
+# [캐시] 스레드 안전 LRU + TTL
+# ---------------------------------------------------------
+class ResponseCache:
+    def __init__(self, maxsize=256, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def mark_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+            }
+
+response_cache = ResponseCache()
+
+def cache_key(request: Request, ignore=()) -> str:
+    """경로 + 쿼리 파라미터 정규화 (순서/중복/빈 값 무시, ignore에 있는 파라미터 제외)"""
+    items = sorted({(k, v) for k, v in request.query_params.multi_items() if v != '' and k not in ignore})
+    return request.url.path + '?' + '&'.join(f"{k}={v}" for k, v in items)
+
+# ---------------------------------------------------------
+# [Single-flight] 같은 키의 동시 계산 합치기
+# ---------------------------------------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """진행 중인 계산이 있으면 새로 계산하지 않고 그 결과를 기다림 (스레드 / asyncio 요청 모두)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}   # 동기 엔드포인트 (요청 스레드)
+        self._tasks = {}   # async 엔드포인트 (이벤트 루프)
+        self.leaders = 0
+        self.collapsed = 0
+        self.collapsed_by_route = {}
+
+    def _count(self, leader, route):
+        with self._lock:
+            if leader:
+                self.leaders += 1
+            else:
+                self.collapsed += 1
+                self.collapsed_by_route[route] = self.collapsed_by_route.get(route, 0) + 1
+
+    def do(self, key, fn, route=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._count(leader, route)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, compute, route=None):
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            # 첫 요청이 취소되어도(연결 끊김 등) 기다리는 요청을 위해 계산은 계속
+            task = self._tasks[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        self._count(leader, route)
+        return await asyncio.shield(task)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inflight": len(self._calls) + len(self._tasks),
+                "computed": self.leaders,
+                "collapsed": self.collapsed,
+                "collapsed_by_route": dict(self.collapsed_by_route),
+            }
+
+single_flight = SingleFlight()
+
+def _route(request: Request):
+    route = request.scope.get("route")
+    return getattr(route, "path", request.url.path)
+
+def dumps(result) -> bytes:
+    """결과 dict / list -> UTF-8 JSON (공백 없음, 숫자 키는 문자열로)"""
+    if orjson is not None:
+        # dict / list / 숫자 / 문자열 / NumPy 값은 orjson이 바로 처리, 그 외 타입만 jsonable_encoder로 변환
+        return orjson.dumps(
+            result, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        jsonable_encoder(result), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+# 캐시를 거치지 않는 엔드포인트의 기본 응답 클래스 (main.py)
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+def _encode(result):
+    """-> (JSON 본문, 본문 해시, gzip 본문 또는 None)"""
+    body = dumps(result)
+    compressed = None
+    if GZIP_MIN_SIZE > 0 and len(body) >= GZIP_MIN_SIZE:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body, hashlib.sha1(body).hexdigest(), compressed
+
+def etag_matches(etag, if_none_match):
+    """If-None-Match 목록(쉼표 구분, "*" 가능)에 etag가 있는지 - 약한 비교 (W/ 접두사 무시)"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def _respond(request: Request, entry):
+    body, digest, compressed = entry
+    use_gzip = compressed is not None and "gzip" in request.headers.get("accept-encoding", "")
+    etag = f'"{digest}-gzip"' if use_gzip else f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        response_cache.mark_not_modified()
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        # Content-Encoding이 있으면 GZipMiddleware는 다시 압축하지 않음
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=compressed, media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached_json(request: Request, db, compute):
+    """
+    compute() 결과를 JSON으로 캐시해 응답. ETag / If-None-Match(304) 지원
+    - db: 세대 번호 조회용 세션
+    """
+    key = (get_generation(db), cache_key(request))
+    entry = response_cache.get(key)
+    if entry is None:
+        def compute_entry():
+            entry = _encode(compute())
+            response_cache.put(key, entry)  # 합치기 해제 전에 저장 -> 직후 요청은 캐시 적중
+            return entry
+        entry = single_flight.do(key, compute_entry, _route(request))
+    return _respond(request, entry)
+
+async def cached_json_async(request: Request, db, compute):
+    """cached_json의 async 버전 - compute()는 코루틴 (프로세스 풀 작업 등, workers.py)"""
+    key = (await run_in_threadpool(get_generation, db), cache_key(request))
+    entry = response_cache.get(key)
+    if entry is None:
+        async def compute_entry():
+            entry = await run_in_threadpool(_encode, await compute())
+            response_cache.put(key, entry)
+            return entry
+        entry = await single_flight.do_async(key, compute_entry, _route(request))
+    return _respond(request, entry)
+
+# ---------------------------------------------------------
+# [계산 결과 캐시] 같은 집계를 여러 페이지 / 모양으로 응답할 때 (paging.py)
+# ---------------------------------------------------------
+def cached_value(request: Request, db, compute, ignore=()):
+    """
+    compute() 결과(파이썬 객체)를 캐시 - ignore에 있는 파라미터(limit / cursor 등)만 다른 요청은 같은 결과를 사용
+    반환값은 여러 요청이 공유하므로 수정하지 말 것
+    """
+    key = (get_generation(db), 'value:' + cache_key(request, ignore))
+    value = response_cache.get(key)
+    if value is None:
+        def compute_value():
+            value = compute()
+            response_cache.put(key, value)
+            return value
+        value = single_flight.do(key, compute_value, _route(request))
+    return value
+
+async def cached_value_async(request: Request, db, compute, ignore=()):
+    """cached_value의 async 버전 - compute()는 코루틴"""
+    key = (await run_in_threadpool(get_generation, db), 'value:' + cache_key(request, ignore))
+    value = response_cache.get(key)
+    if value is None:
+        async def compute_value():
+            value = await compute()
+            response_cache.put(key, value)
+            return value
+        value = await single_flight.do_async(key, compute_value, _route(request))
+    return value
@@ -0,0 +1,83 @@
+# classifier.py
+# 검진종류(checkup_type) -> 검진분류(ExamRule.category_name) 분류기
+# 규칙 집합이 바뀔 때만 다시 만들고, 고유 검진종류 문자열별 결과를 메모이즈합니다.
+# (검진종류 고유값은 수백 개, 접수 행은 수백만 개)
+import re
+
+from sqlalchemy import select, text
+
+from models import Checkup, ExamRule
+
+DEFAULT_CATEGORY = "기타"
+DEFAULT_RULES = [("종합검진", ["종합"]), ("기타", [])]  # ExamRule 테이블이 비어 있을 때
+
+def load_rules(conn):
+    """우선순위 순 [(분류명, [키워드, ...]), ...]"""
+    rows = conn.execute(
+        select(ExamRule.category_name, ExamRule.keywords).order_by(ExamRule.priority)
+    ).all()
+    if not rows:
+        return DEFAULT_RULES
+    return [(name, [k.strip() for k in (keywords or "").split(',') if k.strip()]) for name, keywords in rows]
+
+class ExamClassifier:
+    """
+    모든 키워드를 우선순위 순 정규식 alternation 하나로 컴파일
+    - 각 위치에서 lookahead로 시작하는 키워드를 찾고, 그중 가장 앞선 규칙을 채택
+    - 결과는 기존 방식(우선순위 순으로 규칙을 돌며 키워드 포함 여부 검사)과 동일
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        self.categories = [name for name, _ in rules]
+        if DEFAULT_CATEGORY not in self.categories:
+            self.categories.append(DEFAULT_CATEGORY)
+
+        self._rank = {}  # 키워드 -> 가장 앞선 규칙 번호
+        for idx, (_, keywords) in enumerate(rules):
+            for k in keywords:
+                self._rank.setdefault(k, idx)
+        ordered = sorted(self._rank, key=self._rank.get)
+        self._pattern = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))') if ordered else None
+        self._memo = {}
+
+    def classify(self, checkup_type):
+        found = self._memo.get(checkup_type)
+        if found is None:
+            found = DEFAULT_CATEGORY
+            c_type = (checkup_type or "").strip()
+            if c_type and self._pattern:
+                ranks = [self._rank[m.group(1)] for m in self._pattern.finditer(c_type)]
+                if ranks:
+                    found = self.rules[min(ranks)][0]
+            self._memo[checkup_type] = found
+        return found
+
+_classifiers = {}
+
+def get_classifier(conn):
+    """현재 ExamRule 집합에 해당하는 분류기 (규칙이 같으면 재사용)"""
+    rules = load_rules(conn)
+    key = tuple((name, tuple(keywords)) for name, keywords in rules)
+    clf = _classifiers.get(key)
+    if clf is None:
+        _classifiers.clear()
+        clf = _classifiers[key] = ExamClassifier(rules)
+    return clf
+
+def reclassify_checkups(conn):
+    """
+    tb_checkup.category 일괄 재분류 (규칙 변경 / 마이그레이션 시)
+    고유 검진종류별 결과를 임시 테이블에 넣고 UPDATE 한 번으로 반영
+    """
+    clf = get_classifier(conn)
+    types = [r[0] for r in conn.execute(select(Checkup.checkup_type).distinct()) if r[0] is not None]
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS _exam_category (checkup_type TEXT PRIMARY KEY, category TEXT)"))
+    conn.execute(text("DELETE FROM _exam_category"))
+    if types:
+        conn.execute(text("INSERT INTO _exam_category VALUES (:t, :c)"),
+                     [{"t": t, "c": clf.classify(t)} for t in types])
+    category = (
+        "coalesce((SELECT e.category FROM _exam_category e WHERE e.checkup_type = tb_checkup.checkup_type), "
+        f"'{DEFAULT_CATEGORY}')"
+    )
+    conn.execute(text(f"UPDATE tb_checkup SET category = {category} WHERE category IS NOT {category}"))
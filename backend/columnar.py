@@ -0,0 +1,191 @@
+# columnar.py
+# 통계 API용 인메모리 컬럼 저장소 (선택 사항, BIZHEALTH_STATS_ENGINE=columnar)
+# - tb_checkup에서 필요한 컬럼만 NumPy 배열로 적재 (문자열은 정렬된 사전 + 정수 코드)
+# - 대시보드 / 기간 / 유지이탈 통계를 bincount 기반 그룹 집계로 계산
+# - 세대 번호(tb_app_meta.generation)가 바뀌면 다시 적재 (적재 / 매핑 / 규칙 변경 반영)
+# 결과는 SQL 경로(main.py compute_*_stats)와 동일해야 합니다.
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import select
+
+from models import Checkup, CompanyMap
+from cache import get_generation
+
+CHUNK_SIZE = 500_000
+COLUMNS = ['checkup_date', 'year', 'month', 'company_name', 'category', 'total_price']
+
+def _encode(chunks):
+    """문자열 컬럼 -> (정렬된 고유값 배열, int32 코드), NULL은 -1"""
+    chunks = [c for c in chunks if len(c)]
+    if not chunks:
+        return np.array([], dtype=object), np.array([], dtype=np.int32)
+    cat = union_categoricals([c.astype('category') for c in chunks], sort_categories=True)
+    return np.asarray(cat.categories, dtype=object), cat.codes.astype(np.int32)
+
+class ColumnarStore:
+    def __init__(self, conn, generation):
+        self.generation = generation
+        # 청크 단위로 읽어 파이썬 튜플은 CHUNK_SIZE 행까지만 유지
+        result = conn.exec_driver_sql(f"SELECT {', '.join(COLUMNS)} FROM {Checkup.__tablename__}")
+        frames = []
+        while rows := result.fetchmany(CHUNK_SIZE):
+            frames.append(pd.DataFrame.from_records(rows, columns=COLUMNS))
+        col = lambda name: [f[name] for f in frames]
+        num = lambda name, dtype: (
+            np.concatenate([f[name].fillna(0).to_numpy(dtype) for f in frames]) if frames else np.array([], dtype=dtype)
+        )
+
+        self.rows = sum(len(f) for f in frames)
+        self.dates, self.date_codes = _encode(col('checkup_date'))
+        self.categories, self.category_codes = _encode(col('category'))
+        self.price = num('total_price', np.int64)
+        month = num('month', np.int16)
+        self.month = np.where((month >= 1) & (month <= 12), month, 0)  # 0 = 월 불명
+        self.years, self.year_codes = np.unique(num('year', np.int32), return_inverse=True)
+        self.year_codes = self.year_codes.astype(np.int32)
+
+        # 통계용 사업장명 = coalesce(매핑 표준명, 원본명), 0번 코드는 NULL
+        companies, company_codes = _encode(col('company_name'))
+        mapping = dict(conn.execute(select(CompanyMap.original_name, CompanyMap.standard_name)).all())
+        final = [mapping.get(c, c) for c in companies]
+        self.finals = np.array([None] + sorted(set(final)), dtype=object)
+        index = {name: i for i, name in enumerate(self.finals)}
+        to_final = np.array([index[n] for n in final] + [0], dtype=np.int32)  # -1(NULL) -> 0
+        self.final_codes = to_final[company_codes]
+        self.nbytes = sum(a.nbytes for a in (
+            self.date_codes, self.category_codes, self.price, self.month, self.year_codes, self.final_codes))
+
+    # -----------------------------------------------------
+    # 필터 / 그룹 집계
+    # -----------------------------------------------------
+    def _mask(self, start_date=None, end_date=None, years=None, excludes=None):
+        mask = np.ones(self.rows, dtype=bool)
+        if start_date or end_date:
+            # 정렬된 날짜 사전에서 위치를 찾아 문자열 비교(checkup_date >= / <=)와 같은 결과
+            mask &= self.date_codes >= 0
+            if start_date: mask &= self.date_codes >= np.searchsorted(self.dates, start_date, 'left')
+            if end_date: mask &= self.date_codes < np.searchsorted(self.dates, end_date, 'right')
+        if years:
+            mask &= np.isin(self.year_codes, np.flatnonzero(np.isin(self.years, years)))
+        if excludes:
+            # SQL의 NOT IN과 같이 사업장명이 NULL인 행도 제외
+            excludes = set(excludes)
+            hidden = np.array([name is None or name in excludes for name in self.finals])
+            mask &= ~hidden[self.final_codes]
+        return mask
+
+    def _group(self, mask, *keys):
+        """keys: (코드 배열, 코드 개수) -> [(코드..., 합계, 건수)] (코드 순 정렬)"""
+        flat = np.zeros(self.rows, dtype=np.int64)
+        size = 1
+        for codes, n in keys:
+            flat = flat * n + codes
+            size *= n
+        flat = flat[mask]
+        cnt = np.bincount(flat, minlength=size)
+        rev = np.bincount(flat, weights=self.price[mask], minlength=size)
+        out = []
+        for k in np.flatnonzero(cnt):
+            parts = []
+            rest = int(k)
+            for _, n in reversed(keys):
+                rest, c = divmod(rest, n)
+                parts.append(c)
+            out.append((*reversed(parts), int(round(rev[k])), int(cnt[k])))
+        return out
+
+    def _year(self, code):
+        return int(self.years[code])
+
+    # -----------------------------------------------------
+    # /api/stats
+    # -----------------------------------------------------
+    def dashboard_stats(self, start_date=None, end_date=None, years=None, excludes=None):
+        mask = self._mask(start_date, end_date, years, excludes)
+        ny, nf = len(self.years), len(self.finals)
+
+        YT = {}
+        for yc, rev, cnt in self._group(mask, (self.year_codes, ny)):
+            if self._year(yc): YT[self._year(yc)] = {"rev": rev, "cnt": cnt}
+
+        MO = {y: [0]*12 for y in YT.keys()}
+        for yc, m, rev, cnt in self._group(mask, (self.year_codes, ny), (self.month, 13)):
+            y = self._year(yc)
+            if y and m:
+                if y not in MO: MO[y] = [0]*12
+                MO[y][m-1] = rev
+
+        CL = {}
+        for fc, yc, amt, cnt in self._group(mask, (self.final_codes, nf), (self.year_codes, ny)):
+            name = self.finals[fc] or "기타"
+            if name not in CL: CL[name] = {"t": 0, "y": {}, "c": {}}
+            CL[name]["t"] += amt
+            CL[name]["y"][self._year(yc)] = amt
+            CL[name]["c"][self._year(yc)] = cnt
+
+        return {"CL": CL, "MO": MO, "YT": YT}
+
+    # -----------------------------------------------------
+    # /api/stats/period
+    # -----------------------------------------------------
+    def period_stats(self, start_date, end_date, excludes=None, categories=(), biz_limit=50):
+        mask = self._mask(start_date, end_date, excludes=excludes)
+        total_count = 0
+        total_amount = 0
+        by_type = {name: {"count": 0, "amount": 0} for name in categories}
+        by_biz = {}
+
+        for cc, fc, amt, cnt in self._group(mask, (self.category_codes + 1, len(self.categories) + 1),
+                                            (self.final_codes, len(self.finals))):
+            total_count += cnt
+            total_amount += amt
+            found_key = (self.categories[cc - 1] if cc else None) or "기타"
+            if found_key not in by_type: by_type[found_key] = {"count": 0, "amount": 0}
+            by_type[found_key]["count"] += cnt
+            by_type[found_key]["amount"] += amt
+
+            c_name = self.finals[fc] or "미지정"
+            if c_name not in by_biz: by_biz[c_name] = {"count": 0, "amount": 0}
+            by_biz[c_name]["count"] += cnt
+            by_biz[c_name]["amount"] += amt
+
+        if biz_limit is not None:
+            by_biz = dict(heapq.nlargest(biz_limit, by_biz.items(), key=lambda item: item[1]['amount']))
+        return {
+            "total": {"count": total_count, "amount": total_amount},
+            "byType": by_type,
+            "byBiz": by_biz
+        }
+
+    # -----------------------------------------------------
+    # /api/stats/retention (연도 x 사업장 매출)
+    # -----------------------------------------------------
+    def revenue_by_year(self, min_year, max_year):
+        """{연도: {사업장명: 매출}}"""
+        codes = np.flatnonzero((self.years >= min_year) & (self.years <= max_year))
+        mask = np.isin(self.year_codes, codes)
+        full_data = {}
+        for yc, fc, rev, cnt in self._group(mask, (self.year_codes, len(self.years)), (self.final_codes, len(self.finals))):
+            y = self._year(yc)
+            if y not in full_data: full_data[y] = {}
+            full_data[y][self.finals[fc] or "미지정"] = rev
+        return full_data
+
+_store = None
+_lock = threading.Lock()
+
+def get_store(conn):
+    """현재 세대 번호의 저장소 (바뀌었으면 다시 적재)"""
+    global _store
+    generation = get_generation(conn)
+    store = _store
+    if store is None or store.generation != generation:
+        with _lock:
+            if _store is None or _store.generation != generation:
+                _store = ColumnarStore(conn, generation)
+            store = _store
+    return store
@@ -0,0 +1,97 @@
+# company_dim.py
+# 사업장 차원 테이블 (tb_company_dim): 원본 사업장명 -> 통계용 표준명 / 제외 여부
+# tb_checkup.company_id로 연결해서, 통계 쿼리의 제외 조건을
+# coalesce(매핑 표준명, 원본명) NOT IN (...) 문자열 비교 대신 정수 조인 + 플래그 조건으로 처리합니다.
+# - 적재 시: 새 원본명 등록 후 id 부여 (assign_company_ids)
+# - 매핑 / 제외 변경 시: 표준명 / 제외 여부 재계산 (resolve_company_dim)
+# - 설정 화면 저장(/api/config/sync): 저장된 목록과의 차이만 반영 (sync_company_config)
+from sqlalchemy import text
+
+from models import CompanyDim, CompanyMap, CompanyExclude
+
+DIM = CompanyDim.__tablename__
+
+def resolve_company_dim(conn):
+    """현재 매핑 / 제외 목록 기준으로 표준명과 제외 여부 갱신 (사업장 수만큼의 작은 테이블)"""
+    standard = (
+        f"coalesce((SELECT m.standard_name FROM {CompanyMap.__tablename__} m "
+        f"WHERE m.original_name = {DIM}.original_name), original_name)"
+    )
+    conn.execute(text(f"UPDATE {DIM} SET standard_name = {standard} WHERE standard_name IS NOT {standard}"))
+    excluded = f"(standard_name IN (SELECT company_name FROM {CompanyExclude.__tablename__}))"
+    conn.execute(text(f"UPDATE {DIM} SET excluded = {excluded} WHERE excluded IS NOT {excluded}"))
+
+def assign_company_ids(conn, names):
+    """원본 사업장명 목록 -> {원본명: id} (처음 보는 이름은 등록 후 표준명 / 제외 여부 계산)"""
+    names = sorted({n for n in names if n is not None})
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS _ingest_company (name TEXT PRIMARY KEY)"))
+    conn.execute(text("DELETE FROM _ingest_company"))
+    if not names:
+        return {}
+    conn.execute(text("INSERT INTO _ingest_company VALUES (:name)"), [{"name": n} for n in names])
+    created = conn.execute(text(
+        f"INSERT OR IGNORE INTO {DIM} (original_name, excluded) SELECT name, 0 FROM _ingest_company"
+    )).rowcount
+    if created:
+        resolve_company_dim(conn)
+    return dict(conn.execute(text(
+        f"SELECT d.original_name, d.id FROM _ingest_company t JOIN {DIM} d ON d.original_name = t.name"
+    )).all())
+
+def build_company_dim(conn):
+    """기존 DB: 모든 원본 사업장명 등록 + tb_checkup.company_id 채우기"""
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {DIM} (original_name, excluded) "
+        "SELECT DISTINCT company_name, 0 FROM tb_checkup WHERE company_name IS NOT NULL"
+    ))
+    conn.execute(text(
+        f"UPDATE tb_checkup SET company_id = (SELECT d.id FROM {DIM} d WHERE d.original_name = tb_checkup.company_name) "
+        "WHERE company_name IS NOT NULL AND company_id IS NULL"
+    ))
+    resolve_company_dim(conn)
+
+def sync_company_config(conn, maps, excludes):
+    """
+    매핑 / 제외 목록 전체(화면의 현재 상태)를 받아 저장된 내용과의 차이만 반영
+    maps: {원본명: 표준명}, excludes: 제외할 표준명 목록
+    -> 추가 / 변경 / 삭제 내역 + 영향받은 표준 사업장명 (매핑 변경분, 제외 변경분)
+    """
+    stored_maps = dict(conn.execute(text(
+        f"SELECT original_name, standard_name FROM {CompanyMap.__tablename__}")).all())
+    stored_excludes = {r[0] for r in conn.execute(text(f"SELECT company_name FROM {CompanyExclude.__tablename__}"))}
+    excludes = set(excludes)
+
+    added = sorted(o for o in maps if o not in stored_maps)
+    updated = sorted(o for o in maps if o in stored_maps and stored_maps[o] != maps[o])
+    removed = sorted(o for o in stored_maps if o not in maps)
+    excl_added = sorted(excludes - stored_excludes)
+    excl_removed = sorted(stored_excludes - excludes)
+
+    # 변경분만 일괄 실행 (쓰기 잠금은 첫 쓰기부터 커밋까지만)
+    if removed:
+        conn.execute(text(f"DELETE FROM {CompanyMap.__tablename__} WHERE original_name = :o"),
+                     [{"o": o} for o in removed])
+    if updated:
+        conn.execute(text(f"UPDATE {CompanyMap.__tablename__} SET standard_name = :s WHERE original_name = :o"),
+                     [{"o": o, "s": maps[o]} for o in updated])
+    if added:
+        conn.execute(text(f"INSERT INTO {CompanyMap.__tablename__} (original_name, standard_name) VALUES (:o, :s)"),
+                     [{"o": o, "s": maps[o]} for o in added])
+    if excl_removed:
+        conn.execute(text(f"DELETE FROM {CompanyExclude.__tablename__} WHERE company_name = :n"),
+                     [{"n": n} for n in excl_removed])
+    if excl_added:
+        conn.execute(text(f"INSERT INTO {CompanyExclude.__tablename__} (company_name) VALUES (:n)"),
+                     [{"n": n} for n in excl_added])
+
+    # 매핑이 바뀐 원본명의 이전 / 새 표준명 -> 집계 큐브 재계산 대상
+    mapped_names = set()
+    for o in added + updated + removed:
+        mapped_names.add(stored_maps.get(o, o))
+        mapped_names.add(maps.get(o, o))
+    return {
+        "maps": {"added": added, "updated": updated, "removed": removed},
+        "excludes": {"added": excl_added, "removed": excl_removed},
+        "mapped_names": sorted(mapped_names),
+        "excluded_names": sorted(set(excl_added) | set(excl_removed)),
+    }
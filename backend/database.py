@@ -0,0 +1,83 @@
+# database.py
+# SQLite 연결 설정 (main.py / init_db.py 공용)
+# - WAL 모드: 쓰기(설정 저장, 적재) 중에도 통계 조회가 막히지 않음 (조회는 마지막 커밋 기준)
+# - 연결 PRAGMA: cache_size / mmap_size / temp_store / busy_timeout
+# - 쓰기 엔진: 연결 1개 풀 -> 쓰기 요청은 순서대로 하나씩 처리
+# - 읽기 엔진: mode=ro 읽기 전용 연결 풀 (통계 조회 전용, get_read_db)
+# - 서버용 두 엔진에는 SQL 계측(쿼리 수 / 시간 / 느린 쿼리 로그, metrics.py)을 등록
+# 환경 변수
+#   BIZHEALTH_DB_PATH      DB 파일 경로 (기본: backend/healthcare.db)
+#   BIZHEALTH_SQLITE_WAL=0 기존 방식 (롤백 저널 + 단일 엔진, WAL을 쓸 수 없는 네트워크 드라이브 등)
+#   BIZHEALTH_READ_POOL    읽기 연결 수 (기본 8)
+#   BIZHEALTH_SQLITE_BUSY_TIMEOUT  다른 연결의 쓰기(적재 작업 등)가 끝나기를 기다리는 시간 (ms, 기본 30000)
+import os
+import sqlite3
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from metrics import instrument_engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get("BIZHEALTH_DB_PATH", os.path.join(BASE_DIR, "healthcare.db"))
+WAL_ENABLED = os.environ.get("BIZHEALTH_SQLITE_WAL", "1") != "0"
+READ_POOL_SIZE = int(os.environ.get("BIZHEALTH_READ_POOL", "8"))
+BUSY_TIMEOUT_MS = int(os.environ.get("BIZHEALTH_SQLITE_BUSY_TIMEOUT", "30000"))
+
+PRAGMAS = {
+    "cache_size": -65536,     # 페이지 캐시 64MB (음수 = KiB 단위)
+    "mmap_size": 268435456,   # 메모리 매핑 256MB
+    "temp_store": "MEMORY",   # 임시 테이블 / 정렬용 B-tree를 메모리에
+    "busy_timeout": BUSY_TIMEOUT_MS,  # 잠금 대기 (적재 작업이 커밋하는 동안 설정 저장이 'database is locked'로 실패하지 않도록)
+}
+
+def _apply_pragmas(dbapi_conn, readonly=False):
+    cur = dbapi_conn.cursor()
+    if not readonly:
+        cur.execute(f"PRAGMA journal_mode = {'WAL' if WAL_ENABLED else 'DELETE'}")
+        if WAL_ENABLED:
+            cur.execute("PRAGMA synchronous = NORMAL")  # WAL에서는 체크포인트 시에만 fsync
+    for key, value in PRAGMAS.items():
+        cur.execute(f"PRAGMA {key} = {value}")
+    cur.close()
+
+def make_engine(path=DB_PATH, readonly=False, pool_size=None, max_overflow=0):
+    """PRAGMA가 적용된 엔진 (readonly=True: mode=ro URI 연결)"""
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if pool_size is not None:
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow)
+    if readonly:
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        kwargs["creator"] = lambda: sqlite3.connect(uri, uri=True, check_same_thread=False)
+    engine = create_engine(f"sqlite:///{path}", **kwargs)
+    event.listen(engine, "connect", lambda dbapi_conn, _: _apply_pragmas(dbapi_conn, readonly))
+    return engine
+
+if WAL_ENABLED:
+    engine = make_engine(DB_PATH, pool_size=1)
+    # 평소에는 READ_POOL_SIZE개를 유지하고, 몰릴 때는 요청 스레드 수(FastAPI 기본 40)까지 임시 연결 허용
+    read_engine = make_engine(DB_PATH, readonly=True, pool_size=READ_POOL_SIZE, max_overflow=32)
+else:
+    engine = read_engine = make_engine(DB_PATH)
+for _engine in {engine, read_engine}:
+    instrument_engine(_engine)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def get_db():
+    """쓰기용 세션 (설정 저장 등)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    """조회 전용 세션 (통계 API)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
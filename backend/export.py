@@ -0,0 +1,133 @@
+# export.py
+# 검진 접수 내보내기 (/api/export/checkups): /api/stats와 같은 필터로 고른 tb_checkup 행을 CSV / Parquet으로 스트리밍
+# - 행은 yield_per 배치로 읽어 배치마다 인코딩해서 바로 내보냄 -> 결과 크기와 무관하게 메모리 일정
+# - 동기 제너레이터라 Starlette가 스레드 풀에서 돌림 -> 큰 내보내기 중에도 다른 요청은 그대로 처리 (WAL 읽기 연결)
+# - 환자 개인정보(tb_patient)는 포함하지 않고 patient_id만 내보냄
+import csv
+import io
+from datetime import date
+
+from sqlalchemy import func, select
+
+from database import ReadSessionLocal
+from models import Checkup, CompanyDim, CompanyExclude
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성 - 없으면 CSV만
+    pa = None
+
+BATCH_ROWS = 10_000
+CSV_ENCODING = "utf-8-sig"  # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+
+STANDARD_NAME = func.coalesce(CompanyDim.standard_name, Checkup.company_name)  # 매핑 반영 사업장명
+COLUMNS = [
+    ("receipt_no", Checkup.receipt_no, "string"),
+    ("checkup_date", Checkup.checkup_date, "string"),
+    ("year", Checkup.year, "int32"),
+    ("month", Checkup.month, "int32"),
+    ("company_name", Checkup.company_name, "string"),
+    ("standard_name", STANDARD_NAME, "string"),
+    ("department", Checkup.department, "string"),
+    ("checkup_type", Checkup.checkup_type, "string"),
+    ("category", Checkup.category, "string"),
+    ("package_name", Checkup.package_name, "string"),
+    ("package_code", Checkup.package_code, "string"),
+    ("send_type", Checkup.send_type, "string"),
+    ("age", Checkup.age, "int32"),
+    ("patient_id", Checkup.patient_id, "int64"),
+    ("total_price", Checkup.total_price, "int64"),
+    ("user_price", Checkup.user_price, "int64"),
+    ("corp_price", Checkup.corp_price, "int64"),
+    ("nhis_price", Checkup.nhis_price, "int64"),
+    ("remarks", Checkup.remarks, "string"),
+]
+NAMES = [name for name, _, _ in COLUMNS]
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def parquet_available():
+    return pa is not None
+
+def export_filename(fmt):
+    return f"checkups_{date.today():%Y%m%d}.{FORMATS[fmt][1]}"
+
+# ---------------------------------------------------------
+# [조회] /api/stats와 같은 필터
+# ---------------------------------------------------------
+def export_query(db, start_date=None, end_date=None, years=None, companies=None,
+                 exclude_companies=None, ignore_exclude=False):
+    """
+    - companies: 표준 사업장명 (매핑된 원본명 행 포함, 지정한 사업장은 제외 목록과 무관)
+    - exclude_companies: 추가로 뺄 표준 사업장명 / ignore_exclude: 제외 목록(tb_company_exclude) 미적용
+    """
+    query = select(*[col for _, col, _ in COLUMNS]).select_from(Checkup) \
+        .outerjoin(CompanyDim, Checkup.company_id == CompanyDim.id)
+    if start_date: query = query.where(Checkup.checkup_date >= start_date)
+    if end_date: query = query.where(Checkup.checkup_date <= end_date)
+    if years: query = query.where(Checkup.year.in_(years))
+    if companies:
+        query = query.where(Checkup.company_id.in_(
+            select(CompanyDim.id).where(CompanyDim.standard_name.in_(companies))))
+    elif not ignore_exclude and db.query(CompanyExclude.company_name).first() is not None:
+        query = query.where(CompanyDim.excluded == 0)  # 제외 플래그 (NULL 사업장도 제외, /api/stats와 같음)
+    if exclude_companies: query = query.where(STANDARD_NAME.not_in(exclude_companies))
+    return query
+
+def _batches(filters):
+    """읽기 전용 세션을 직접 열어 yield_per 배치로 행 묶음 반환 (응답이 끝날 때까지 연결 유지)"""
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(export_query(db, **filters).execution_options(yield_per=BATCH_ROWS))
+        for rows in result.partitions():
+            yield rows
+    finally:
+        db.close()
+
+# ---------------------------------------------------------
+# [인코딩] 배치마다 bytes로 내보내기
+# ---------------------------------------------------------
+def stream_csv(filters):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(NAMES)
+    yield buf.getvalue().encode(CSV_ENCODING)
+    for rows in _batches(filters):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+
+class _Sink(io.RawIOBase):
+    """ParquetWriter 출력을 모았다가 배치마다 꺼내 가는 버퍼"""
+    def __init__(self):
+        self.chunks = []
+    def writable(self):
+        return True
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+def stream_parquet(filters):
+    """배치 하나 = row group 하나"""
+    schema = pa.schema([(name, getattr(pa, kind)()) for name, _, kind in COLUMNS])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in _batches(filters):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def stream_export(fmt, filters):
+    return stream_parquet(filters) if fmt == "parquet" else stream_csv(filters)
@@ -0,0 +1,500 @@
+# ingest.py
+# 검진 CSV 벌크 적재 엔진 (pandas 컬럼 단위 정규화 + executemany 배치 INSERT)
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from models import Checkup, IngestFile
+from stats_cube import refresh_cube
+from item_cube import refresh_item_cube
+from cache import bump_generation
+from classifier import get_classifier
+from company_dim import assign_company_ids
+from item_codes import write_item_codes
+
+BATCH_SIZE = 20000  # executemany 1회당 행 수
+CHUNK_ROWS = 50000  # 청크 적재(ingest_csv_chunked) 시 한 번에 읽는 CSV 행 수
+CHECKUP_CSV_PATTERN = "csv20*.csv"  # 검진 내역 파일 이름 규칙 (init_db.py / 업로드 적재 공용)
+
+# CSV 컬럼 -> tb_checkup 텍스트 컬럼
+TEXT_COLUMNS = {
+    'package_name': '패키지',
+    'package_code': '패키지코드',
+    'send_type': '발송구분',
+    'remarks': '비고',
+    'company_name': '거래처명',
+    'department': '부서',
+    'checkup_type': '검진종류',
+}
+
+# CSV 컬럼 -> tb_checkup 금액/숫자 컬럼
+INT_COLUMNS = {
+    'age': '나이',
+    'total_price': '검사금액',
+    'user_price': '본인금액',
+    'corp_price': '회사금액',
+    'nhis_price': '공단금액',
+}
+
+# ---------------------------------------------------------
+# [유틸리티] 컬럼 단위 변환 (구 init_db.py의 parse_int / convert_date 규칙)
+# ---------------------------------------------------------
+def _column(df, name, default=''):
+    """df.get(name)과 동일하되, 컬럼이 없으면 default로 채운 Series 반환"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
+
+def to_text(s):
+    """str(val)과 동일한 결과 (결측값은 'nan')"""
+    return s.astype(str).fillna('nan')
+
+def parse_int_series(s):
+    """숫자 변환 (콤마, 따옴표 제거, 소수점 이하 버림, 실패 시 0)"""
+    if pd.api.types.is_numeric_dtype(s):
+        return pd.Series(np.trunc(s.astype('float64')), index=s.index).fillna(0).astype('int64')
+    cleaned = (to_text(s).str.replace(',', '', regex=False)
+                         .str.replace('"', '', regex=False)
+                         .str.split('.').str[0]
+                         .str.strip())
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0).astype('int64')
+
+def convert_date_series(s):
+    """날짜 변환 (YYYYMMDD / YYYYMMDD.0 / YYYY.MM.DD -> YYYY-MM-DD, 그 외는 그대로)"""
+    s = to_text(s).str.strip()
+    s = s.where(~(s.str.endswith('.0') & (s.str.len() == 10)), s.str[:-2])
+    digits = (s.str.len() == 8) & s.str.isdigit()
+    s = s.where(~digits, s.str[:4] + '-' + s.str[4:6] + '-' + s.str[6:])
+    dotted = s.str.match(r'^\d{4}[./]\d{2}[./]\d{2}$')
+    return s.where(~dotted, s.str.replace(r'[./]', '-', regex=True))
+
+def date_parts(iso):
+    """YYYY-MM-DD 문자열 -> (연도, 월) Series. 형식이 다르면 None"""
+    valid = iso.str.match(r'^\d{4}-\d{2}-\d{2}$')
+    def part(a, b):
+        num = pd.to_numeric(iso.str[a:b].where(valid), errors='coerce')
+        return num.astype(object).where(num.notna(), None).map(lambda v: v if v is None else int(v))
+    return part(0, 4), part(5, 7)
+
+# ---------------------------------------------------------
+# [Step 1] 정규화: DataFrame -> 환자 / 검진 / 상세 프레임
+# ---------------------------------------------------------
+def read_source(path, **kwargs):
+    df = pd.read_csv(path, **kwargs)
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+def infer_dtypes(path, chunk_rows=CHUNK_ROWS):
+    """
+    파일 전체를 한 번에 읽었을 때의 컬럼 타입 + 전체 행 수 (청크 단위로 훑어서 계산)
+    청크마다 타입 추론이 달라지면(결측값 유무로 int <-> float 등) 텍스트 변환 결과가 달라지므로
+    청크 적재 시 이 타입을 고정해서 읽습니다.
+    """
+    kinds, rows = {}, 0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        rows += len(chunk)
+        for col, dtype in chunk.dtypes.items():
+            kinds.setdefault(col, set()).add(dtype)
+    dtypes = {}
+    for col, found in kinds.items():
+        if len(found) == 1:
+            dtypes[col] = found.pop()
+        elif all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in found):
+            dtypes[col] = 'float64'
+        else:
+            dtypes[col] = str
+    return dtypes, rows
+
+def iter_source_chunks(path, chunk_rows=CHUNK_ROWS, dtypes=None):
+    """read_source와 같은 결과를 chunk_rows 행씩 나눠서 반환"""
+    if dtypes is None:
+        dtypes, _ = infer_dtypes(path, chunk_rows)
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=dtypes):
+        chunk.columns = [c.strip() for c in chunk.columns]
+        yield chunk
+
+def normalize_frame(df):
+    """
+    원본 CSV 프레임을 적재용 프레임 3개로 변환
+    - patients: 환자 식별 (LifeCode + 주민번호) 별 첫 행
+    - checkups: 접수번호 별 첫 행 (파일 내 중복 제거)
+    - details: (접수번호, 검사코드) 고유 쌍 ('검진항목메모' + '패키지코드')
+    """
+    lc = to_text(_column(df, 'LifeCode')).str.strip()
+    lc = lc.where(~lc.str.endswith('.0'), lc.str[:-2])
+    rn = to_text(_column(df, '주민번호')).str.strip()
+    valid = (lc != '') & (lc != 'nan') & (rn != '') & (rn != 'nan')
+
+    name_col = '성명' if '성명' in df.columns else '가족성명'
+    out = pd.DataFrame({
+        'life_code': lc,
+        'resident_no': rn,
+        'name': to_text(_column(df, name_col)),
+        'gender': to_text(_column(df, '성별')),
+        'receipt_no': to_text(_column(df, '접수번호')).str.strip(),
+        'checkup_date': convert_date_series(_column(df, '검진일')),
+    })
+    out['year'], out['month'] = date_parts(out['checkup_date'])
+    for col, src in TEXT_COLUMNS.items():
+        out[col] = to_text(_column(df, src))
+    for col, src in INT_COLUMNS.items():
+        out[col] = parse_int_series(_column(df, src, 0))
+    out['memo'] = to_text(_column(df, '검진항목메모'))
+    out = out[valid]
+
+    patients = out.drop_duplicates(['life_code', 'resident_no'])[['life_code', 'resident_no', 'name', 'gender']]
+    checkups = out.drop_duplicates('receipt_no')
+
+    # 상세 코드: 메모 + 패키지코드를 이어붙여 한 번에 분리
+    memo = checkups['memo'].where(checkups['memo'] != 'nan', '')
+    pkg = checkups['package_code'].where(checkups['package_code'] != 'nan', '')
+    codes = (memo + ',' + pkg).str.split(',')
+    details = pd.DataFrame({'receipt_no': checkups['receipt_no'], 'medical_code': codes}).explode('medical_code')
+    details['medical_code'] = details['medical_code'].astype(str).str.strip()
+    details = details[details['medical_code'] != ''].drop_duplicates(['receipt_no', 'medical_code'])
+
+    return {
+        'patients': patients.reset_index(drop=True),
+        'checkups': checkups.drop(columns=['name', 'gender', 'memo']).reset_index(drop=True),
+        'details': details.reset_index(drop=True),
+        'source_rows': len(df),
+    }
+
+# ---------------------------------------------------------
+# [Step 2] 적재: 임시 테이블 기반 집합 연산 + executemany
+# ---------------------------------------------------------
+def _executemany(conn, table, frame, batch_size=BATCH_SIZE):
+    """프레임을 튜플 목록으로 변환해 DBAPI executemany로 직접 INSERT"""
+    cols = list(frame.columns)
+    sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+    rows = list(zip(*(frame[c].tolist() for c in cols)))
+    for i in range(0, len(rows), batch_size):
+        conn.exec_driver_sql(sql, rows[i:i + batch_size])
+    return len(rows)
+
+def _resolve_patient_ids(conn, patients, upsert=False):
+    """
+    신규 환자 등록 후 (life_code, resident_no) -> id 매핑 프레임 반환
+    - upsert=False: 기존 환자는 그대로 둠 (INSERT OR IGNORE)
+    - upsert=True: 기존 환자의 성명/성별을 파일 내용으로 갱신 (ON CONFLICT DO UPDATE)
+    """
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS _ingest_patient "
+                      "(life_code TEXT, resident_no TEXT, name TEXT, gender TEXT)"))
+    conn.execute(text("DELETE FROM _ingest_patient"))
+    _executemany(conn, '_ingest_patient', patients)
+
+    before = conn.execute(text("SELECT count(*) FROM tb_patient")).scalar()
+    if upsert:
+        conn.execute(text(
+            "INSERT INTO tb_patient (life_code, resident_no, name, gender) "
+            "SELECT life_code, resident_no, name, gender FROM _ingest_patient WHERE true "
+            "ON CONFLICT (life_code, resident_no) DO UPDATE SET name = excluded.name, gender = excluded.gender"
+        ))
+    else:
+        conn.execute(text(
+            "INSERT OR IGNORE INTO tb_patient (life_code, resident_no, name, gender) "
+            "SELECT life_code, resident_no, name, gender FROM _ingest_patient"
+        ))
+    created = conn.execute(text("SELECT count(*) FROM tb_patient")).scalar() - before
+
+    rows = conn.execute(text(
+        "SELECT p.id, p.life_code, p.resident_no FROM _ingest_patient t "
+        "JOIN tb_patient p ON p.life_code = t.life_code AND p.resident_no = t.resident_no"
+    )).all()
+    ids = pd.DataFrame(rows, columns=['patient_id', 'life_code', 'resident_no'])
+    return ids, created
+
+def _existing_receipts(conn, receipts):
+    """파일의 접수번호 중 DB에 이미 있는 것 (임시 테이블 + PK 조인 1회)"""
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS _ingest_receipt (receipt_no TEXT PRIMARY KEY)"))
+    conn.execute(text("DELETE FROM _ingest_receipt"))
+    _executemany(conn, '_ingest_receipt', receipts.to_frame())
+    rows = conn.execute(text(
+        "SELECT t.receipt_no FROM _ingest_receipt t JOIN tb_checkup c ON c.receipt_no = t.receipt_no"
+    )).all()
+    return {r[0] for r in rows}
+
+def _upsert_checkups(conn, checkups, batch_size=BATCH_SIZE):
+    """접수번호 기준 INSERT ... ON CONFLICT DO UPDATE (기존 접수는 파일 내용으로 덮어씀)"""
+    cols = list(checkups.columns)
+    updates = ', '.join(f"{c} = excluded.{c}" for c in cols if c != 'receipt_no')
+    sql = (f"INSERT INTO {Checkup.__tablename__} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+           f"ON CONFLICT (receipt_no) DO UPDATE SET {updates}")
+    rows = list(zip(*(checkups[c].tolist() for c in cols)))
+    for i in range(0, len(rows), batch_size):
+        conn.exec_driver_sql(sql, rows[i:i + batch_size])
+    return len(rows)
+
+def write_batch(conn, batch, mode='insert'):
+    """
+    정규화된 배치를 현재 트랜잭션에 기록
+    - mode='insert': 이미 존재하는 접수번호는 건너뜀 (전체 재구축용)
+    - mode='upsert': 이미 존재하는 접수번호는 갱신하고 상세 코드를 교체 (증분 적재용)
+    """
+    upsert = mode == 'upsert'
+    ids, created = _resolve_patient_ids(conn, batch['patients'], upsert=upsert)
+    checkups = batch['checkups'].merge(ids, on=['life_code', 'resident_no'], how='left')
+
+    # 검진분류: 고유 검진종류별로 한 번씩만 분류
+    clf = get_classifier(conn)
+    types = checkups['checkup_type']
+    checkups['category'] = types.map({t: clf.classify(t) for t in types.unique()})
+
+    # 사업장 차원 id (통계 쿼리의 제외 / 표준명 조인용)
+    companies = checkups['company_name']
+    checkups['company_id'] = companies.map(assign_company_ids(conn, companies.unique().tolist()))
+
+    existing = _existing_receipts(conn, checkups['receipt_no'])
+    fresh = ~checkups['receipt_no'].isin(existing)
+    details = batch['details']
+
+    prev_years, prev_companies = set(), set()
+    if upsert:
+        # 덮어쓰기 전 기존 접수의 연도/사업장도 영향 범위에 포함
+        for y, c in conn.execute(text(
+            "SELECT DISTINCT year, company_name FROM tb_checkup "
+            "WHERE receipt_no IN (SELECT receipt_no FROM _ingest_receipt)"
+        )):
+            if y is not None: prev_years.add(y)
+            prev_companies.add(c)
+
+        checkups = checkups.drop(columns=['life_code', 'resident_no'])
+        _upsert_checkups(conn, checkups)
+    else:
+        checkups = checkups[fresh].drop(columns=['life_code', 'resident_no'])
+        details = details[~details['receipt_no'].isin(existing)]
+        _executemany(conn, Checkup.__tablename__, checkups)
+    # 상세 코드 (upsert: 갱신된 접수의 코드는 지우고 새로 기록, _ingest_receipt = 이번 파일의 접수번호)
+    detail_cnt = write_item_codes(conn, details, replace=upsert)
+
+    return {
+        'inserted': int(fresh.sum()),
+        'updated': len(existing) if upsert else 0,
+        'skipped': 0 if upsert else len(existing),
+        'patients_new': created,
+        'details': detail_cnt,
+        # 영향받은 범위 (집계/캐시 부분 무효화용)
+        'years': sorted(prev_years | {int(y) for y in checkups['year'].dropna().unique()}),
+        'companies': sorted(prev_companies | set(checkups['company_name'].unique().tolist())),
+    }
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _record_file(conn, path, content_hash, rows):
+    conn.execute(text(
+        f"INSERT INTO {IngestFile.__tablename__} (file_name, content_hash, row_count, ingested_at) "
+        "VALUES (:file_name, :content_hash, :row_count, :ingested_at) "
+        "ON CONFLICT (file_name) DO UPDATE SET content_hash = excluded.content_hash, "
+        "row_count = excluded.row_count, ingested_at = excluded.ingested_at"
+    ), {
+        'file_name': os.path.basename(path),
+        'content_hash': content_hash,
+        'row_count': rows,
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+    })
+
+def parse_csv(path):
+    """[파싱 단계] CSV 1개 읽기 + 정규화 -> (배치, 파싱 시간). 프로세스 풀 워커에서도 실행됨"""
+    t0 = time.perf_counter()
+    batch = normalize_frame(read_source(path))
+    return batch, time.perf_counter() - t0
+
+def write_file(engine, path, batch, mode='insert', content_hash=None):
+    """[쓰기 단계] 정규화된 파일 1개를 트랜잭션 1회로 기록 -> (처리 통계, 쓰기 시간)"""
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        result = write_batch(conn, batch, mode=mode)
+        refresh_cube(conn, years=result['years'])  # 영향받은 연도의 집계만 재계산
+        refresh_item_cube(conn, years=result['years'])
+        bump_generation(conn)                      # API 응답 캐시 무효화
+        if content_hash:
+            _record_file(conn, path, content_hash, batch['source_rows'])
+    return result, time.perf_counter() - t0
+
+def _file_stats(result, path, rows, parse_sec, write_sec, wait_sec=None):
+    # 병렬 적재에서는 파싱이 다른 파일 쓰기와 겹치므로, 쓰기 쪽에서 기다린 시간(wait_sec)만 소요 시간에 포함
+    elapsed = (parse_sec if wait_sec is None else wait_sec) + write_sec
+    result.update({
+        'file': path,
+        'rows': rows,
+        'parse_sec': round(parse_sec, 3),
+        'write_sec': round(write_sec, 3),
+        'elapsed': round(elapsed, 3),
+        'rows_per_sec': int(rows / elapsed) if elapsed > 0 else 0,
+    })
+    if wait_sec is not None:
+        result['wait_sec'] = round(wait_sec, 3)
+    return result
+
+def ingest_csv(engine, path, mode='insert', content_hash=None):
+    """
+    CSV 파일 1개를 읽어 파일 단위 트랜잭션 1회로 적재하고 처리 통계 반환
+    - content_hash가 주어지면 같은 트랜잭션에서 적재 이력(tb_ingest_file)도 기록
+    """
+    batch, parse_sec = parse_csv(path)
+    result, write_sec = write_file(engine, path, batch, mode=mode, content_hash=content_hash)
+    return _file_stats(result, path, batch['source_rows'], parse_sec, write_sec)
+
+def ingest_files(engine, paths, mode='insert', hashes=None, workers=1, log=print):
+    """
+    여러 CSV 적재: 파싱/정규화는 프로세스 풀(workers개)에서 파일 단위로 병렬 실행,
+    SQLite 쓰기는 현재 프로세스 하나가 파일 순서대로 (먼저 나온 접수번호 / 환자 우선 규칙 유지)
+    - hashes: {경로: 내용 해시} (증분 적재 이력 기록용)
+    - 파일 단위 트랜잭션이므로 오류가 난 파일만 롤백되고 다음 파일로 진행
+    """
+    hashes = hashes or {}
+    results = []
+
+    def write(path, batch, parse_sec, wait_sec=None):
+        log(f"📂 {os.path.basename(path)} 저장 중...")
+        result, write_sec = write_file(engine, path, batch, mode=mode, content_hash=hashes.get(path))
+        results.append(_file_stats(result, path, batch['source_rows'], parse_sec, write_sec, wait_sec))
+
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            try:
+                write(path, *parse_csv(path))
+            except Exception as e:
+                log(f"⚠️ {os.path.basename(path)} 오류 발생: {e}")
+        return results
+
+    # 메모리 상한: 파싱이 끝나 쓰기를 기다리는 배치는 workers + 1개까지만
+    pending = deque()
+    remaining = iter(paths)
+    with ProcessPoolExecutor(min(workers, len(paths)), mp_context=multiprocessing.get_context("spawn")) as pool:
+        def submit_next():
+            path = next(remaining, None)
+            if path is not None:
+                pending.append((path, pool.submit(parse_csv, path)))
+
+        for _ in range(workers + 1):
+            submit_next()
+        while pending:
+            path, future = pending.popleft()
+            t0 = time.perf_counter()
+            try:
+                batch, parse_sec = future.result()
+            except Exception as e:
+                log(f"⚠️ {os.path.basename(path)} 오류 발생: {e}")
+                submit_next()
+                continue
+            wait_sec = time.perf_counter() - t0
+            submit_next()
+            try:
+                write(path, batch, parse_sec, wait_sec)
+            except Exception as e:
+                log(f"⚠️ {os.path.basename(path)} 오류 발생: {e}")
+            del batch
+    return results
+
+def _drop_seen(batch, seen_receipts, first_patients):
+    """
+    앞 청크에서 이미 나온 접수번호 / 환자는 파일 전체를 한 번에 읽을 때처럼 첫 행 기준으로 유지
+    - 접수번호: 앞 청크에 있던 것은 건너뜀
+    - 환자: 성명/성별을 처음 나온 값으로 고정 (upsert가 뒤 행으로 덮어쓰지 않도록)
+    """
+    checkups, details = batch['checkups'], batch['details']
+    # isin(set)은 호출마다 set 전체를 변환하므로 행 단위로 확인 (청크 크기에 비례)
+    fresh = [r not in seen_receipts for r in checkups['receipt_no'].tolist()]
+    batch['checkups'] = checkups[fresh]
+    batch['details'] = details[[r not in seen_receipts for r in details['receipt_no'].tolist()]]
+    seen_receipts.update(batch['checkups']['receipt_no'].tolist())
+
+    patients = batch['patients'].copy()
+    keys = list(zip(patients['life_code'], patients['resident_no']))
+    firsts = [first_patients.setdefault(k, (n, g)) for k, n, g in zip(keys, patients['name'], patients['gender'])]
+    patients['name'] = [f[0] for f in firsts]
+    patients['gender'] = [f[1] for f in firsts]
+    batch['patients'] = patients
+    return batch
+
+def ingest_csv_chunked(engine, path, mode='upsert', content_hash=None, chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    CSV 파일 1개를 chunk_rows 행씩 읽어 청크마다 커밋하는 적재 (메모리 = 청크 크기 + 파일의 접수번호 / 환자 키)
+    - 청크 오류는 기록하고 다음 청크로 진행, 오류가 있으면 적재 이력(content_hash)은 기록하지 않음
+      -> 다음 증분 적재 때 파일 전체가 다시 upsert 되므로 재실행해도 결과가 같음
+    - 집계 큐브 / 세대 번호는 마지막에 한 번만 갱신
+    - progress(stats): 청크마다 누적 통계를 받는 콜백
+    """
+    t0 = time.perf_counter()
+    dtypes, total_rows = infer_dtypes(path, chunk_rows)
+    stats = {
+        'file': path, 'total_rows': total_rows, 'rows': 0, 'chunks': 0,
+        'inserted': 0, 'updated': 0, 'skipped': 0, 'patients_new': 0, 'details': 0,
+        'years': [], 'errors': [],
+    }
+    years, seen_receipts, first_patients = set(), set(), {}
+    if progress:
+        progress(stats)
+
+    for chunk in iter_source_chunks(path, chunk_rows, dtypes):
+        start = stats['rows']
+        try:
+            batch = normalize_frame(chunk)
+            if mode == 'upsert':  # insert 모드는 기존 접수 / 환자를 건너뛰므로 이미 첫 행 기준
+                batch = _drop_seen(batch, seen_receipts, first_patients)
+            with engine.begin() as conn:
+                result = write_batch(conn, batch, mode=mode)
+            for key in ('inserted', 'updated', 'skipped', 'patients_new', 'details'):
+                stats[key] += result[key]
+            years.update(result['years'])
+        except Exception as e:
+            stats['errors'].append({'rows': [start + 1, start + len(chunk)], 'error': str(e)})
+        stats['rows'] += len(chunk)
+        stats['chunks'] += 1
+        stats['elapsed'] = round(time.perf_counter() - t0, 3)
+        if progress:
+            progress(stats)
+
+    # 집계 재계산은 단계별로 짧게 커밋 (쓰기 잠금을 오래 잡지 않도록 -> 그 사이 설정 저장도 처리됨)
+    with engine.begin() as conn:
+        refresh_cube(conn, years=sorted(years))  # 영향받은 연도의 집계만 재계산
+    with engine.begin() as conn:
+        refresh_item_cube(conn, years=sorted(years))
+    with engine.begin() as conn:
+        bump_generation(conn)                    # API 응답 캐시 무효화
+        if content_hash and not stats['errors']:
+            _record_file(conn, path, content_hash, total_rows)
+    elapsed = time.perf_counter() - t0
+
+    stats.update({
+        'years': sorted(years),
+        'elapsed': round(elapsed, 3),
+        'rows_per_sec': int(stats['rows'] / elapsed) if elapsed > 0 else 0,
+    })
+    return stats
+
+def ingest_incremental(engine, paths, workers=1, log=print):
+    """
+    증분 적재: 적재 이력과 내용 해시를 비교해 새 파일/변경된 파일만 upsert
+    같은 파일을 다시 실행해도 결과가 동일 (idempotent)
+    """
+    with engine.connect() as conn:
+        known = dict(conn.execute(text(
+            f"SELECT file_name, content_hash FROM {IngestFile.__tablename__}"
+        )).all())
+
+    changed = {}
+    for path in paths:
+        digest = file_sha256(path)
+        name = os.path.basename(path)
+        if known.get(name) == digest:
+            log(f"⏭️ {name} 변경 없음 (건너뜀)")
+            continue
+        log(f"🔎 {name} {'변경 감지' if name in known else '신규 파일'}")
+        changed[path] = digest
+    # 오류가 난 파일은 트랜잭션이 롤백되어 이력이 남지 않으므로 다음 실행 때 다시 시도됨
+    return ingest_files(engine, list(changed), mode='upsert', hashes=changed, workers=workers, log=log)
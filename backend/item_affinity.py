@@ -0,0 +1,194 @@
+# item_affinity.py
+# 검사 항목 동시 이용 (/api/stats/items/affinity): 같은 접수에서 함께 받은 검사 코드 쌍 / 연관 코드
+# - 접수 x 검사 코드 0/1 희소 행렬 X (CSR: indptr / indices)를 tb_checkup_codes의 코드 배열에서 바로 구성
+# - 동시 출현 C = Xᵀ X (대각 = 코드별 접수 수) -> 지지도 / 신뢰도 / 향상도(lift)는 C에서 계산
+#   C는 0이 아닌 칸(지지도 + 위 삼각 쌍 목록)만 보관 -> 캐시 크기 = 필터에 나온 코드 수 + 함께 나온 쌍 수
+# - scipy가 있으면 희소 행렬 곱, 없으면 numpy로 접수 내 코드 쌍을 세어 같은 C를 만듦
+# - 열은 현재 코드 (tb_code_map 과거 코드 -> 현재 코드 반영, 한 접수에 둘 다 있으면 1건)
+# 행렬 구성이 비싼 부분이라 main.py에서 필터(연도 / 사업장 / 검진분류)별로 데이터 세대 동안 캐시합니다.
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Checkup, CheckupCodes, CodeMap, CompanyDim, MedicalCode
+from item_codes import CODE_DTYPE, code_names
+
+try:
+    from scipy import sparse
+except ImportError:  # 선택 의존성 - 없으면 numpy로 코드 쌍 집계
+    sparse = None
+
+READ_ROWS = 200_000  # 한 번에 읽는 접수 수
+MAX_CODES = 20       # 연관 코드를 조회할 코드 수 상한
+PAIR_ROWS = 500_000  # numpy 쌍 집계 시 한 번에 처리하는 접수 수
+
+# ---------------------------------------------------------
+# [행렬] 접수 x 코드 CSR -> 코드 x 코드 동시 출현
+# ---------------------------------------------------------
+def incidence_matrix(conn, years=None, company=None, category=None):
+    """필터에 해당하는 접수의 0/1 행렬 -> (현재 코드 목록, indptr, indices) - 검사 코드가 없는 접수는 제외"""
+    code_map = dict(conn.execute(text(f"SELECT old_code, new_code FROM {CodeMap.__tablename__}")).all())
+    translate = {i: code_map.get(code, code) for i, code in sorted(code_names(conn).items())}
+    codes = list(dict.fromkeys(translate.values()))  # 열 순서 = 코드 id 순 -> 매핑이 없으면 행 안의 순서 그대로
+    column = {code: j for j, code in enumerate(codes)}
+    col_of_id = np.zeros(max(translate, default=0) + 1, dtype=np.int64)
+    for i, code in translate.items():
+        col_of_id[i] = column[code]
+    merged = len(codes) < len(translate)  # 과거 / 현재 코드가 한 열로 합쳐짐 -> 행마다 정렬 / 중복 제거 필요
+
+    where, params = [], {}
+    if years:
+        where.append(f"c.year IN ({', '.join(str(int(y)) for y in years)})")
+    if company is not None:
+        where.append(f"c.company_id IN (SELECT id FROM {CompanyDim.__tablename__} WHERE standard_name = :company)")
+        params["company"] = company
+    if category is not None:
+        where.append("c.category = :category")
+        params["category"] = category
+    sql = f"SELECT k.codes FROM {CheckupCodes.__tablename__} k"
+    if where:
+        sql += f" JOIN {Checkup.__tablename__} c ON c.receipt_no = k.receipt_no WHERE {' AND '.join(where)}"
+    result = conn.execute(text(sql), params)
+
+    n = len(codes)
+    lengths, indices = [], []
+    while True:
+        blobs = [r[0] for r in result.fetchmany(READ_ROWS)]
+        if not blobs:
+            break
+        counts = np.fromiter((len(b) // CODE_DTYPE.itemsize for b in blobs), dtype=np.int64, count=len(blobs))
+        cols = col_of_id[np.frombuffer(b''.join(blobs), dtype=CODE_DTYPE)]
+        if merged:
+            row = np.repeat(np.arange(len(blobs), dtype=np.int64), counts)
+            keys = np.unique(row * n + cols)
+            counts, cols = np.bincount(keys // n, minlength=len(blobs)), keys % n
+        lengths.append(counts)
+        indices.append(cols)
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    lengths = lengths[lengths > 0]
+    indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+    return codes, indptr, indices
+
+def cooccurrence(indptr, indices, n):
+    """
+    C = Xᵀ X의 0이 아닌 칸만 -> (지지도[n], a, b, 건수) - 대각(지지도)과 위 삼각(a < b)
+    행렬을 밀집 n x n으로 만들지 않음 (코드 사전이 커져도 함께 나온 쌍 수만큼만 메모리 사용)
+    """
+    support = np.bincount(indices, minlength=n).astype(np.int64)
+    if sparse is not None:
+        x = sparse.csr_matrix((np.ones(len(indices), dtype=np.int64), indices, indptr), shape=(len(indptr) - 1, n))
+        c = sparse.triu(x.T @ x, k=1).tocoo()
+        return support, c.row.astype(np.int64), c.col.astype(np.int64), c.data.astype(np.int64)
+    # 행 안의 열 번호는 오름차순 -> 간격 d만큼 떨어진 원소끼리 짝지으면 위 삼각 (a < b)
+    # 행 묶음마다 쌍 키(a * n + b)를 세고 지금까지의 (키, 건수)에 합침 -> 메모리 = 묶음 크기 + 서로 다른 쌍 수
+    keys, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rows = len(indptr) - 1
+    for first in range(0, rows, PAIR_ROWS):
+        lo, hi = indptr[first], indptr[min(first + PAIR_ROWS, rows)]
+        part_ptr = indptr[first:first + PAIR_ROWS + 1] - lo
+        part = indices[lo:hi]
+        row_end = np.repeat(part_ptr[1:], np.diff(part_ptr))
+        pos = np.arange(len(part))
+        found = [keys]
+        weights = [counts]
+        d = 1
+        while True:
+            pos = pos[pos + d < row_end[pos]]
+            if not len(pos):
+                break
+            pair_keys, pair_counts = np.unique(part[pos] * n + part[pos + d], return_counts=True)
+            found.append(pair_keys)
+            weights.append(pair_counts)
+            d += 1
+        keys, inverse = np.unique(np.concatenate(found), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate(weights), minlength=len(keys)).astype(np.int64)
+    return support, keys // n, keys % n, counts
+
+def build_affinity(db: Session, years=None, company=None, category=None):
+    """필터별 동시 출현 (stats_pool에서 실행, 결과는 main.py에서 세대별 캐시) - 열은 필터에 실제로 나온 코드만"""
+    conn = db.connection()
+    codes, indptr, indices = incidence_matrix(conn, years, company, category)
+    present, indices = np.unique(indices, return_inverse=True)  # 열 번호 압축 (순서 유지 -> 행 안 오름차순 유지)
+    codes = [codes[j] for j in present]
+    support, a, b, both = cooccurrence(indptr, indices.astype(np.int64), len(codes))
+    names = dict(conn.execute(text(f"SELECT code, name FROM {MedicalCode.__tablename__}")).all())
+    return {
+        "receipts": len(indptr) - 1,
+        "codes": codes,
+        "master": {code: names.get(code) for code in codes},
+        "support": support,
+        "a": a,
+        "b": b,
+        "count": both,
+    }
+
+# ---------------------------------------------------------
+# [응답] 코드 쌍 상위 N / 지정 코드의 연관 코드 상위 N
+# ---------------------------------------------------------
+def _measures(affinity, a, b, both):
+    """a, b: 열 번호 배열, both: 함께 받은 접수 수 -> 신뢰도(a -> b, b -> a) / 향상도"""
+    support, total = affinity["support"], affinity["receipts"]
+    lift = both * total / (support[a] * support[b])
+    return both / support[a], both / support[b], lift
+
+def _top(order_keys, top):
+    """정렬 키(내림차순, 같으면 다음 키 / 원래 순서)로 상위 top개의 위치 - argpartition으로 후보만 정렬"""
+    primary = order_keys[0]
+    candidates = np.arange(len(primary))
+    if len(primary) > top:
+        threshold = primary[np.argpartition(-primary, top - 1)[top - 1]]
+        candidates = np.flatnonzero(primary >= threshold)  # 경계 값과 같은 항목까지 포함해 정렬
+    order = np.lexsort(tuple(-k[candidates] for k in reversed(order_keys)))
+    return candidates[order[:top]]
+
+def _code_info(affinity, j):
+    code = affinity["codes"][j]
+    return {"code": code, "name": affinity["master"].get(code)}
+
+def affinity_result(affinity, codes=None, top=20, min_count=5, sort="lift"):
+    """
+    - codes 없음: 전체 코드 쌍 중 상위 top (min_count 이상 함께 받은 쌍)
+    - codes 지정: 코드별 연관 코드 상위 top (confidence = 그 코드를 받은 접수 중 함께 받은 비율)
+    - sort: lift (향상도) / count (함께 받은 접수 수)
+    """
+    support = affinity["support"]
+    keep = affinity["count"] >= min_count
+    a, b, both = affinity["a"][keep], affinity["b"][keep], affinity["count"][keep]
+    result = {
+        "receipts": affinity["receipts"],
+        "codes": len(affinity["codes"]),
+        "sort": sort,
+        "min_count": min_count,
+    }
+    if not codes:
+        conf_ab, conf_ba, lift = _measures(affinity, a, b, both)
+        keys = (lift, both) if sort == "lift" else (both, lift)
+        result["pairs"] = [
+            {"a": _code_info(affinity, a[k]), "b": _code_info(affinity, b[k]), "count": int(both[k]),
+             "confidence_ab": round(float(conf_ab[k]), 4), "confidence_ba": round(float(conf_ba[k]), 4),
+             "lift": round(float(lift[k]), 4)}
+            for k in _top(keys, top)
+        ]
+        return result
+
+    column = {code: j for j, code in enumerate(affinity["codes"])}
+    associated = {}
+    for code in codes:
+        i = column.get(code)
+        if i is None:
+            associated[code] = {"count": 0, "items": []}
+            continue
+        # 위 삼각에만 저장되어 있으므로 (i, x)와 (x, i) 양쪽에서 상대 코드를 모음
+        side = (a == i) | (b == i)
+        other = np.where(a[side] == i, b[side], a[side])
+        mine = np.full(len(other), i)
+        conf, _, lift = _measures(affinity, mine, other, both[side])
+        keys = (lift, both[side]) if sort == "lift" else (both[side], lift)
+        associated[code] = {"count": int(support[i]), "items": [
+            {**_code_info(affinity, other[k]), "count": int(both[side][k]),
+             "confidence": round(float(conf[k]), 4), "lift": round(float(lift[k]), 4)}
+            for k in _top(keys, top)
+        ]}
+    result["associated"] = associated
+    return result
@@ -0,0 +1,257 @@
+# item_codes.py
+# 검사 항목 코드 저장 (검진항목메모 + 패키지코드)
+# 예전에는 접수 x 코드마다 문자열 행 하나(tb_checkup_detail, 인덱스 없음)였던 것을 아래 3개 테이블로 압축합니다.
+# - tb_code_dict:     코드 문자열 -> 정수 id (사전)
+# - tb_checkup_codes: 접수 1건 = 행 1개, 정렬된 코드 id 배열(uint32)을 BLOB으로 -> "이 접수의 코드"
+# - tb_code_posting:  코드별 접수 목록 (roaring 방식: 접수 id 상위 16비트 구간마다 컨테이너 1개)
+#                     -> "이 코드가 있는 접수" (PK (code_id, chunk) 범위 조회)
+#   컨테이너: 구간 안의 접수가 4096건 미만이면 하위 16비트 정렬 배열(uint16), 이상이면 8KB 비트맵
+# 적재(ingest.py)는 write_item_codes로 세 테이블을 함께 갱신하고, 기존 DB는 migrate.py가 한 번 변환합니다.
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from models import CodeDict, CheckupCodes, CodePosting
+
+DICT = CodeDict.__tablename__
+ITEMS = CheckupCodes.__tablename__
+POSTING = CodePosting.__tablename__
+
+CODE_DTYPE = np.dtype('<u4')
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+BITMAP_BYTES = CHUNK_SIZE // 8
+ARRAY_MAX = 4096  # 이 건수부터는 비트맵이 더 작음 (4096 x 2바이트 = 8KB)
+BATCH_SIZE = 20000
+
+# ---------------------------------------------------------
+# [형식] 코드 배열 / 접수 컨테이너 인코딩
+# ---------------------------------------------------------
+def pack_codes(code_ids):
+    return np.asarray(code_ids, dtype=CODE_DTYPE).tobytes()
+
+def unpack_codes(blob):
+    return np.frombuffer(blob or b'', dtype=CODE_DTYPE)
+
+def encode_container(lows):
+    """구간 안의 접수 하위 16비트 (정렬, 중복 없음) -> 배열 또는 비트맵"""
+    lows = np.asarray(lows, dtype=np.uint16)
+    if len(lows) < ARRAY_MAX:
+        return lows.astype('<u2').tobytes()
+    bits = np.zeros(CHUNK_SIZE, dtype=np.uint8)
+    bits[lows] = 1
+    return np.packbits(bits, bitorder='little').tobytes()
+
+def decode_container(blob):
+    data = np.frombuffer(blob, dtype=np.uint8)
+    if len(data) == BITMAP_BYTES:
+        return np.flatnonzero(np.unpackbits(data, bitorder='little')).astype(np.uint16)
+    return np.frombuffer(blob, dtype='<u2').astype(np.uint16)
+
+# ---------------------------------------------------------
+# [사전] 코드 문자열 <-> id
+# ---------------------------------------------------------
+def assign_code_ids(conn, codes):
+    """코드 목록 -> {코드: id} (처음 보는 코드는 사전에 추가, 사전은 코드 종류 수만큼의 작은 테이블)"""
+    codes = sorted({c for c in codes if c})
+    if codes:
+        conn.exec_driver_sql(f"INSERT OR IGNORE INTO {DICT} (code) VALUES (?)", [(c,) for c in codes])
+    return dict(conn.execute(text(f"SELECT code, id FROM {DICT}")).all())
+
+def code_names(conn):
+    return dict(conn.execute(text(f"SELECT id, code FROM {DICT}")).all())
+
+# ---------------------------------------------------------
+# [적재] 접수별 코드 기록 + 코드별 접수 목록 갱신
+# ---------------------------------------------------------
+def _pairs(rows):
+    """[(접수 id, 코드 BLOB), ...] -> (접수 id 배열, 코드 id 배열)"""
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    ids, blobs = zip(*rows)
+    codes = np.frombuffer(b''.join(blobs), dtype=CODE_DTYPE).astype(np.int64)
+    counts = np.fromiter((len(b) // CODE_DTYPE.itemsize for b in blobs), dtype=np.int64, count=len(blobs))
+    return np.repeat(np.asarray(ids, dtype=np.int64), counts), codes
+
+def write_item_codes(conn, details, replace=False):
+    """
+    details: (receipt_no, medical_code) 프레임 (ingest.normalize_frame)
+    replace=True: 이번 파일의 접수(_ingest_receipt 임시 테이블)에 있던 코드를 지우고 새로 기록 (upsert 적재)
+    같은 접수는 같은 id를 유지하고, 새 접수는 기존 최대 id 뒤에 이어서 번호를 붙입니다.
+    -> 기록한 (접수, 코드) 쌍 수
+    """
+    old = []
+    if replace:
+        old = conn.execute(text(
+            f"SELECT id, receipt_no, codes FROM {ITEMS} WHERE receipt_no IN (SELECT receipt_no FROM _ingest_receipt)"
+        )).all()
+    if details.empty and not old:
+        return 0
+
+    code_ids = assign_code_ids(conn, details['medical_code'].unique().tolist())
+    receipts = pd.unique(details['receipt_no'])
+    order = pd.Series(np.arange(len(receipts)), index=receipts)
+    frame = pd.DataFrame({
+        'pos': details['receipt_no'].map(order).to_numpy(),
+        'code': details['medical_code'].map(code_ids).to_numpy(np.int64),
+    }).drop_duplicates().sort_values(['pos', 'code'])
+    pos, codes = frame['pos'].to_numpy(), frame['code'].to_numpy()
+
+    known = {r: i for i, r, _ in old}
+    next_id = (conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {ITEMS}")).scalar() or 0) + 1
+    item_ids = np.empty(len(receipts), dtype=np.int64)
+    for k, receipt in enumerate(receipts):
+        item_id = known.get(receipt)
+        if item_id is None:
+            item_id, next_id = next_id, next_id + 1
+        item_ids[k] = item_id
+
+    starts = np.searchsorted(pos, np.arange(len(receipts) + 1))
+    packed = codes.astype(CODE_DTYPE)
+    rows = [(int(item_ids[k]), receipts[k], packed[starts[k]:starts[k + 1]].tobytes()) for k in range(len(receipts))]
+    if replace:
+        conn.execute(text(f"DELETE FROM {ITEMS} WHERE receipt_no IN (SELECT receipt_no FROM _ingest_receipt)"))
+    for i in range(0, len(rows), BATCH_SIZE):
+        conn.exec_driver_sql(f"INSERT INTO {ITEMS} (id, receipt_no, codes) VALUES (?, ?, ?)", rows[i:i + BATCH_SIZE])
+
+    removed = _pairs([(i, blob) for i, _, blob in old])
+    update_postings(conn, added=(item_ids[pos], codes), removed=removed)
+    return len(codes)
+
+def update_postings(conn, added, removed=None):
+    """
+    코드별 접수 목록 갱신: added / removed = (접수 id 배열, 코드 id 배열)
+    영향받은 (코드, 구간) 컨테이너만 읽어서 다시 씀
+    """
+    items, codes = np.asarray(added[0], np.int64), np.asarray(added[1], np.int64)
+    is_add = np.ones(len(items), dtype=bool)
+    if removed is not None and len(removed[0]):
+        items = np.concatenate([items, np.asarray(removed[0], np.int64)])
+        codes = np.concatenate([codes, np.asarray(removed[1], np.int64)])
+        is_add = np.concatenate([is_add, np.zeros(len(removed[0]), dtype=bool)])
+    if not len(items):
+        return
+    df = pd.DataFrame({'code': codes, 'chunk': items >> CHUNK_BITS,
+                       'low': (items & (CHUNK_SIZE - 1)).astype(np.uint16), 'add': is_add})
+
+    upserts, deletes = [], []
+    for (code, chunk), g in df.groupby(['code', 'chunk'], sort=True):
+        row = conn.exec_driver_sql(f"SELECT bits FROM {POSTING} WHERE code_id = ? AND chunk = ?",
+                                   (int(code), int(chunk))).first()
+        lows = decode_container(row[0]) if row else np.empty(0, np.uint16)
+        lows = np.setdiff1d(lows, g.loc[~g['add'], 'low'].to_numpy(np.uint16))
+        lows = np.union1d(lows, g.loc[g['add'], 'low'].to_numpy(np.uint16))
+        if len(lows):
+            upserts.append((int(code), int(chunk), encode_container(lows)))
+        elif row:
+            deletes.append((int(code), int(chunk)))
+    if deletes:
+        conn.exec_driver_sql(f"DELETE FROM {POSTING} WHERE code_id = ? AND chunk = ?", deletes)
+    if upserts:
+        conn.exec_driver_sql(f"INSERT OR REPLACE INTO {POSTING} (code_id, chunk, bits) VALUES (?, ?, ?)", upserts)
+
+def rebuild_postings(conn):
+    """tb_checkup_codes 전체에서 코드별 접수 목록 재구성 (마이그레이션 / 불일치 복구용, 구간 단위로 읽음)"""
+    conn.execute(text(f"DELETE FROM {POSTING}"))
+    max_id = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {ITEMS}")).scalar() or 0
+    for chunk in range((max_id >> CHUNK_BITS) + 1):
+        rows = conn.exec_driver_sql(f"SELECT id, codes FROM {ITEMS} WHERE id >= ? AND id < ?",
+                                    (chunk << CHUNK_BITS, (chunk + 1) << CHUNK_BITS)).all()
+        update_postings(conn, added=_pairs(rows))
+
+# ---------------------------------------------------------
+# [조회] 코드 -> 접수 / 접수 -> 코드
+# ---------------------------------------------------------
+def item_ids_with_code(conn, code):
+    """코드가 있는 접수 id (오름차순 정렬 배열)"""
+    rows = conn.execute(text(
+        f"SELECT p.chunk, p.bits FROM {POSTING} p JOIN {DICT} d ON d.id = p.code_id "
+        "WHERE d.code = :code ORDER BY p.chunk"
+    ), {"code": code}).all()
+    if not rows:
+        return np.empty(0, np.int64)
+    return np.concatenate([(chunk << CHUNK_BITS) + decode_container(bits).astype(np.int64) for chunk, bits in rows])
+
+def receipts_with_code(conn, code, limit=None, offset=0):
+    """코드가 있는 접수번호 (접수 id 순) -> (접수번호 목록, 전체 건수)"""
+    ids = item_ids_with_code(conn, code)
+    page = ids[offset:None if limit is None else offset + limit]
+    if not len(page):
+        return [], len(ids)
+    conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS _item_ids (id INTEGER PRIMARY KEY)"))
+    conn.execute(text("DELETE FROM _item_ids"))
+    conn.exec_driver_sql("INSERT INTO _item_ids VALUES (?)", [(int(i),) for i in page])
+    rows = conn.execute(text(f"SELECT c.receipt_no FROM _item_ids t JOIN {ITEMS} c ON c.id = t.id ORDER BY t.id")).all()
+    return [r[0] for r in rows], len(ids)
+
+def codes_of_receipt(conn, receipt_no):
+    """접수의 검사 코드 목록 (코드순)"""
+    row = conn.execute(text(f"SELECT codes FROM {ITEMS} WHERE receipt_no = :r"), {"r": receipt_no}).first()
+    if row is None:
+        return []
+    names = code_names(conn)
+    return sorted(names[int(i)] for i in unpack_codes(row[0]))
+
+# ---------------------------------------------------------
+# [변환] 기존 DB의 tb_checkup_detail -> 압축 테이블 (migrate.py, 1회)
+# ---------------------------------------------------------
+LEGACY_DETAIL = 'tb_checkup_detail'
+CONVERT_ROWS = 1_000_000  # 한 번에 읽는 상세 행 수
+
+def convert_detail_table(conn):
+    """
+    상세 행을 저장 순서(rowid)대로 읽어 접수별로 묶어 기록 후 원본 테이블 삭제
+    상세 행은 접수 단위로 연달아 저장되어 있으므로(적재 / upsert 모두) 접수 하나씩 모아서 쓰고,
+    드물게 떨어져 있는 같은 접수는 기존 행과 합칩니다.
+    """
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {DICT} (code) SELECT code FROM tb_medical_code ORDER BY code"
+    ))
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {DICT} (code) SELECT DISTINCT trim(medical_code) FROM {LEGACY_DETAIL} "
+        "WHERE trim(medical_code) <> '' ORDER BY 1"
+    ))
+    code_ids = dict(conn.execute(text(f"SELECT code, id FROM {DICT}")).all())
+    next_id = (conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {ITEMS}")).scalar() or 0) + 1
+
+    def flush(receipts, groups):
+        nonlocal next_id
+        if not receipts:  # 이번 묶음에서 끝난 접수가 없음 (한 접수가 묶음 전체에 걸침 / 코드 없는 접수만)
+            return
+        rows = []
+        for receipt, codes in zip(receipts, groups):
+            rows.append((next_id, receipt, pack_codes(sorted(codes))))
+            next_id += 1
+        inserted = conn.exec_driver_sql(f"INSERT OR IGNORE INTO {ITEMS} (id, receipt_no, codes) VALUES (?, ?, ?)", rows).rowcount
+        if inserted == len(rows):
+            return
+        for item_id, receipt, blob in rows:  # 이미 기록된 접수 -> 코드 합치기
+            row = conn.execute(text(f"SELECT id, codes FROM {ITEMS} WHERE receipt_no = :r"), {"r": receipt}).first()
+            if row[0] != item_id:
+                merged = np.union1d(unpack_codes(row[1]), unpack_codes(blob))
+                conn.execute(text(f"UPDATE {ITEMS} SET codes = :c WHERE id = :i"), {"c": pack_codes(merged), "i": row[0]})
+
+    pending_receipt, pending_codes = None, set()
+    last_rowid = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            f"SELECT rowid, receipt_no, trim(medical_code) FROM {LEGACY_DETAIL} "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, CONVERT_ROWS)).all()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        receipts, groups = [], []
+        for _, receipt, code in rows:
+            if receipt != pending_receipt:
+                if pending_receipt is not None and pending_codes:
+                    receipts.append(pending_receipt)
+                    groups.append(pending_codes)
+                pending_receipt, pending_codes = receipt, set()
+            if code:
+                pending_codes.add(code_ids[code])
+        flush(receipts, groups)
+    if pending_receipt is not None and pending_codes:
+        flush([pending_receipt], [pending_codes])
+
+    rebuild_postings(conn)
+    conn.execute(text(f"DROP TABLE {LEGACY_DETAIL}"))
@@ -0,0 +1,164 @@
+# item_cube.py
+# 검사 항목 이용 통계 (/api/stats/items): 검사 코드 / 코드 분류별 건수 - 연도별 / 월별 / 사업장별
+# - tb_item_cube:       원본 사업장 id x 연 x 월 x 검사 코드 -> 접수 건수 (사업장 지정 / 사업장별 / 제외분 계산용)
+# - tb_item_cube_total: 연 x 월 x 검사 코드 -> 전체 사업장 합계 (연도별 / 월별 조회는 이 작은 표 + 제외 사업장분 빼기)
+# - 적재 시: 영향받은 연도만 재계산 (tb_checkup_codes의 코드 배열을 풀어서 집계)
+# - 코드 변경 매핑(tb_code_map, 과거 코드 -> 현재 코드), 사업장 매핑 / 제외는 조회 시 적용 -> 설정 변경 시 재계산 불필요
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from models import Checkup, CheckupCodes, CodeMap, CompanyDim, ItemCube, ItemCubeTotal, MedicalCode
+from item_codes import CODE_DTYPE, code_names
+
+CUBE = ItemCube.__tablename__
+TOTAL = ItemCubeTotal.__tablename__
+DIM = CompanyDim.__tablename__
+READ_ROWS = 200_000      # 재계산 시 한 번에 읽는 접수 수
+MAX_COMPANY_CODES = 20   # by=company는 코드를 지정해서 조회 (사업장 x 코드 전체는 너무 큼)
+UNREGISTERED = "미등록"  # 코드 마스터(code.csv)에 없는 코드의 분류
+KEY_COLUMNS = {"year": ["year"], "month": ["year", "month"], "company": ["company_id"]}
+
+# ---------------------------------------------------------
+# [재계산] 연도 범위를 지우고 접수별 코드 배열에서 다시 집계
+# ---------------------------------------------------------
+def refresh_item_cube(conn, years=None):
+    """years: 재계산할 연도 목록 (검진일 불명 행(year=0)은 항상 함께), None이면 전체"""
+    where, params = "", {}
+    if years is not None:
+        years = sorted(set(years) | {0})
+        where = f"WHERE c.year IN ({', '.join(str(int(y)) for y in years)}) OR c.year IS NULL"
+    result = conn.execute(text(
+        f"SELECT coalesce(c.company_id, 0), coalesce(c.year, 0), coalesce(c.month, 0), k.codes "
+        f"FROM {Checkup.__tablename__} c JOIN {CheckupCodes.__tablename__} k ON k.receipt_no = c.receipt_no {where}"
+    ), params)
+    parts = []
+    while True:
+        rows = result.fetchmany(READ_ROWS)
+        if not rows:
+            break
+        company, year, month, blobs = zip(*rows)
+        counts = np.fromiter((len(b) // CODE_DTYPE.itemsize for b in blobs), dtype=np.int64, count=len(blobs))
+        frame = pd.DataFrame({
+            'company_id': np.repeat(np.asarray(company, dtype=np.int64), counts),
+            'year': np.repeat(np.asarray(year, dtype=np.int64), counts),
+            'month': np.repeat(np.asarray(month, dtype=np.int64), counts),
+            'code_id': np.frombuffer(b''.join(blobs), dtype=CODE_DTYPE).astype(np.int64),
+        })
+        parts.append(frame.groupby(['company_id', 'year', 'month', 'code_id']).size().rename('cnt'))
+    cube = pd.concat(parts).groupby(level=[0, 1, 2, 3]).sum().reset_index() if parts else None
+
+    year_filter = f" WHERE year IN ({', '.join(str(y) for y in years)})" if years is not None else ""
+    conn.execute(text(f"DELETE FROM {CUBE}{year_filter}"))
+    conn.execute(text(f"DELETE FROM {TOTAL}{year_filter}"))
+    if cube is None:
+        return 0
+    total = cube.groupby(['year', 'month', 'code_id'])['cnt'].sum().reset_index()
+    conn.exec_driver_sql(f"INSERT INTO {CUBE} (company_id, year, month, code_id, cnt) VALUES (?, ?, ?, ?, ?)",
+                         list(cube.itertuples(index=False, name=None)))
+    conn.exec_driver_sql(f"INSERT INTO {TOTAL} (year, month, code_id, cnt) VALUES (?, ?, ?, ?)",
+                         list(total.itertuples(index=False, name=None)))
+    return len(cube)
+
+# ---------------------------------------------------------
+# [조회] /api/stats/items 응답
+# ---------------------------------------------------------
+def _code_translation(conn):
+    """원본 코드 id -> 현재 코드 (tb_code_map 1단계 변환)"""
+    code_map = dict(conn.execute(text(f"SELECT old_code, new_code FROM {CodeMap.__tablename__}")).all())
+    return {i: code_map.get(code, code) for i, code in code_names(conn).items()}
+
+def _in(column, values):
+    return f"{column} IN ({', '.join(str(int(v)) for v in values)})"
+
+def compute_item_stats(conn, years=None, company=None, codes=None, by="year", ignore_exclude=False):
+    """
+    검사 코드별 / 코드 분류별 접수 건수
+    - by: year (연도별) / month (YYYY-MM별) / company (사업장별, codes 필요)
+    - company: 표준 사업장명 (지정하면 그 사업장만, 제외 목록과 무관)
+    - codes: 현재 코드 목록 (과거 코드로 적힌 건수도 포함)
+    - 검진일 불명 접수는 제외
+    """
+    translate = _code_translation(conn)
+    where = ["year > 0"]
+    if years:
+        where.append(_in("year", years))
+    if codes:
+        wanted = set(codes)
+        code_ids = [i for i, code in translate.items() if code in wanted]
+        if not code_ids:
+            return _result(by, pd.DataFrame(columns=['code', 'key', 'cnt']), {})
+        where.append(_in("code_id", code_ids))
+
+    if company is not None:
+        company_ids = [r[0] for r in conn.execute(
+            text(f"SELECT id FROM {DIM} WHERE standard_name = :name"), {"name": company})]
+        if not company_ids:
+            return _result(by, pd.DataFrame(columns=['code', 'key', 'cnt']), {})
+        where.append(_in("company_id", company_ids))
+    keys = KEY_COLUMNS[by]
+    group = ', '.join(keys + ['code_id'])
+    if company is not None or by == "company":
+        # 사업장 지정: PK(사업장, 연, 월, 코드) 범위 / 사업장별: 코드 인덱스(코드, 연도, 건수 + PK) 범위
+        rows = conn.execute(text(
+            f"SELECT {group}, sum(cnt) FROM {CUBE} WHERE {' AND '.join(where)} GROUP BY {group}"
+        )).all()
+        df = pd.DataFrame(rows, columns=keys + ['code_id', 'cnt'])
+        if by == "company":
+            dim = pd.DataFrame(conn.execute(text(f"SELECT id, standard_name, excluded FROM {DIM}")).all(),
+                               columns=['company_id', 'name', 'excluded'])
+            df = df.merge(dim, on='company_id', how='left')
+            if company is None and not ignore_exclude:
+                df = df[df['excluded'] != 1]
+    else:
+        rows = conn.execute(text(
+            f"SELECT {group}, sum(cnt) FROM {TOTAL} WHERE {' AND '.join(where)} GROUP BY {group}"
+        )).all()
+        df = pd.DataFrame(rows, columns=keys + ['code_id', 'cnt'])
+        if not ignore_exclude:
+            excluded = [r[0] for r in conn.execute(text(f"SELECT id FROM {DIM} WHERE excluded = 1"))]
+            if excluded:
+                rows = conn.execute(text(
+                    f"SELECT {group}, -sum(cnt) FROM {CUBE} "
+                    f"WHERE {' AND '.join(where + [_in('company_id', excluded)])} GROUP BY {group}"
+                )).all()
+                df = pd.concat([df, pd.DataFrame(rows, columns=df.columns)], ignore_index=True)
+
+    df['code'] = df['code_id'].map(translate)
+    if by == "month":
+        df['key'] = df['year'].astype(int).astype(str) + '-' + df['month'].astype(int).map('{:02d}'.format)
+    elif by == "company":
+        df['key'] = df['name'].fillna('')
+    else:
+        df['key'] = df['year'].astype(int)
+    df = df.groupby(['code', 'key'], as_index=False)['cnt'].sum()
+    df = df[df['cnt'] != 0]
+
+    master = {code: (name, category) for code, name, category in conn.execute(text(
+        f"SELECT code, name, category FROM {MedicalCode.__tablename__}"))}
+    return _result(by, df, master)
+
+def _result(by, df, master):
+    keys = sorted(df['key'].unique().tolist())
+    items = defaultdict(dict)
+    for code, key, cnt in df.itertuples(index=False, name=None):
+        items[code][key] = int(cnt)
+    item_list, categories = [], {}
+    for code, counts in items.items():
+        name, category = master.get(code, (None, UNREGISTERED))
+        category = category or UNREGISTERED
+        item_list.append({"code": code, "name": name, "category": category,
+                          "total": sum(counts.values()), "counts": counts})
+        cat = categories.setdefault(category, {"category": category, "total": 0, "counts": {}})
+        cat["total"] += sum(counts.values())
+        for key, cnt in counts.items():
+            cat["counts"][key] = cat["counts"].get(key, 0) + cnt
+    item_list.sort(key=lambda x: (-x["total"], x["code"]))
+    return {
+        "by": by,
+        "keys": keys,
+        "items": item_list,
+        "categories": sorted(categories.values(), key=lambda x: (-x["total"], x["category"])),
+    }
@@ -0,0 +1,194 @@
+# jobs.py
+# 파일 업로드 저장 + 검진 CSV 백그라운드 적재 작업
+# - 업로드: 1MB씩 스트리밍 저장 (이벤트 루프 비차단) + SHA-256 계산, 저장이 끝나면 원래 이름으로 교체
+#   검진 CSV는 임시 파일로 두었다가 적재 작업이 시작될 때 교체 (같은 이름을 적재 중인 앞 작업의 파일을 덮지 않음)
+# - 적재: 작업 스레드 1개가 순서대로 처리 (쓰기는 한 번에 하나), 청크 단위 커밋 (ingest.ingest_csv_chunked)
+#   적재 전용 엔진(연결 1개)을 따로 써서 API의 쓰기 연결(설정 저장)을 차지하지 않음 -> 잠금은 SQLite busy_timeout으로 대기
+# - 서버 종료 시 아직 시작하지 않은 작업은 실패(취소)로 표시하고 임시 파일 삭제, 시작 시 남은 *.part 정리
+# - 진행 상황: /api/jobs/{id} (처리 행 수 / 진행률 / 처리 속도 / 오류)
+import fnmatch
+import glob
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fastapi import UploadFile
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from database import DB_PATH, make_engine
+from metrics import instrument_engine
+from ingest import CHECKUP_CSV_PATTERN, ingest_csv_chunked
+from models import IngestFile
+
+UPLOAD_CHUNK = 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+MAX_JOBS = 100  # 조회용으로 보관하는 최근 작업 수
+
+# ---------------------------------------------------------
+# [업로드] 스트리밍 저장
+# ---------------------------------------------------------
+def safe_filename(filename):
+    """경로 부분을 제거한 파일 이름 (../ 나 윈도우 경로 방지)"""
+    return os.path.basename((filename or '').replace('\\', '/')).strip()
+
+def _write_chunk(out, digest, chunk):
+    out.write(chunk)
+    digest.update(chunk)
+
+def is_protected_filename(filename):
+    """업로드로 덮어쓰면 안 되는 파일 (서비스 중인 DB 파일과 WAL / 공유 메모리 파일)"""
+    db_name = os.path.basename(DB_PATH)
+    return filename in {db_name, db_name + '-wal', db_name + '-shm', db_name + '-journal'}
+
+async def save_upload(file: UploadFile, path, defer=False):
+    """
+    업로드 파일을 임시 파일에 저장 -> (sha256, 바이트 수, 저장된 경로)
+    defer=False: 바로 path로 교체 / defer=True: 임시 파일 그대로 반환 (적재 작업이 시작할 때 교체)
+    """
+    digest, size = hashlib.sha256(), 0
+    partial = f"{path}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"  # 같은 이름 동시 업로드끼리도 겹치지 않게
+    try:
+        with open(partial, 'wb') as out:
+            while chunk := await file.read(UPLOAD_CHUNK):
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+                size += len(chunk)
+        if defer:
+            return digest.hexdigest(), size, partial
+        os.replace(partial, path)
+    except BaseException:  # 디스크 부족 / 연결 끊김 등 -> defer와 무관하게 임시 파일 삭제
+        _remove(partial)
+        raise
+    return digest.hexdigest(), size, path
+
+def _remove(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def sweep_partial_uploads(directory):
+    """이전 실행에서 남은 업로드 임시 파일 삭제 (서버 시작 시) -> 삭제한 파일 목록"""
+    removed = sorted(glob.glob(os.path.join(glob.escape(directory), '*' + PARTIAL_SUFFIX)))
+    for path in removed:
+        _remove(path)
+    return removed
+
+def is_checkup_csv(filename):
+    return fnmatch.fnmatch(filename, CHECKUP_CSV_PATTERN)
+
+# ---------------------------------------------------------
+# [적재 작업] 상태 / 실행
+# ---------------------------------------------------------
+class IngestJob:
+    def __init__(self, path, content_hash, staged=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.staged = staged     # 아직 path로 옮기지 않은 업로드 임시 파일
+        self.content_hash = content_hash
+        self.status = 'queued'   # queued / running / done / skipped / failed
+        self.stats = {}
+        self.error = None
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.future = None
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        s = self.stats
+        total, rows = s.get('total_rows'), s.get('rows', 0)
+        elapsed = (self.finished or time.perf_counter()) - self.started if self.started else 0
+        return {
+            "id": self.id,
+            "file": os.path.basename(self.path),
+            "sha256": self.content_hash,
+            "status": self.status,
+            "created_at": self.created_at,
+            "total_rows": total,
+            "rows": rows,
+            "percent": round(rows / total * 100, 1) if total else 0,
+            "chunks": s.get('chunks', 0),
+            "inserted": s.get('inserted', 0),
+            "updated": s.get('updated', 0),
+            "skipped": s.get('skipped', 0),
+            "details": s.get('details', 0),
+            "elapsed": round(elapsed, 1),
+            "rows_per_sec": int(rows / elapsed) if elapsed > 0 else 0,
+            "errors": s.get('errors', []) + ([{"error": self.error}] if self.error else []),
+        }
+
+class JobManager:
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest')
+        self._engine = None
+
+    def _get_engine(self):
+        """적재 전용 엔진 (작업 스레드에서만 사용, 첫 작업 때 생성)"""
+        if self._engine is None:
+            self._engine = make_engine(DB_PATH, pool_size=1)
+            instrument_engine(self._engine)
+        return self._engine
+
+    def submit(self, path, content_hash, staged=None):
+        job = IngestJob(path, content_hash, staged)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started = time.perf_counter()
+        try:
+            if job.staged:
+                # 작업은 순서대로 하나씩 실행 -> 같은 이름을 읽던 앞 작업은 이미 끝남
+                os.replace(job.staged, job.path)
+                job.staged = None
+            engine = self._get_engine()
+            name = os.path.basename(job.path)
+            with engine.connect() as conn:
+                known = conn.execute(text(
+                    f"SELECT content_hash FROM {IngestFile.__tablename__} WHERE file_name = :name"
+                ), {"name": name}).scalar()
+            if known == job.content_hash:
+                job.status = 'skipped'  # 같은 내용이 이미 적재됨 (init_db.py 증분 적재와 같은 기준)
+                return
+            job.stats = ingest_csv_chunked(
+                engine, job.path, mode='upsert', content_hash=job.content_hash,
+                progress=lambda stats: setattr(job, 'stats', dict(stats)),
+            )
+            job.status = 'failed' if job.stats['errors'] else 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            _remove(job.staged)
+            job.finished = time.perf_counter()
+
+    def shutdown(self):
+        """대기 중인 작업은 취소 -> 실패로 표시하고 업로드 임시 파일 삭제 (실행 중인 작업은 끝까지 진행)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for job in self.list():
+            if job.future is not None and job.future.cancelled():
+                _remove(job.staged)
+                job.staged = None
+                job.error = '서버 종료로 적재가 취소되었습니다. 파일을 다시 업로드해주세요'
+                job.status = 'failed'
+
+ingest_jobs = JobManager()
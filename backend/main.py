@@ -1,34 +1,43 @@
 # main.py (Version 1.1 - Deployment Ready)
 import os
 from typing import List, Optional, Dict, Any
-from collections import defaultdict
 
-from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, func, case, desc, distinct
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import case, desc, distinct
+from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import shutil
 import sys
-import traceback
 
 # Import models
 # Fix ModuleNotFoundError on server
-import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from models import Base, Checkup, CompanyMap, CodeMap, Patient, CompanyExclude, ExamRule
+from models import Base, Checkup, CompanyMap, CodeMap, Patient, CompanyExclude, ExamRule, MedicalCode
+from migrate import upgrade
+from database import DB_PATH, engine, get_db, get_read_db
+import stats_cube
+import columnar
+from cache import DefaultJSONResponse, GZIP_MIN_SIZE, GZIP_LEVEL, cached_json, cached_json_async, cached_value, cached_value_async, bump_generation, get_generation, response_cache, single_flight
+from classifier import reclassify_checkups
+from company_dim import resolve_company_dim, sync_company_config
+from stats_kernels import (STATS_ENGINE, MAX_PERIODS, RETENTION_SORTS, company_columns, compute_dashboard_stats, compute_retention_stats,
+                           compute_company_stats, compute_period_stats, compute_periods_stats, compute_revisit_person_stats)
+from workers import stats_pool, PoolBusy, JobTimeout
+from jobs import ingest_jobs, save_upload, safe_filename, is_checkup_csv, is_protected_filename, sweep_partial_uploads
+from paging import PAGE_PARAMS, is_paged, paginate
+from item_codes import receipts_with_code, codes_of_receipt
+from item_cube import MAX_COMPANY_CODES, compute_item_stats
+from item_affinity import MAX_CODES as AFFINITY_MAX_CODES, build_affinity, affinity_result
+from export import FORMATS as EXPORT_FORMATS, export_filename, parquet_available, stream_export
+import metrics
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIR = os.path.join(BASE_DIR, "../frontend")
 
 # Pydantic Models for Settings
-class CompanyMapCreate(BaseModel):
-    original_name: str
-    standard_name: str
-    memo: Optional[str] = None
-
 class CompanyExcludeCreate(BaseModel):
     company_name: str
     memo: Optional[str] = None
@@ -39,24 +48,48 @@ class CompanyExcludeCreate(BaseModel):
 # ---------------------------------------------------------
 # 1. 데이터베이스 설정
 # ---------------------------------------------------------
-db_path = os.path.join(BASE_DIR, "healthcare.db")
+# WAL + 쓰기 엔진(연결 1개) / 읽기 전용 연결 풀 (database.py)
+db_path = DB_PATH
 if not os.path.exists(db_path):
     print(f"⚠️ 경고: {db_path} 파일이 없습니다. init_db.py를 먼저 실행해주세요!")
 
-engine = create_engine(f'sqlite:///{db_path}', connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# 기존 DB 스키마 업그레이드 (year/month 컬럼, 인덱스 등)
+if os.path.exists(db_path):
+    upgrade(engine)
+
+# 통계 엔진: sql (기본) / columnar (BIZHEALTH_STATS_ENGINE, stats_kernels.py)
+if STATS_ENGINE == "columnar" and os.path.exists(db_path):
+    with engine.connect() as conn:
+        columnar.get_store(conn)  # 시작 시 미리 적재
+
+def refresh_stats_cube(db: Session, names=None):
+    """설정 변경 후 사업장 차원 + 집계 큐브 재계산 (names: 영향받은 표준 사업장명, None이면 전체)"""
+    db.flush()
+    resolve_company_dim(db)
+    stats_cube.refresh_cube(db, names=names)
+    bump_generation(db)
+
+def refresh_company_dim(db: Session):
+    """제외 목록 변경 후 사업장 차원의 제외 플래그 재계산 (큐브는 조회 시 필터하므로 그대로)"""
+    db.flush()
+    resolve_company_dim(db)
+    bump_generation(db)
+
+def reclassify_checkups_and_refresh(db: Session):
+    """분류 규칙 변경 후 검진분류 재계산 -> 집계 큐브 전체 재계산"""
+    db.flush()
+    reclassify_checkups(db)
+    refresh_stats_cube(db)
+
+def final_name_of(db: Session, original_name: str) -> str:
+    """현재 매핑 기준 통계용 사업장명 (매핑이 없으면 원본명)"""
+    m = db.query(CompanyMap).filter_by(original_name=original_name).first()
+    return m.standard_name if m else original_name
 
 # ---------------------------------------------------------
 # 2. FastAPI 앱 설정
 # ---------------------------------------------------------
-app = FastAPI(title="JinHealth Admin API")
+app = FastAPI(title="JinHealth Admin API", default_response_class=DefaultJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -64,8 +97,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Response-Time", "Server-Timing"],
 )
 
+# 응답 압축 (Accept-Encoding: gzip, BIZHEALTH_GZIP_MIN_SIZE 바이트 이상) - 캐시 응답은 cache.py에서 미리 압축
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+# 요청 계측 (metrics.py): 라우트별 응답 시간 / SQL 수 + X-Response-Time / Server-Timing 헤더 (가장 바깥에서 측정)
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# 통계 계산 프로세스 풀 (workers.py): 대기열 초과 503 / 시간 초과 504
+@app.exception_handler(PoolBusy)
+async def pool_busy_handler(request: Request, exc: PoolBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.exception_handler(JobTimeout)
+async def job_timeout_handler(request: Request, exc: JobTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.on_event("startup")
+def sweep_uploads():
+    # 지난 실행에서 중단된 업로드 / 취소된 적재 작업의 임시 파일 정리
+    for path in sweep_partial_uploads(BASE_DIR):
+        print(f"🧹 남은 업로드 임시 파일 삭제: {os.path.basename(path)}")
+
+@app.on_event("shutdown")
+def shutdown_stats_pool():
+    stats_pool.shutdown()
+    ingest_jobs.shutdown()
+
 # [Modified] Update paths for 'frontend/backend' structure
 if os.path.exists(os.path.join(FRONTEND_DIR, "js")):
     app.mount("/js", StaticFiles(directory=os.path.join(FRONTEND_DIR, "js")), name="js")
@@ -92,11 +154,11 @@ async def admin_page():
     return RedirectResponse(url="/")
 
 @app.get("/api/years")
-def get_years(db: Session = Depends(get_db)):
+def get_years(db: Session = Depends(get_read_db)):
     """DB에 존재하는 검진 연도 목록 반환"""
-    years = db.query(func.substr(Checkup.checkup_date, 1, 4)).distinct().all()
-    # Flatten result [('2021',), ('2022',)] -> [2021, 2022]
-    return sorted([int(y[0]) for y in years if y[0] and y[0].isdigit()], reverse=True)
+    years = db.query(Checkup.year).distinct().all()
+    # Flatten result [(2021,), (2022,)] -> [2021, 2022]
+    return sorted([y[0] for y in years if y[0]], reverse=True)
 
 class CompanyMapDTO(BaseModel):
     original_name: str
@@ -106,34 +168,34 @@ class CompanyExcludeDTO(BaseModel):
     company_name: str
     memo: Optional[str] = None
 
-class CompanyExcludeDTO(BaseModel):
-    company_name: str
-    memo: Optional[str] = None
-
 @app.get("/api/company-map")
-def get_maps(db: Session = Depends(get_db)):
+def get_maps(db: Session = Depends(get_read_db)):
     return db.query(CompanyMap).all()
 
 @app.post("/api/company-map")
 def create_map(dto: CompanyMapDTO, db: Session = Depends(get_db)):
     existing = db.query(CompanyMap).filter_by(original_name=dto.original_name).first()
+    old_name = existing.standard_name if existing else dto.original_name
     if existing:
         existing.standard_name = dto.standard_name
     else:
         new_map = CompanyMap(original_name=dto.original_name, standard_name=dto.standard_name)
         db.add(new_map)
+    refresh_stats_cube(db, names=[old_name, dto.standard_name])
     db.commit()
     return {"status": "ok", "message": "저장되었습니다"}
 
 @app.delete("/api/company-map/{original_name}")
 def delete_map(original_name: str, db: Session = Depends(get_db)):
+    old_name = final_name_of(db, original_name)
     db.query(CompanyMap).filter_by(original_name=original_name).delete()
+    refresh_stats_cube(db, names=[old_name, original_name])
     db.commit()
     return {"status": "deleted", "message": "삭제되었습니다"}
 
 # --- Company Exclude Endpoints ---
 @app.get("/api/company-exclude")
-def get_excludes(db: Session = Depends(get_db)):
+def get_excludes(db: Session = Depends(get_read_db)):
     """제외된 회사 목록 반환"""
     return [c.company_name for c in db.query(CompanyExclude).all()]
 
@@ -143,6 +205,7 @@ def add_exclude(dto: CompanyExcludeDTO, db: Session = Depends(get_db)):
     existing = db.query(CompanyExclude).filter_by(company_name=dto.company_name).first()
     if not existing:
         db.add(CompanyExclude(company_name=dto.company_name, memo=dto.memo))
+        refresh_company_dim(db)
         db.commit()
     return {"status": "added", "message": "추가되었습니다"}
 
@@ -150,225 +213,64 @@ def add_exclude(dto: CompanyExcludeDTO, db: Session = Depends(get_db)):
 def delete_exclude(company_name: str, db: Session = Depends(get_db)):
     """회사 제외 취소"""
     db.query(CompanyExclude).filter_by(company_name=company_name).delete()
+    refresh_company_dim(db)
     db.commit()
     return {"status": "deleted"}
 
 @app.get("/api/company-list")
-def get_all_companies(db: Session = Depends(get_db)):
+def get_all_companies(request: Request, db: Session = Depends(get_read_db)):
     """DB에 존재하는 모든 회사명(원본) 반환"""
-    companies = db.query(distinct(Checkup.company_name)).all()
-    # Flatten list
-    return sorted([c[0] for c in companies if c[0]])
+    def compute():
+        companies = db.query(distinct(Checkup.company_name)).all()
+        # Flatten list
+        return sorted([c[0] for c in companies if c[0]])
+    return cached_json(request, db, compute)
 
 
 
+# ---------------------------------------------------------
+# [페이지] 사업장 목록 정렬 키 (paging.py) - (정렬값, 사업장명) 오름차순, 내림차순은 음수
+# ---------------------------------------------------------
+CL_SORTS = {
+    "rev": lambda item: (-item[1]["t"], item[0]),
+    "name": lambda item: (item[0],),
+}
+BIZ_SORTS = {
+    "amount": lambda item: (-item[1]["amount"], item[0]),
+    "count": lambda item: (-item[1]["count"], item[0]),
+    "name": lambda item: (item[0],),
+}
 @app.get("/api/stats")
 def get_dashboard_stats(
+    request: Request,
     start_date: Optional[str] = None, 
     end_date: Optional[str] = None,   
     years: Optional[List[int]] = Query(None),
     exclude_companies: Optional[List[str]] = Query(None),
-    db: Session = Depends(get_db)
+    shape: Optional[str] = Query(None, regex="^columnar$", description="columnar: CL을 사업장명/연도/값 배열로"),
+    limit: Optional[int] = Query(None, ge=1, description="CL 사업장 수 (상위 K / 페이지 크기)"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="이전 응답의 CL_page.next_cursor"),
+    sort: Optional[str] = Query(None, regex="^(rev|name)$", description="rev: 총매출순 (기본) / name: 이름순"),
+    db: Session = Depends(get_read_db)
 ):
-    company_expr = func.coalesce(CompanyMap.standard_name, Checkup.company_name).label("final_name")
-    
-    # [GLOBAL FILTER] Fetch Excludes from DB
-    db_excludes = [r.company_name for r in db.query(CompanyExclude).all()]
-    if exclude_companies: 
-        db_excludes.extend(exclude_companies)
-    
-    def apply_filters(query):
-        if start_date: query = query.filter(Checkup.checkup_date >= start_date)
-        if end_date: query = query.filter(Checkup.checkup_date <= end_date)
-        if years: query = query.filter(func.substr(Checkup.checkup_date, 1, 4).in_([str(y) for y in years]))
-        if db_excludes: query = query.filter(company_expr.not_in(db_excludes))
-        return query
-
-    # (1) YT
-    q_yt = db.query(
-        func.substr(Checkup.checkup_date, 1, 4).label("year"),
-        func.sum(Checkup.total_price).label("rev"),
-        func.count(Checkup.receipt_no).label("cnt")
-    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)
-    q_yt = apply_filters(q_yt)
-    q_yt = q_yt.group_by("year")
-    yt_results = q_yt.all()
-    YT = {int(r.year): {"rev": r.rev or 0, "cnt": r.cnt or 0} for r in yt_results if r.year}
-
-    # (2) MO
-    # Handle YYYYMMDD (len 8 or YYYYMMDD.0) and YYYY-MM-DD (len 10)
-    # Check 5th char. If '-', '.', '/' -> Separated. Else -> YYYYMMDD
-    c5 = func.substr(func.trim(Checkup.checkup_date), 5, 1)
-    month_expr = case(
-        (c5.in_(['-', '.', '/']), func.substr(func.trim(Checkup.checkup_date), 6, 2)),
-        else_=func.substr(func.trim(Checkup.checkup_date), 5, 2)
-    ).label("month")
-
-    q_mo = db.query(
-        func.substr(Checkup.checkup_date, 1, 4).label("year"),
-        month_expr,
-        func.sum(Checkup.total_price).label("rev")
-    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)
-    q_mo = apply_filters(q_mo)
-    q_mo = q_mo.group_by("year", "month")
-    mo_results = q_mo.all()
-    MO = {y: [0]*12 for y in YT.keys()}
-    for r in mo_results:
-        if r.year and r.month:
-            y, m, rev = int(r.year), int(r.month), r.rev or 0
-            if y not in MO: MO[y] = [0]*12
-            if 1 <= m <= 12: MO[y][m-1] = rev
-
-    # (3) CL
-    q_cl = db.query(
-        company_expr.label("name"),
-        func.substr(Checkup.checkup_date, 1, 4).label("year"),
-        func.sum(Checkup.total_price).label("amt"),
-        func.count(Checkup.receipt_no).label("cnt")
-    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)
-    q_cl = apply_filters(q_cl)
-    q_cl = q_cl.group_by("name", "year")
-    cl_results = q_cl.all()
-    CL = {}
-    for r in cl_results:
-        name = r.name or "기타"
-        year = int(r.year) if r.year else 0
-        amt = r.amt or 0
-        cnt = r.cnt or 0
-        if name not in CL: CL[name] = {"t": 0, "y": {}, "c": {}}
-        CL[name]["t"] += amt
-        CL[name]["y"][year] = amt
-        CL[name]["c"][year] = cnt
-
-    return {"CL": CL, "MO": MO, "YT": YT}
+    def compute():
+        if is_paged(limit, offset, cursor, sort):
+            # 전체 집계는 페이지 / 모양과 무관하게 한 번만 계산해 두고 잘라서 응답
+            stats = cached_value(request, db, lambda: compute_dashboard_stats(db, start_date, end_date, years, exclude_companies),
+                                 ignore=PAGE_PARAMS + ('shape',))
+            page, info = paginate(list(stats["CL"].items()), CL_SORTS[sort or "rev"], limit, offset, cursor)
+            stats = {**stats, "CL": dict(page), "CL_page": info}
+        else:
+            stats = compute_dashboard_stats(db, start_date, end_date, years, exclude_companies)
+        if shape == "columnar":
+            stats["CL"] = company_columns(stats["CL"])
+        return stats
+    return cached_json(request, db, compute)
 
 @app.get("/api/company/{name}/stats")
-def get_company_stats(name: str, years: Optional[List[int]] = Query(None), db: Session = Depends(get_db)):
-    related_names = [name]
-    mapped = db.query(CompanyMap.original_name).filter(CompanyMap.standard_name == name).all()
-    for m in mapped: related_names.append(m.original_name)
-        
-    q = db.query(Checkup).filter(Checkup.company_name.in_(related_names))
-    if years:
-        str_years = [str(y) for y in years]
-        q = q.filter(func.substr(Checkup.checkup_date, 1, 4).in_(str_years))
-
-    results = q.all()
-
-    # Fetch Rules for classification
-    rules = db.query(ExamRule).order_by(ExamRule.priority).all()
-    if not rules:
-        rules = [
-            ExamRule(category_name="종합검진", keywords="종합", priority=1),
-            ExamRule(category_name="기타", keywords="", priority=99)
-        ]
-
-    cY = {}
-    cM = {} 
-    cPkg = {} 
-    cType = {r.category_name: 0 for r in rules}
-    if "기타" not in cType: cType["기타"] = 0
-    
-    total_rev = 0
-    total_cnt = 0
-    
-    for r in results:
-        s_date = str(r.checkup_date).strip()
-        if s_date.endswith('.0'): s_date = s_date[:-2]
-        
-        y, m = 0, 0
-        if len(s_date) == 8 and s_date.isdigit():
-            y = int(s_date[:4])
-            m = int(s_date[4:6]) - 1
-        elif len(s_date) >= 10:
-             if s_date[4] in ['-', '.', '/']:
-                y = int(s_date[:4])
-                m = int(s_date[5:7]) - 1
-             else:
-                y = int(s_date[:4])
-                m = int(s_date[5:7]) - 1
-        else: continue
-            
-        amt = r.total_price or 0
-        total_rev += amt
-        total_cnt += 1
-        
-        # Annual Stats
-        if y not in cY: cY[y] = {'r': 0, 'c': 0}
-        cY[y]['r'] += amt
-        cY[y]['c'] += 1
-        
-        # Monthly Stats
-        if y not in cM: cM[y] = {'r': [0]*12, 'c': [0]*12}
-        if 0 <= m < 12: 
-            cM[y]['r'][m] += amt
-            cM[y]['c'][m] += 1
-            
-        # Package Stats
-        if r.package_code:
-            for p in r.package_code.split(','):
-                p = p.strip()
-                if p: cPkg[p] = (cPkg.get(p, 0)) + 1
-
-        # Exam Type Classification
-        c_check_type = (r.checkup_type or "").strip()
-        found_key = "기타"
-        if c_check_type: 
-            for rule in rules:
-                keywords = [k.strip() for k in rule.keywords.split(',') if k.strip()]
-                match = False
-                for k in keywords:
-                    if k in c_check_type:
-                        match = True
-                        break
-                if match:
-                    found_key = rule.category_name
-                    break
-        cType[found_key] += 1
-    
-    # Calculate Avg Price per Year
-    for y, d in cY.items():
-        d['avg'] = int(d['r'] / d['c']) if d['c'] > 0 else 0
-
-    # Demographics
-    cDemo = {'20': {'M': 0, 'F': 0}, '30': {'M': 0, 'F': 0}, '40': {'M': 0, 'F': 0}, '50': {'M': 0, 'F': 0}, '60': {'M': 0, 'F': 0}}
-    
-    q_demo = db.query(Checkup.age, Patient.gender, func.count(Checkup.receipt_no))\
-        .join(Patient, Checkup.patient_id == Patient.id)\
-        .filter(Checkup.company_name.in_(related_names))
-    
-    if years: q_demo = q_demo.filter(func.substr(Checkup.checkup_date, 1, 4).in_(str_years))
-        
-    demo_res = q_demo.group_by(Checkup.age, Patient.gender).all()
-    
-    max_age_group = '-' 
-    
-    for age, sex, cnt in demo_res:
-        if not age: age = 0
-        a_key = '60'
-        if age < 30: a_key = '20'
-        elif age < 40: a_key = '30'
-        elif age < 50: a_key = '40'
-        elif age < 60: a_key = '50'
-        s_key = 'M'
-        if sex and ('여' in sex or 'F' in sex.upper()): s_key = 'F'
-        cDemo[a_key][s_key] += cnt
-
-    age_totals = {k: v['M'] + v['F'] for k, v in cDemo.items()}
-    if age_totals:
-        max_k = max(age_totals, key=age_totals.get)
-        max_age_group = max_k + "대" if age_totals[max_k] > 0 else "-"
-
-    avg_price_total = int(total_rev / total_cnt) if total_cnt > 0 else 0
-
-    return {
-        "summary": {"rev": total_rev, "cnt": total_cnt, "avg_price": avg_price_total, "max_age": max_age_group},
-        "annual": cY,
-        "monthly": cM,
-        "packages": cPkg,
-        "exam_types": cType,
-        "demographics": cDemo
-    }
+async def get_company_stats(request: Request, name: str, years: Optional[List[int]] = Query(None), db: Session = Depends(get_read_db)):
+    return await cached_json_async(request, db, lambda: stats_pool.run(compute_company_stats, name, years))
 
 class ExamRuleDTO(BaseModel):
     category_name: str
@@ -376,7 +278,7 @@ class ExamRuleDTO(BaseModel):
     priority: int
 
 @app.get("/api/exam-types")
-def get_exam_types(db: Session = Depends(get_db)):
+def get_exam_types(db: Session = Depends(get_read_db)):
     """DB에 존재하는 검진종류(checkup_type)를 쉼표로 분리하여 고유 키워드 목록 반환"""
     types = db.query(distinct(Checkup.checkup_type)).all()
     unique_keywords = set()
@@ -405,6 +307,7 @@ def get_exam_rules(db: Session = Depends(get_db)):
             ExamRule(category_name="기타", keywords="추가,기타", priority=99)
         ]
         db.add_all(defaults)
+        reclassify_checkups_and_refresh(db)  # 분류 기준이 바뀌므로 전체 재분류
         db.commit()
         rules = defaults
     return rules
@@ -419,6 +322,7 @@ def update_exam_rules(rules: List[ExamRuleDTO], db: Session = Depends(get_db)):
         for r in rules
     ]
     db.add_all(new_rules)
+    reclassify_checkups_and_refresh(db)  # 분류 기준이 바뀌므로 전체 재분류
     db.commit()
     return {"status": "success"}
 
@@ -429,28 +333,19 @@ class ConfigSyncDTO(BaseModel):
 @app.post("/api/config/sync")
 def sync_config(dto: ConfigSyncDTO, db: Session = Depends(get_db)):
     """
-    Company Map/Exclude 일괄 동기화
-    1. Update Maps: Delete all maps and re-insert
-    2. Update Excludes: Delete all excludes and re-insert
+    Company Map/Exclude 일괄 동기화 (화면의 전체 목록을 받아 저장된 내용과의 차이만 반영)
+    - 바뀐 매핑의 이전 / 새 표준 사업장만 집계 큐브 재계산, 제외 목록만 바뀌면 사업장 차원 플래그만 갱신
+    - 바뀐 것이 없으면 쓰기 / 캐시 무효화 없음
     """
     try:
-        # 1. Maps
-        db.query(CompanyMap).delete()
-        if dto.maps:
-            new_maps = [
-                CompanyMap(original_name=m.original_name, standard_name=m.standard_name) 
-                for m in dto.maps
-            ]
-            db.add_all(new_maps)
-
-        # 2. Excludes
-        db.query(CompanyExclude).delete()
-        if dto.excludes:
-            new_excl = [CompanyExclude(company_name=e) for e in dto.excludes]
-            db.add_all(new_excl)
-            
+        changes = sync_company_config(db, {m.original_name: m.standard_name for m in dto.maps}, dto.excludes)
+        if changes["mapped_names"]:
+            refresh_stats_cube(db, names=changes["mapped_names"])
+        elif changes["excluded_names"]:
+            refresh_company_dim(db)
         db.commit()
-        return {"status": "synced"}
+        changed = bool(changes["mapped_names"] or changes["excluded_names"])
+        return {"status": "synced", "changed": changed, **changes}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -459,404 +354,276 @@ def sync_config(dto: ConfigSyncDTO, db: Session = Depends(get_db)):
 # [NEW] Period Analysis Endpoint
 # ---------------------------------------------------------
 @app.get("/api/stats/period")
-def get_period_stats(
+async def get_period_stats(
+    request: Request,
     start_date: str, 
     end_date: str,
     ignore_exclude: bool = False,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, description="byBiz 사업장 수 (없으면 매출 상위 50)"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="이전 응답의 byBizPage.next_cursor"),
+    sort: Optional[str] = Query(None, regex="^(amount|count|name)$"),
+    db: Session = Depends(get_read_db)
 ):
     """
     특정 기간(start_date ~ end_date) 동안의 통계
     - Dynamic Exam Classification based on ExamRule
+    - limit / offset / cursor / sort: byBiz 페이지 (byBizPage에 전체 사업장 수 / 다음 cursor)
     """
-    # Create tables if not exist (fail-safe for ExamRule)
-    Base.metadata.create_all(bind=engine)
-
-    company_expr = func.coalesce(CompanyMap.standard_name, Checkup.company_name).label("final_name")
-    
-    # [GLOBAL FILTER] Fetch Excludes from DB
-    db_excludes = [r.company_name for r in db.query(CompanyExclude).all()]
-
-    # 1. Base Query
-    q = db.query(
-        Checkup.checkup_type,
-        company_expr.label('company_name'),
-        Checkup.total_price
-    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)\
-     .filter(Checkup.checkup_date >= start_date)\
-     .filter(Checkup.checkup_date <= end_date)
-     
-    if db_excludes and not ignore_exclude:
-        q = q.filter(company_expr.not_in(db_excludes))
-     
-    rows = q.all()
-    
-    # Fetch Classification Rules
-    rules = db.query(ExamRule).order_by(ExamRule.priority).all()
-    if not rules:
-        # Fallback in memory if DB empty and not auto-seeded yet
-         rules = [
-            ExamRule(category_name="종합검진", keywords="종합", priority=1),
-            ExamRule(category_name="기타", keywords="", priority=99)
-         ]
+    if not is_paged(limit, offset, cursor, sort):
+        return await cached_json_async(request, db, lambda: stats_pool.run(compute_period_stats, start_date, end_date, ignore_exclude))
+
+    async def compute():
+        stats = await cached_value_async(
+            request, db, lambda: stats_pool.run(compute_period_stats, start_date, end_date, ignore_exclude, None), ignore=PAGE_PARAMS)
+        return biz_page(stats, limit, offset, cursor, sort)
+    return await cached_json_async(request, db, compute)
+
+@app.get("/api/stats/periods")
+async def get_periods_stats(
+    request: Request,
+    period: List[str] = Query(..., description="START,END (YYYY-MM-DD,YYYY-MM-DD) - 여러 번 지정"),
+    ignore_exclude: bool = False,
+    limit: Optional[int] = Query(None, ge=1, description="기간별 byBiz 사업장 수 (없으면 매출 상위 50)"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, regex="^(amount|count|name)$"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    여러 기간의 통계를 한 번에 (기간 비교 화면: 분석 기간 + 비교 기간)
+    - 쿼리 1회로 모든 기간을 집계, 결과는 시작일/종료일 순 (중복 기간은 하나로)
+    - limit / offset / cursor / sort: 기간별 byBiz 페이지 (/api/stats/period와 같음)
+    """
+    windows = set()
+    for value in period:
+        parts = [p.strip() for p in value.split(',')]
+        if len(parts) != 2 or not all(parts):
+            raise HTTPException(status_code=400, detail=f"period 형식 오류: {value} (START,END)")
+        windows.add(tuple(parts))
+    if len(windows) > MAX_PERIODS:
+        raise HTTPException(status_code=400, detail=f"기간은 최대 {MAX_PERIODS}개까지 지정할 수 있습니다")
+    windows = sorted(windows)
+
+    async def compute():
+        if is_paged(limit, offset, cursor, sort):
+            results = await cached_value_async(
+                request, db, lambda: stats_pool.run(compute_periods_stats, windows, ignore_exclude, None), ignore=PAGE_PARAMS)
+            results = [biz_page(r, limit, offset, cursor, sort) for r in results]
+        else:
+            results = await stats_pool.run(compute_periods_stats, windows, ignore_exclude)
+        return {"periods": [{"start_date": s, "end_date": e, **r} for (s, e), r in zip(windows, results)]}
+    return await cached_json_async(request, db, compute)
 
-    total_count = 0
-    total_amount = 0
-    by_type = {}
-    by_biz = {}
-    
-    # Initialize buckets (to ensure order in JSON if frontend relies on keys)
-    for r in rules:
-        by_type[r.category_name] = {"count": 0, "amount": 0}
-    if "기타" not in by_type: by_type["기타"] = {"count": 0, "amount": 0}
-        
-    for r in rows:
-        amt = r.total_price or 0
-        total_count += 1
-        total_amount += amt
-        
-        # Type Aggregation
-        c_type = (r.checkup_type or "").strip()
-        
-        found_key = "기타"
-        if c_type: 
-            for rule in rules:
-                keywords = [k.strip() for k in rule.keywords.split(',') if k.strip()]
-                match = False
-                for k in keywords:
-                    if k in c_type:
-                        match = True
-                        break
-                if match:
-                    found_key = rule.category_name
-                    break
-        
-        if found_key not in by_type: by_type[found_key] = {"count": 0, "amount": 0}
-        by_type[found_key]["count"] += 1
-        by_type[found_key]["amount"] += amt
-        
-        # Company Aggregation
-        c_name = r.company_name or "미지정"
-        if c_name not in by_biz: by_biz[c_name] = {"count": 0, "amount": 0}
-        by_biz[c_name]["count"] += 1
-        by_biz[c_name]["amount"] += amt
-        
-    # Sort Biz by amount desc
-    sorted_biz = dict(sorted(by_biz.items(), key=lambda item: item[1]['amount'], reverse=True)[:50])
-
-    return {
-        "total": {"count": total_count, "amount": total_amount},
-        "byType": by_type,
-        "byBiz": sorted_biz
-    }
+def biz_page(stats, limit, offset, cursor, sort):
+    """기간 통계의 byBiz(전체 사업장) -> 한 페이지 + byBizPage"""
+    page, info = paginate(list(stats["byBiz"].items()), BIZ_SORTS[sort or "amount"], limit, offset, cursor)
+    return {**stats, "byBiz": dict(page), "byBizPage": info}
 
 # ---------------------------------------------------------
 # [NEW] Retention Analysis Endpoint
 # ---------------------------------------------------------
 @app.get("/api/stats/retention")
-def get_retention_stats(years: List[int] = Query(...), db: Session = Depends(get_db)):
+def get_retention_stats(
+    request: Request,
+    years: List[int] = Query(...),
+    detail: Optional[str] = Query(None, regex="^(new|churn|up|down)$", description="이 상세 목록만 응답"),
+    limit: Optional[int] = Query(None, ge=1, description="상세 목록별 사업장 수"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="이전 응답의 details_page[연도][목록].next_cursor (detail과 함께)"),
+    sort: Optional[str] = Query(None, regex="^(val|name)$", description="없으면 목록별 기본 순서"),
+    db: Session = Depends(get_read_db)
+):
     """
     사업장(Company) 유지/이탈 분석 (Company Retention)
     - Threshold: Analyzed Year Revenue > 5,000,000 KRW
+    - detail / limit / offset / cursor / sort: 상세 목록 페이지 (details_page에 목록별 전체 수 / 합계 / 다음 cursor)
     """
-    sorted_years = sorted(years)
-    if not sorted_years:
-        return {"waterfall": {}, "details": {}, "years": []}
+    if detail is None and not is_paged(limit, offset, cursor, sort):
+        return cached_json(request, db, lambda: compute_retention_stats(db, years))
+    if cursor and detail is None:
+        raise HTTPException(status_code=400, detail="cursor는 detail(new / churn / up / down)과 함께 사용합니다")
+
+    def compute():
+        stats = cached_value(request, db, lambda: compute_retention_stats(db, years), ignore=PAGE_PARAMS + ('detail',))
+        details, pages = {}, {}
+        for y, lists in stats["details"].items():
+            details[y], pages[y] = {}, {}
+            for kind, items in lists.items():
+                if detail is not None and kind != detail:
+                    continue
+                page, info = paginate(items, RETENTION_SORTS[sort or kind], limit, offset, cursor)
+                info["sum"] = sum(item["diff" if kind in ("up", "down") else "val"] for item in items)
+                details[y][kind], pages[y][kind] = page, info
+        return {**stats, "details": details, "details_page": pages}
+    return cached_json(request, db, compute)
 
-    # Fetch (Min Year - 1) ~ Max Year to enable calculation for the first selected year
-    min_y = min(sorted_years)
-    max_y = max(sorted_years)
-    target_years = [str(y) for y in range(min_y - 1, max_y + 1)]
+@app.get("/api/stats/revisit/person")
+async def get_revisit_person_stats(request: Request, db: Session = Depends(get_read_db)):
+    return await cached_json_async(request, db, lambda: stats_pool.run(compute_revisit_person_stats))
 
-    # Query Company Revenue by Year
-    company_expr = func.coalesce(CompanyMap.standard_name, Checkup.company_name).label("name")
-    
-    q = db.query(
-        func.substr(Checkup.checkup_date, 1, 4).label("year"),
-        company_expr,
-        func.sum(Checkup.total_price).label("rev")
-    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)\
-     .filter(func.substr(Checkup.checkup_date, 1, 4).in_(target_years))\
-     .group_by("year", company_expr)
-     
-    rows = q.all()
-    
-    # Organize Data: full_data[year][name] = revenue
-    full_data = {} 
-    for r in rows:
-        y = int(r.year)
-        name = r.name or "미지정"
-        rev = int(r.rev or 0)
-        
-        if y not in full_data: full_data[y] = {}
-        full_data[y][name] = rev
-        
-    threshold = 5000000 
-    
-    waterfall = {}
-    details = {} 
-    
-    # Calculate Metrics for Selected Years
-    for y in sorted_years:
-        prev_y = y - 1
-        
-        curr_map = full_data.get(y, {})
-        prev_map = full_data.get(prev_y, {})
-        
-        # Valid Companies (Above Threshold)
-        curr_set = {k for k, v in curr_map.items() if v > threshold}
-        prev_set = {k for k, v in prev_map.items() if v > threshold}
-        
-        maintained = list(curr_set & prev_set)
-        
-        # New & Churn with Amounts
-        new_comps = [{"name": c, "val": curr_map[c]} for c in (curr_set - prev_set)]
-        churn_comps = [{"name": c, "val": prev_map[c]} for c in (prev_set - curr_set)]
-        
-        # Revenue Change for Maintained
-        up = []
-        down = []
-        for c in maintained:
-            curr_r = curr_map.get(c, 0)
-            prev_r = prev_map.get(c, 0)
-            if curr_r > prev_r: up.append({"name": c, "diff": curr_r - prev_r, "val": curr_r})
-            elif curr_r < prev_r: down.append({"name": c, "diff": curr_r - prev_r, "val": curr_r})
-            
-        # Sort Lists
-        new_comps.sort(key=lambda x: x['val'], reverse=True)
-        churn_comps.sort(key=lambda x: x['val'], reverse=True)
-        up.sort(key=lambda x: x['diff'], reverse=True) 
-        down.sort(key=lambda x: x['diff'])             
-        
-        details[y] = {
-            "new": new_comps,
-            "churn": churn_comps,
-            "up": up,
-            "down": down
-        }
-        
-        waterfall[y] = {
-            "new": len(new_comps),
-            "churn": len(churn_comps),
-            "retained": len(maintained)
-        }
-        
-    return {
-        "waterfall": waterfall,
-        "details": details,
-        "years": sorted_years,
-        "stickiness": [], # Legacy
-        "total_users": 0  # Legacy
-    }
+# ---------------------------------------------------------
+# [검사 항목] 코드 -> 접수 / 접수 -> 코드 (item_codes.py 색인 조회)
+# ---------------------------------------------------------
+@app.get("/api/items/{code}/receipts")
+def get_item_receipts(code: str, limit: int = Query(100, ge=1, le=10000), offset: int = Query(0, ge=0),
+                      db: Session = Depends(get_read_db)):
+    """검사 코드가 포함된 접수번호 (접수 순, total = 전체 건수)"""
+    receipts, total = receipts_with_code(db.connection(), code, limit, offset)
+    return {"code": code, "total": total, "offset": offset, "limit": limit, "receipts": receipts}
+
+@app.get("/api/receipts/{receipt_no}/items")
+def get_receipt_items(receipt_no: str, db: Session = Depends(get_read_db)):
+    """접수의 검사 코드 목록 (코드 마스터 명칭 포함)"""
+    codes = codes_of_receipt(db.connection(), receipt_no)
+    names = dict(db.query(MedicalCode.code, MedicalCode.name).filter(MedicalCode.code.in_(codes)).all()) if codes else {}
+    return {"receipt_no": receipt_no, "items": [{"code": c, "name": names.get(c)} for c in codes]}
+
+@app.get("/api/stats/items")
+def get_item_stats(
+    request: Request,
+    by: str = Query("year", regex="^(year|month|company)$"),
+    years: Optional[List[int]] = Query(None),
+    company: Optional[str] = Query(None, description="표준 사업장명 (이 사업장만)"),
+    code: Optional[List[str]] = Query(None, description="검사 코드 (현재 코드, by=company는 필수)"),
+    ignore_exclude: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """검사 코드 / 코드 분류별 접수 건수 (item_cube.py 집계, 코드 변경 매핑 반영)"""
+    if by == "company" and not code:
+        raise HTTPException(status_code=400, detail="by=company는 code를 지정해야 합니다")
+    if code and by == "company" and len(code) > MAX_COMPANY_CODES:
+        raise HTTPException(status_code=400, detail=f"by=company는 코드 {MAX_COMPANY_CODES}개까지 조회할 수 있습니다")
+    return cached_json(request, db, lambda: compute_item_stats(
+        db.connection(), years=years, company=company, codes=code, by=by, ignore_exclude=ignore_exclude))
+
+AFFINITY_VIEW_PARAMS = ('code', 'top', 'min_count', 'sort')
+
+@app.get("/api/stats/items/affinity")
+async def get_item_affinity(
+    request: Request,
+    years: Optional[List[int]] = Query(None),
+    company: Optional[str] = Query(None, description="표준 사업장명 (이 사업장만)"),
+    category: Optional[str] = Query(None, description="검진분류 (ExamRule)"),
+    code: Optional[List[str]] = Query(None, description="연관 코드를 볼 검사 코드 (없으면 전체 코드 쌍 상위)"),
+    top: int = Query(20, ge=1, le=500),
+    min_count: int = Query(5, ge=1, description="함께 받은 접수가 이보다 적은 쌍은 제외"),
+    sort: str = Query("lift", regex="^(lift|count)$"),
+    db: Session = Depends(get_read_db)
+):
+    """검사 코드 동시 이용: 코드 쌍 / 연관 코드의 건수, 신뢰도, 향상도 (item_affinity.py)"""
+    if code and len(code) > AFFINITY_MAX_CODES:
+        raise HTTPException(status_code=400, detail=f"code는 {AFFINITY_MAX_CODES}개까지 지정할 수 있습니다")
 
-@app.get("/api/stats/revisit/person")
-def get_revisit_person_stats(db: Session = Depends(get_db)):
-    # 1. Fetch Key Identity Data (LifeCode, ResidentNo) and CheckupDate from all checkups
-    #    (Assuming 1 checkup per year per person is the rule, we extract Year)
-    
-    # We need to join Patient to get life_code/resident_no if not in Checkup (Wait, Checkup has patient_id)
-    # Models: Checkup -> patient_id -> Patient(life_code, resident_no)
-    
-    # Selecting relevant columns
-    results = db.query(
-        Patient.life_code, 
-        Patient.resident_no, 
-        func.substr(Checkup.checkup_date, 1, 4).label("year")
-    ).join(Patient, Checkup.patient_id == Patient.id).distinct().all()
-    
-    # 2. Process in Python
-    person_years = defaultdict(set)
-    for lc, rn, y in results:
-        if not y: continue
-        try:
-            y_int = int(y)
-            pid = f"{lc}_{rn}" # Unique Person ID
-            person_years[pid].add(y_int)
-        except ValueError:
-            # Handle cases where year is not a valid integer
-            continue
-            
-    # 3. Analyze Frequency
-    # Distribution of N-year visitors (How many people visited N distinct years?)
-    # And Biennial patterns
-    
-    freq_dist = defaultdict(int) # {1: count, 2: count, ...}
-    biennial_count = 0
-    total_people = len(person_years)
-    
-    # Define Biennial Logic: 
-    # "Visiting every other year" - e.g. 2021, 2023, 2025...
-    # Strict definition: Gaps of exactly 2 years? Or just "Average gap ~2"?
-    # User said: "격년으로 방문하는 사람" (People visiting biennially).
-    # Simple heuristic: Check if sorted years have gaps of 2 frequently.
-    # OR: people who have visited multiple times but NOT consecutively?
-    # Let's count people who have at least one gap of 2 years and NO gap of 1 year? 
-    # Or just people with pattern 2021, 2023?
-    # Let's try: If 50% or more of their gaps are >= 2 ?
-    # Let's stick to a simpler logic for now: "Users with at least one 2-year gap" or "Users who visited >1 times and never consecutive years".
-    # User Requirement: "2개년도 3개년도... 방문자 수를 체크하고 격년으로 방문하는 사람을 표현"
-    # So "Consecutive Visitors" (Every year) vs "Biennial Visitors" (Every 2 years).
-    
-    for pid, years in person_years.items():
-        count = len(years)
-        freq_dist[count] += 1
-        
-        if count > 1:
-            sorted_years = sorted(list(years))
-            gaps = [sorted_years[i+1] - sorted_years[i] for i in range(len(sorted_years)-1)]
-            
-            # Biennial check: predominantly gaps of 2?
-            # E.g. 2021, 2023 (gap 2). 
-            # 2021, 2022, 2024 (gap 1, 2) -> Mixed.
-            # Strict Biennial: All gaps are >= 2?
-            # This identifies people who SKIP years regularly
-            if all(g >= 2 for g in gaps):
-                biennial_count += 1
-                
-    # 4. Yearly Retention Analysis
-    year_pids = defaultdict(set)
-    for pid, years in person_years.items():
-        for y in years:
-            year_pids[y].add(pid)
-            
-    sorted_years = sorted(year_pids.keys(), reverse=True)
-    yearly_stats = []
-    
-    for y in sorted_years:
-        curr_pids = year_pids[y]
-        prev_pids = year_pids.get(y-1, set())
-        
-        retained = len(curr_pids & prev_pids)
-        total = len(curr_pids)
-        
-        yearly_stats.append({
-            "year": y,
-            "total": total,
-            "retained": retained,
-            "retained_rate": round(retained / total * 100, 1) if total > 0 else 0
-        })
-        
-    # Sort freq keys
-    sorted_freq = dict(sorted(freq_dist.items()))
-    
-    return {
-        "total_people": total_people,
-        "biennial_visitors": biennial_count,
-        "frequency_distribution": sorted_freq,
-        "yearly_retention": yearly_stats
-    }
+    async def compute():
+        # 동시 출현 행렬은 필터(연도 / 사업장 / 검진분류)별로 캐시 -> code / top / sort만 다른 요청은 재사용
+        affinity = await cached_value_async(request, db, lambda: stats_pool.run(build_affinity, years, company, category),
+                                            ignore=AFFINITY_VIEW_PARAMS)
+        return affinity_result(affinity, codes=code, top=top, min_count=min_count, sort=sort)
+    return await cached_json_async(request, db, compute)
+
+# ---------------------------------------------------------
+# [내보내기] 검진 접수 CSV / Parquet 스트리밍 (export.py)
+# ---------------------------------------------------------
+@app.get("/api/export/checkups")
+def export_checkups(
+    format: str = Query("csv", regex="^(csv|parquet)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    years: Optional[List[int]] = Query(None),
+    companies: Optional[List[str]] = Query(None, description="표준 사업장명 (매핑된 원본명 포함)"),
+    exclude_companies: Optional[List[str]] = Query(None),
+    ignore_exclude: bool = False,
+):
+    """/api/stats와 같은 필터의 검진 접수 행 (배치 단위로 읽어 바로 전송, 환자 개인정보 제외)"""
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+    filters = dict(start_date=start_date, end_date=end_date, years=years, companies=companies,
+                   exclude_companies=exclude_companies, ignore_exclude=ignore_exclude)
+    return StreamingResponse(stream_export(format, filters), media_type=EXPORT_FORMATS[format][0],
+                             headers={"Content-Disposition": f'attachment; filename="{export_filename(format)}"'})
 
 # ---------------------------------------------------------
 # [NEW] Config & Helper Endpoints
 # ---------------------------------------------------------
 
-@app.get("/api/company-list")
-def get_all_companies(db: Session = Depends(get_db)):
-    """DB에 존재하는 모든 회사명과 총 매출 반환 (매출순 정렬)"""
-    try:
-        # Use Standard Name if mapped, else Original Name
-        company_expr = func.coalesce(CompanyMap.standard_name, Checkup.company_name).label("final_name")
-        
-        # Aggregate Revenue
-        q = db.query(
-            company_expr, 
-            func.sum(Checkup.total_price).label("rev")
-        ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)\
-         .group_by(company_expr)
-              
-        rows = q.all()
-        
-        # Format & Sort
-        data = [{"name": r[0] or "미지정", "rev": int(r[1] or 0)} for r in rows if r[0]]
-        data.sort(key=lambda x: x['rev'], reverse=True)
-        
-        return data
+@app.get("/api/cache/stats")
+def get_cache_stats(db: Session = Depends(get_read_db)):
+    """통계 응답 캐시 적중률, 동시 요청 합치기(single-flight) 횟수 및 현재 데이터/설정 세대 번호"""
+    return {**response_cache.stats(), "single_flight": single_flight.stats(), "generation": get_generation(db)}
 
-    except Exception as e:
-        print("CRITICAL ERROR in /api/company-list:", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/workers/stats")
+def get_worker_stats():
+    """통계 계산 프로세스 풀 상태 (함수별 대기 시간 / 계산 시간, 거절 / 시간 초과 수)"""
+    return stats_pool.stats()
 
-class ConfigSyncDTO(BaseModel):
-    maps: List[CompanyMapDTO]
-    excludes: List[str] # List of company names
-    exam_config: Optional[Dict[str, Any]] = None # Future use
+# ---------------------------------------------------------
+# [지표] /metrics (Prometheus) - 요청 / SQL은 metrics.py, 캐시 / 워커 풀 / 적재 작업은 여기서 수집
+# ---------------------------------------------------------
+def collect_app_metrics():
+    cache = response_cache.stats()
+    flight = single_flight.stats()
+    pool = stats_pool.stats()
+    kernels = pool["kernels"].items()
+    job_status = {}
+    for job in ingest_jobs.list():
+        job_status[job.status] = job_status.get(job.status, 0) + 1
+    return [
+        ("bizhealth_cache_requests_total", "counter", "응답 캐시 조회 (hit / miss)",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("bizhealth_cache_not_modified_total", "counter", "ETag 일치로 304 응답", [({}, cache["not_modified"])]),
+        ("bizhealth_cache_evictions_total", "counter", "용량 초과로 밀려난 캐시 항목", [({}, cache["evictions"])]),
+        ("bizhealth_cache_entries", "gauge", "캐시 항목 수", [({}, cache["size"])]),
+        ("bizhealth_single_flight_collapsed_total", "counter", "진행 중인 계산을 기다려 공유한 요청 수",
+         [({"route": route}, n) for route, n in flight["collapsed_by_route"].items()]),
+        ("bizhealth_stats_pool_pending", "gauge", "통계 워커 풀 실행 중 + 대기 중 작업", [({}, pool["pending"])]),
+        ("bizhealth_stats_pool_jobs_total", "counter", "통계 워커 풀 작업 (결과별)",
+         [({"kernel": k, "result": result}, m[key]) for k, m in kernels
+          for result, key in (("ok", "jobs"), ("rejected", "rejected"), ("timeout", "timeouts"), ("error", "errors"))]),
+        ("bizhealth_stats_pool_queue_seconds_total", "counter", "통계 워커 풀 대기 시간 합계 (초)",
+         [({"kernel": k}, m["queue_wait_sec"]) for k, m in kernels]),
+        ("bizhealth_stats_pool_compute_seconds_total", "counter", "통계 워커 풀 계산 시간 합계 (초)",
+         [({"kernel": k}, m["compute_sec"]) for k, m in kernels]),
+        ("bizhealth_ingest_jobs", "gauge", "보관 중인 적재 작업 (상태별)",
+         [({"status": status}, n) for status, n in job_status.items()]),
+    ]
 
-@app.post("/api/config/sync")
-def sync_config(dto: ConfigSyncDTO, db: Session = Depends(get_db)):
-    """
-    설정 동기화 (Bulk Update)
-    - 기존 매핑/제외 목록을 모두 지우고 요청된 내용으로 덮어씌움 (Full Sync)
-    """
-    # 1. Clear existing
-    db.query(CompanyMap).delete()
-    db.query(CompanyExclude).delete()
-    
-    # 2. Add Maps
-    for m in dto.maps:
-        db.add(CompanyMap(original_name=m.original_name, standard_name=m.standard_name))
-        
-    # 3. Add Excludes
-    for e in dto.excludes:
-        db.add(CompanyExclude(company_name=e))
-        
-    db.commit()
-    return {"status": "synced", "maps": len(dto.maps), "excludes": len(dto.excludes), "message": "동기화 완료"}
+metrics.registry.register_collector(collect_app_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus 형식 지표 (라우트별 응답 시간 히스토그램, SQL 수 / 시간, 캐시, 워커 풀, 적재 작업)"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/slow-queries")
+def get_slow_queries():
+    """최근 느린 쿼리 (BIZHEALTH_SLOW_QUERY_MS 이상, 최대 50건) - 실행 계획 포함"""
+    return metrics.registry.slow_query_list()
 
 # ---------------------------------------------------------
 # 4. 데이터 관리 API (Settings & Upload)
 # ---------------------------------------------------------
 
 # 4-1. 사업장명 병합 규칙 관리
-@app.get("/api/company-map")
-def get_company_maps(db: Session = Depends(get_db)):
-    try:
-        rows = db.query(CompanyMap).all()
-        return [{"original_name": m.original_name, "standard_name": m.standard_name} for m in rows]
-    except Exception as e:
-        print("ERROR in /api/company-map:", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.post("/api/company-map")
-def create_company_map(rule: CompanyMapCreate, db: Session = Depends(get_db)):
-    try:
-        existing = db.query(CompanyMap).filter(CompanyMap.original_name == rule.original_name).first()
-        if existing:
-            existing.standard_name = rule.standard_name
-        else:
-            db.add(CompanyMap(original_name=rule.original_name, standard_name=rule.standard_name))
-        db.commit()
-        return {"status": "ok"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
 @app.delete("/api/company-map")
 def delete_company_map(original_name: str, db: Session = Depends(get_db)):
     try:
+        old_name = final_name_of(db, original_name)
         db.query(CompanyMap).filter(CompanyMap.original_name == original_name).delete()
+        refresh_stats_cube(db, names=[old_name, original_name])
         db.commit()
         return {"message": "규칙이 삭제되었습니다"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 4-2. 제외 사업장 관리
-@app.get("/api/company-exclude")
-def get_excludes(db: Session = Depends(get_db)):
-    try:
-        rows = db.query(CompanyExclude).all()
-        return [r.company_name for r in rows]
-    except Exception as e:
-        print("ERROR in /api/company-exclude:", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-        raise HTTPException(status_code=500, detail=str(e))
-
 @app.post("/api/settings/exclude")
 def add_exclude(item: CompanyExcludeCreate, db: Session = Depends(get_db)):
     existing = db.query(CompanyExclude).filter(CompanyExclude.company_name == item.company_name).first()
     if not existing:
         new_exclude = CompanyExclude(company_name=item.company_name, memo=item.memo)
         db.add(new_exclude)
+        refresh_company_dim(db)
         db.commit()
     return {"message": "제외 항목이 추가되었습니다"}
 
@@ -866,21 +633,43 @@ def delete_exclude(company_name: str, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="항목을 찾을 수 없습니다")
     db.delete(item)
+    refresh_company_dim(db)
     db.commit()
     return {"message": "제외 항목이 삭제되었습니다"}
 
 # 4-3. 파일 업로드 (DB 및 CSV)
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
+    filename = safe_filename(file.filename)
     # 허용된 파일 확장자 확인
-    if not (file.filename.endswith(".csv") or file.filename.endswith(".db")):
+    if not (filename.endswith(".csv") or filename.endswith(".db")):
         raise HTTPException(status_code=400, detail=".csv 및 .db 파일만 업로드 가능합니다")
     
-    # 저장 경로 설정 (현재 백엔드 디렉토리)
-    file_location = f"./{file.filename}"
+    if is_protected_filename(filename):
+        raise HTTPException(status_code=400, detail=f"'{filename}'은(는) 사용 중인 DB 파일이라 업로드로 덮어쓸 수 없습니다")
     
-    # 파일 저장
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
+    # 저장 경로 설정 (백엔드 디렉토리, init_db.py와 같은 위치)
+    file_location = os.path.join(BASE_DIR, filename)
     
-    return {"info": f"파일 '{file.filename}'이(가) '{file_location}'에 저장되었습니다"}
+    # 파일 저장 (청크 단위 스트리밍 + SHA-256)
+    # 검진 내역 CSV(csv20*.csv)는 임시 파일로 두고 백그라운드 적재 작업이 시작할 때 교체 (진행 상황: /api/jobs/{id})
+    checkup_csv = is_checkup_csv(filename)
+    digest, size, saved = await save_upload(file, file_location, defer=checkup_csv)
+    if checkup_csv:
+        job = ingest_jobs.submit(file_location, digest, staged=saved)
+        info = f"파일 '{filename}'을(를) 받았습니다. 적재 작업이 시작되면 '{file_location}'에 반영됩니다 (진행 상황: /api/jobs/{job.id})"
+        return {"info": info, "sha256": digest, "size": size, "job_id": job.id}
+    return {"info": f"파일 '{filename}'이(가) '{file_location}'에 저장되었습니다", "sha256": digest, "size": size}
+
+@app.get("/api/jobs")
+def get_jobs():
+    """최근 적재 작업 목록 (최신순)"""
+    return [job.to_dict() for job in ingest_jobs.list()]
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """적재 작업 진행 상황 (처리 행 수 / 진행률 / 처리 속도 / 오류)"""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job.to_dict()
@@ -0,0 +1,248 @@
+# metrics.py
+# 요청 / SQL 계측 + Prometheus 텍스트 형식 지표 (/metrics)
+# - 라우트별 응답 시간 히스토그램 (경로 템플릿 기준, 예: /api/company/{name}/stats)
+# - 요청별 SQL 쿼리 수 / SQL 시간 (SQLAlchemy before/after_cursor_execute, database.py의 서버용 엔진)
+# - 느린 쿼리: SLOW_QUERY_MS 이상이면 EXPLAIN QUERY PLAN과 함께 경고 로그 (최근 목록은 /api/metrics/slow-queries)
+# - 응답 헤더: X-Response-Time, Server-Timing (app / db / pool) -> 브라우저 개발자 도구 Timing 탭에서 확인
+# 통계 워커 프로세스의 SQL은 그 프로세스에서 느린 쿼리 로그만 남고, 요청에는 pool 시간으로 합산됩니다.
+# 환경 변수
+#   BIZHEALTH_METRICS=0           계측 끔 (미들웨어 / SQL 이벤트 미등록)
+#   BIZHEALTH_SLOW_QUERY_MS       느린 쿼리 기준 (기본 1000, 0이면 로그 안 함)
+#   BIZHEALTH_TIMING_HEADERS=0    X-Response-Time / Server-Timing 헤더 끔
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+ENABLED = os.environ.get("BIZHEALTH_METRICS", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("BIZHEALTH_SLOW_QUERY_MS", "1000"))
+TIMING_HEADERS = os.environ.get("BIZHEALTH_TIMING_HEADERS", "1") != "0"
+
+# 응답 시간 히스토그램 구간 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BACKGROUND = "<background>"  # 요청 밖의 쿼리 (적재 작업, 시작 시 마이그레이션 등)
+UNMATCHED = "<unmatched>"    # 404 등 라우트가 없는 요청
+
+logger = logging.getLogger("bizhealth.slow_query")
+
+# 현재 요청의 계측 값 (요청 스레드 / threadpool로 복사되는 컨텍스트에서 같은 dict 공유)
+_current = ContextVar("bizhealth_request_metrics", default=None)
+
+# ---------------------------------------------------------
+# [저장소] 카운터 / 히스토그램
+# ---------------------------------------------------------
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}    # (method, route, status) -> 건수
+        self.latency = {}     # (method, route) -> [구간별 건수..., 합계, 건수]
+        self.sql = {}         # route -> [쿼리 수, SQL 시간]
+        self.slow_queries = 0
+        self.recent_slow = deque(maxlen=50)
+        self._collectors = []
+
+    def observe_request(self, method, route, status, elapsed, queries, sql_sec):
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            h = self.latency.setdefault((method, route), [0] * (len(BUCKETS) + 3))
+            h[bisect_left(BUCKETS, elapsed)] += 1
+            h[-2] += elapsed
+            h[-1] += 1
+            s = self.sql.setdefault(route, [0, 0.0])
+            s[0] += queries
+            s[1] += sql_sec
+
+    def observe_background_query(self, elapsed):
+        with self._lock:
+            s = self.sql.setdefault(BACKGROUND, [0, 0.0])
+            s[0] += 1
+            s[1] += elapsed
+
+    def observe_slow(self, entry):
+        with self._lock:
+            self.slow_queries += 1
+            self.recent_slow.append(entry)
+
+    def slow_query_list(self):
+        """최근 느린 쿼리 (최신순)"""
+        with self._lock:
+            return list(reversed(self.recent_slow))
+
+    def register_collector(self, collect):
+        """collect() -> [(이름, 타입, 설명, [(라벨 dict, 값), ...]), ...] (캐시 / 워커 풀 등 다른 모듈의 지표)"""
+        self._collectors.append(collect)
+
+    def render(self):
+        """Prometheus 텍스트 형식 (text/plain; version=0.0.4)"""
+        with self._lock:
+            requests = dict(self.requests)
+            latency = {k: list(v) for k, v in self.latency.items()}
+            sql = {k: list(v) for k, v in self.sql.items()}
+            slow = self.slow_queries
+        families = [
+            ("bizhealth_http_requests_total", "counter", "HTTP 요청 수",
+             [({"method": m, "route": r, "status": s}, n) for (m, r, s), n in requests.items()]),
+            ("bizhealth_sql_queries_total", "counter", "실행된 SQL 쿼리 수 (요청 라우트별)",
+             [({"route": r}, v[0]) for r, v in sql.items()]),
+            ("bizhealth_sql_seconds_total", "counter", "SQL 실행 시간 합계 (초)",
+             [({"route": r}, v[1]) for r, v in sql.items()]),
+            ("bizhealth_slow_queries_total", "counter", f"{SLOW_QUERY_MS:g}ms 이상 걸린 SQL 쿼리 수", [({}, slow)]),
+        ]
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines += _family(name, kind, help_text, samples)
+
+        name = "bizhealth_http_request_duration_seconds"
+        lines += [f"# HELP {name} 라우트별 응답 시간 (초)", f"# TYPE {name} histogram"]
+        for (method, route), h in sorted(latency.items()):
+            labels = {"method": method, "route": route}
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), h):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_value(h[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {h[-1]}")
+
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines += _family(name, kind, help_text, samples)
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _value(value):
+    return f"{value:.6f}".rstrip("0").rstrip(".") if isinstance(value, float) else str(value)
+
+def _family(name, kind, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {_value(value)}" for labels, value in samples]
+    return lines
+
+registry = Registry()
+
+# ---------------------------------------------------------
+# [SQL] 쿼리 수 / 시간 / 느린 쿼리 (EXPLAIN QUERY PLAN)
+# ---------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    current = _current.get()
+    if current is not None:
+        current["queries"] += 1
+        current["sql"] += elapsed
+    else:
+        registry.observe_background_query(elapsed)
+    if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+        _log_slow_query(cursor, statement, parameters, executemany, elapsed, current)
+
+def _log_slow_query(cursor, statement, parameters, executemany, elapsed, current):
+    plan = []
+    if not executemany and statement.lstrip()[:6].upper() in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+        try:
+            rows = cursor.connection.execute("EXPLAIN QUERY PLAN " + statement, parameters or ()).fetchall()
+            plan = [row[-1] for row in rows]
+        except Exception as e:  # 계획 조회 실패는 무시 (로그만 남김)
+            plan = [f"(EXPLAIN 실패: {e})"]
+    route = current["route"]() if current is not None else BACKGROUND
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "ms": round(elapsed * 1000, 1),
+        "route": route,
+        "statement": " ".join(statement.split())[:2000],
+        "plan": plan,
+    }
+    registry.observe_slow(entry)
+    logger.warning("느린 쿼리 %.0fms [%s] %s\n  PLAN: %s", entry["ms"], route, entry["statement"],
+                   "\n        ".join(plan) or "-")
+
+def track_job(name):
+    """요청 밖의 작업(통계 워커 프로세스 등)에서 실행하는 쿼리 -> 느린 쿼리 로그에 작업 이름 표시
+    요청 안(WORKERS=0)이면 요청 값에 그대로 합산. 반환값은 finish_job()에 전달"""
+    if _current.get() is not None:
+        return None
+    return _current.set({"queries": 0, "sql": 0.0, "timings": [], "route": lambda: name})
+
+def finish_job(token):
+    if token is not None:
+        _current.reset(token)
+
+def instrument_engine(engine):
+    """엔진에 SQL 계측 이벤트 등록 (BIZHEALTH_METRICS=0이면 아무것도 안 함)"""
+    if not ENABLED:
+        return engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+# ---------------------------------------------------------
+# [요청] ASGI 미들웨어 + 추가 구간 기록 (워커 풀 등)
+# ---------------------------------------------------------
+def add_timing(name, seconds, desc=None):
+    """현재 요청의 Server-Timing에 구간 추가 (예: workers.py의 pool 대기 / 계산 시간)"""
+    current = _current.get()
+    if current is not None:
+        current["timings"].append((name, seconds, desc))
+
+def _route_of(scope):
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:  # 정적 파일 마운트 (/js 등) -> 마운트 경로
+        return scope.get("root_path") or UNMATCHED
+    return UNMATCHED
+
+def _server_timing(elapsed, current):
+    parts = [f"app;dur={elapsed * 1000:.1f}",
+             f'db;dur={current["sql"] * 1000:.1f};desc="{current["queries"]} queries"']
+    for name, seconds, desc in current["timings"]:
+        parts.append(f"{name};dur={seconds * 1000:.1f}" + (f';desc="{desc}"' if desc else ""))
+    return ", ".join(parts)
+
+class MetricsMiddleware:
+    """라우트별 응답 시간 / SQL 수 기록 + 응답 시간 헤더 (BaseHTTPMiddleware 없이 ASGI로 직접)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        current = {"queries": 0, "sql": 0.0, "timings": [], "route": lambda: _route_of(scope)}
+        token = _current.set(current)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if TIMING_HEADERS:
+                    elapsed = time.perf_counter() - start
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Response-Time", f"{elapsed * 1000:.1f}ms")
+                    headers.append("Server-Timing", _server_timing(elapsed, current))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            registry.observe_request(scope["method"], _route_of(scope), status,
+                                     time.perf_counter() - start, current["queries"], current["sql"])
+            _current.reset(token)
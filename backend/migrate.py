@@ -0,0 +1,121 @@
+# migrate.py
+# 기존 healthcare.db 스키마 업그레이드 (서버 시작 / init_db.py 실행 시 자동 적용)
+#   python migrate.py  -> 수동 실행
+# 적용된 단계는 PRAGMA user_version에 기록되어 한 번만 실행됩니다.
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database import DB_PATH, make_engine
+from models import Base
+from stats_cube import refresh_cube
+from classifier import reclassify_checkups
+from company_dim import build_company_dim
+from item_codes import LEGACY_DETAIL, convert_detail_table
+from item_cube import refresh_item_cube
+
+# ---------------------------------------------------------
+# [공통] 모델에는 있지만 기존 테이블에 없는 컬럼 / 인덱스 추가
+# ---------------------------------------------------------
+def _add_missing_columns(conn):
+    for table in Base.metadata.sorted_tables:
+        existing = {r[1] for r in conn.execute(text(f"PRAGMA table_info({table.name})"))}
+        for col in table.columns:
+            if col.name not in existing:
+                col_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+                print(f"🔧 {table.name}.{col.name} 컬럼 추가")
+
+def _create_missing_indexes(conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+# ---------------------------------------------------------
+# [단계 1] 검진일 정규화 (YYYYMMDD / YYYYMMDD.0 / YYYY.MM.DD -> YYYY-MM-DD) + year/month 채우기
+# ---------------------------------------------------------
+def _normalize_checkup_dates(conn):
+    d = "checkup_date"
+    digits8 = "'" + "[0-9]" * 8 + "'"
+    steps = [
+        f"UPDATE tb_checkup SET {d} = trim({d}) WHERE {d} <> trim({d})",
+        f"UPDATE tb_checkup SET {d} = substr({d}, 1, length({d}) - 2) WHERE {d} LIKE '%.0' AND length({d}) = 10",
+        f"UPDATE tb_checkup SET {d} = substr({d}, 1, 4) || '-' || substr({d}, 5, 2) || '-' || substr({d}, 7, 2) "
+        f"WHERE {d} GLOB {digits8}",
+        f"UPDATE tb_checkup SET {d} = replace(replace({d}, '.', '-'), '/', '-') "
+        f"WHERE {d} GLOB '[0-9][0-9][0-9][0-9][./][0-9][0-9][./][0-9][0-9]'",
+        f"UPDATE tb_checkup SET year = CAST(substr({d}, 1, 4) AS INTEGER), month = CAST(substr({d}, 6, 2) AS INTEGER) "
+        f"WHERE {d} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' AND year IS NULL",
+    ]
+    for sql in steps:
+        conn.execute(text(sql))
+
+# ---------------------------------------------------------
+# [단계 2] 대시보드 집계 큐브(tb_stats_cube) 최초 생성
+# ---------------------------------------------------------
+def _build_stats_cube(conn):
+    refresh_cube(conn)
+
+# ---------------------------------------------------------
+# [단계 3] 검진분류(category) 채우기 -> 분류 기준으로 큐브 재계산
+# ---------------------------------------------------------
+def _classify_checkups(conn):
+    reclassify_checkups(conn)
+    refresh_cube(conn)
+
+# ---------------------------------------------------------
+# [단계 4] 사업장 차원(tb_company_dim) 생성 + tb_checkup.company_id 채우기
+# ---------------------------------------------------------
+def _build_company_dim(conn):
+    build_company_dim(conn)
+
+# ---------------------------------------------------------
+# [단계 5] 검사 항목 코드 압축 (tb_checkup_detail -> 코드 사전 + 접수별 코드 배열 + 코드별 접수 목록)
+# ---------------------------------------------------------
+def _compact_item_codes(conn):
+    if inspect(conn).has_table(LEGACY_DETAIL):
+        convert_detail_table(conn)
+
+# ---------------------------------------------------------
+# [단계 6] 검사 항목 이용 큐브(tb_item_cube) 최초 생성
+# ---------------------------------------------------------
+def _build_item_cube(conn):
+    refresh_item_cube(conn)
+
+MIGRATIONS = [
+    _normalize_checkup_dates,  # user_version 1
+    _build_stats_cube,         # user_version 2
+    _classify_checkups,        # user_version 3
+    _build_company_dim,        # user_version 4
+    _compact_item_codes,       # user_version 5
+    _build_item_cube,          # user_version 6
+]
+VACUUM_AFTER = {_compact_item_codes}  # 큰 테이블을 지운 단계 -> 끝난 뒤 파일 크기 줄이기 (VACUUM)
+
+def upgrade(engine):
+    """테이블/컬럼/인덱스 생성 후 아직 적용되지 않은 데이터 마이그레이션 실행"""
+    fresh = not inspect(engine).has_table('tb_checkup')
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if fresh:
+            # 새로 만든 DB는 처음부터 최신 형식으로 적재되므로 마이그레이션 불필요
+            conn.execute(text(f"PRAGMA user_version = {len(MIGRATIONS)}"))
+        _add_missing_columns(conn)
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        applied = MIGRATIONS[version:]
+        for i, step in enumerate(applied, start=version + 1):
+            print(f"🔧 DB 마이그레이션 {i}: {step.__name__}")
+            step(conn)
+            conn.execute(text(f"PRAGMA user_version = {i}"))
+        _create_missing_indexes(conn)
+    if VACUUM_AFTER.intersection(applied):
+        # VACUUM은 트랜잭션 밖에서만 실행 가능 (DB 크기만큼 시간이 걸림, 1회)
+        print("🔧 DB 파일 정리 (VACUUM)...")
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+
+if __name__ == "__main__":
+    upgrade(make_engine(DB_PATH))  # BIZHEALTH_DB_PATH / PRAGMA(WAL, busy_timeout 등)는 서버와 같게
+    print("Done.")
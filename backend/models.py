@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, String, Integer, ForeignKey, UniqueConstraint, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, UniqueConstraint, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -26,6 +26,8 @@ class Checkup(Base):
     
     # [핵심 요청 항목]
     checkup_date = Column(String)     # 검진일 (YYYY-MM-DD 형식으로 변환 저장)
+    year = Column(Integer)            # 검진 연도 (checkup_date에서 추출, 인덱스 조회용)
+    month = Column(Integer)           # 검진 월 1~12
     package_name = Column(String)     # 패키지
     package_code = Column(String)     # 패키지코드
     send_type = Column(String)        # 발송구분
@@ -34,8 +36,10 @@ class Checkup(Base):
     # [통계 분석용]
     age = Column(Integer)
     company_name = Column(String)
+    company_id = Column(Integer)      # tb_company_dim.id (사업장 차원, company_dim.py)
     department = Column(String)
     checkup_type = Column(String)     # 검진종류
+    category = Column(String)         # 검진분류 (ExamRule로 분류한 결과, classifier.py)
     
     # [금액]
     total_price = Column(Integer, default=0)
@@ -43,18 +47,38 @@ class Checkup(Base):
     corp_price = Column(Integer, default=0)
     nhis_price = Column(Integer, default=0)
     
+    __table_args__ = (
+        Index('ix_checkup_year_company', 'year', 'company_name'),
+        Index('ix_checkup_date', 'checkup_date'),
+        Index('ix_checkup_patient_year', 'patient_id', 'year'),
+        Index('ix_checkup_company_year', 'company_name', 'year'),  # 사업장 상세 (/api/company/{name}/stats)
+        Index('ix_checkup_company_id_year', 'company_id', 'year'),
+    )
+    
     patient = relationship("Patient", back_populates="checkups")
-    details = relationship("CheckupDetail", back_populates="checkup")
 
-# 3. 검진 상세
-class CheckupDetail(Base):
-    __tablename__ = 'tb_checkup_detail'
-    
+# 3. 검진 상세 (검사 항목 코드, item_codes.py)
+class CodeDict(Base):
+    __tablename__ = 'tb_code_dict'
+
     id = Column(Integer, primary_key=True, autoincrement=True)
-    receipt_no = Column(String, ForeignKey('tb_checkup.receipt_no'))
-    medical_code = Column(String)
-    
-    checkup = relationship("Checkup", back_populates="details")
+    code = Column(String, nullable=False, unique=True)  # 검사 코드 (검진항목메모 / 패키지코드에 적힌 값)
+
+class CheckupCodes(Base):
+    __tablename__ = 'tb_checkup_codes'
+
+    id = Column(Integer, primary_key=True)                    # 접수 id (tb_code_posting의 비트 위치)
+    receipt_no = Column(String, nullable=False, unique=True)  # 접수번호
+    codes = Column(LargeBinary)                               # 정렬된 tb_code_dict.id 배열 (uint32)
+
+class CodePosting(Base):
+    __tablename__ = 'tb_code_posting'
+
+    code_id = Column(Integer, primary_key=True)  # tb_code_dict.id
+    chunk = Column(Integer, primary_key=True)    # 접수 id >> 16
+    bits = Column(LargeBinary)                   # 구간 안의 접수 (uint16 정렬 배열 또는 8KB 비트맵)
+
+    __table_args__ = {'sqlite_with_rowid': False}
 
 # 4. 검사 코드 마스터
 class MedicalCode(Base):
@@ -102,4 +126,72 @@ class ExamRule(Base):
     
     category_name = Column(String, primary_key=True)  # 분류명 (예: 종합검진)
     keywords = Column(Text)                           # 포함될 키워드 (쉼표 구분)
-    priority = Column(Integer, default=0)             # 우선순위 (낮은 숫자 우선)
\ No newline at end of file
+    priority = Column(Integer, default=0)             # 우선순위 (낮은 숫자 우선)
+
+# 6. [NEW] 원본 파일 적재 이력 (증분 적재용)
+class IngestFile(Base):
+    __tablename__ = 'tb_ingest_file'
+    
+    file_name = Column(String, primary_key=True)      # 파일명 (경로 제외)
+    content_hash = Column(String, nullable=False)     # 내용 SHA-256 (변경 감지)
+    row_count = Column(Integer, default=0)            # 원본 행 수
+    ingested_at = Column(String)                      # 적재 시각 (ISO)
+
+# 7. [NEW] 대시보드 집계 큐브 (표준 사업장 x 연 x 월 x 검진분류)
+#    적재 / 사업장 매핑 / 분류 규칙 변경 시 stats_cube.py에서 부분 재계산
+class StatsCube(Base):
+    __tablename__ = 'tb_stats_cube'
+    
+    standard_name = Column(String, primary_key=True)  # coalesce(매핑 표준명, 원본 사업장명)
+    year = Column(Integer, primary_key=True)          # 0 = 검진일 불명
+    month = Column(Integer, primary_key=True)         # 0 = 검진일 불명
+    category = Column(String, primary_key=True)       # ExamRule 분류명
+    rev = Column(Integer, default=0)                  # 매출 합계 (total_price)
+    cnt = Column(Integer, default=0)                  # 접수 건수
+    
+    __table_args__ = (Index('ix_stats_cube_year', 'year', 'month'),)
+
+# 8. [NEW] 앱 메타 정보 (key-value)
+#    generation: 데이터 적재 / 설정 변경 시마다 1씩 증가 (응답 캐시 무효화 기준)
+class AppMeta(Base):
+    __tablename__ = 'tb_app_meta'
+    
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
+
+# 9. [NEW] 사업장 차원 (원본 사업장명 -> 통계용 표준명 / 제외 여부)
+#    적재 시 원본명 등록, 매핑 / 제외 변경 시 company_dim.py에서 재계산
+class CompanyDim(Base):
+    __tablename__ = 'tb_company_dim'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    original_name = Column(String, nullable=False, unique=True)  # 원본 (tb_checkup.company_name)
+    standard_name = Column(String)                               # coalesce(매핑 표준명, 원본명)
+    excluded = Column(Integer, default=0)                        # 1 = 표준명이 제외 목록에 있음
+
+# 10. [NEW] 검사 항목 이용 큐브 (사업장 원본명 id x 연 x 월 x 검사 코드 -> 접수 건수)
+#     적재 시 영향받은 연도만 item_cube.py에서 재계산 (코드 변경 매핑 / 사업장 매핑 / 제외는 조회 시 적용)
+class ItemCube(Base):
+    __tablename__ = 'tb_item_cube'
+
+    company_id = Column(Integer, primary_key=True)  # tb_company_dim.id (0 = 사업장 없음)
+    year = Column(Integer, primary_key=True)        # 0 = 검진일 불명
+    month = Column(Integer, primary_key=True)
+    code_id = Column(Integer, primary_key=True)     # tb_code_dict.id (원본 코드)
+    cnt = Column(Integer, default=0)                # 코드가 포함된 접수 건수
+
+    __table_args__ = (
+        Index('ix_item_cube_code_year', 'code_id', 'year', 'cnt'),  # 코드별 사업장 목록 (PK 컬럼 포함 커버링)
+        {'sqlite_with_rowid': False},
+    )
+
+# 11. [NEW] 검사 항목 이용 합계 (연 x 월 x 검사 코드, 전체 사업장) - 제외 사업장은 조회 시 tb_item_cube에서 빼기
+class ItemCubeTotal(Base):
+    __tablename__ = 'tb_item_cube_total'
+
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    code_id = Column(Integer, primary_key=True)
+    cnt = Column(Integer, default=0)
+
+    __table_args__ = {'sqlite_with_rowid': False}
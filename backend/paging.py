@@ -0,0 +1,58 @@
+# paging.py
+# 사업장 단위 목록의 상위 K / 페이지 나누기 (/api/stats CL, 기간 분석 byBiz, 고객 유지 상세 목록)
+# - limit / offset / sort / cursor 파라미터가 하나도 없으면 기존처럼 전체 응답 (main.py)
+# - 순서는 정렬 키 + 사업장명으로 고정 -> 동률이어도 페이지 사이에 빠지거나 겹치는 항목 없음
+# - 필요한 만큼만 heapq로 골라냄 (전체 정렬 없이 O(n log k))
+# - cursor: 이전 페이지 마지막 항목의 정렬 키 -> 다음 페이지는 그 뒤부터 (offset 대신 사용)
+import base64
+import heapq
+import json
+
+from fastapi import HTTPException
+
+PAGE_PARAMS = ('limit', 'offset', 'cursor', 'sort')
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """cursor -> 정렬 키 튜플 (문자열 / 숫자 목록이 아니면 400)"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError, RecursionError):  # base64 / UTF-8 / JSON 오류, 지나치게 깊은 중첩
+        key = None
+    if not isinstance(key, list) or not key or not all(isinstance(v, (str, int, float)) for v in key):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다")
+    return tuple(key)
+
+def paginate(items, key, limit=None, offset=0, cursor=None):
+    """
+    items를 key(item) 오름차순으로 정렬했을 때의 한 페이지 -> (항목 목록, {"total", "offset", "limit", "next_cursor"})
+    - key는 (정렬값, ..., 사업장명) 튜플 (내림차순은 음수 값으로)
+    - next_cursor: 뒤에 항목이 더 있으면 다음 페이지 요청에 넘길 값, 없으면 None
+    """
+    total = len(items)
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            items = [item for item in items if key(item) > after]
+        except TypeError:  # 다른 정렬 기준의 cursor
+            raise HTTPException(status_code=400, detail="cursor와 sort가 맞지 않습니다")
+        offset, skip = total - len(items), 0
+    else:
+        skip = offset
+    if limit is None:
+        page = sorted(items, key=key)[skip:]
+    else:
+        page = heapq.nsmallest(skip + limit, items, key=key)[skip:]
+    more = offset + len(page) < total
+    return page, {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": encode_cursor(key(page[-1])) if page and more else None,
+    }
+
+def is_paged(limit=None, offset=0, cursor=None, sort=None):
+    """페이지 파라미터가 하나라도 있으면 True (없으면 기존 전체 응답)"""
+    return limit is not None or offset > 0 or bool(cursor) or sort is not None
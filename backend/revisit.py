@@ -0,0 +1,81 @@
+# revisit.py
+# 개인 재방문 분석 (/api/stats/revisit/person)
+# 환자(patient_id)마다 방문 연도를 비트 하나씩으로 표현한 비트마스크(uint64 배열)로 계산합니다.
+# - 방문 연도 수: popcount
+# - 격년 방문자: 2회 이상 방문 + 연속된 비트 없음 (mask & (mask >> 1) == 0)
+# - 연도별 유지: (y 비트) & (y-1 비트)
+# 메모리: 환자 수 x 8바이트 (연도 범위 64년 단위), 원본 행은 CHUNK_SIZE씩만 읽습니다.
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import text
+
+CHUNK_SIZE = 200_000
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(a):
+        return np.bitwise_count(a)
+else:
+    # numpy < 2.0: 바이트 단위 조회표
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(a):
+        return _BYTE_COUNTS[a.view(np.uint8)].reshape(*a.shape, 8).sum(axis=-1)
+
+def load_year_masks(conn):
+    """(연도 목록 기준값 min_year, 마스크 배열 [patient_id, word]) - 방문 기록 없는 id는 0"""
+    min_year = conn.execute(text("SELECT min(year) FROM tb_checkup WHERE year > 0")).scalar()
+    if min_year is None:
+        return None, np.zeros((0, 1), dtype=np.uint64)
+    max_year = conn.execute(text("SELECT max(year) FROM tb_checkup WHERE year > 0")).scalar()
+    max_pid = conn.execute(text("SELECT max(patient_id) FROM tb_checkup")).scalar() or 0
+    words = (max_year - min_year) // 64 + 1
+    masks = np.zeros((max_pid + 1, words), dtype=np.uint64)
+
+    # (patient_id, year) 인덱스 순서로 중복 없이 스트리밍
+    result = conn.exec_driver_sql(
+        "SELECT DISTINCT patient_id, year FROM tb_checkup WHERE year > 0 AND patient_id IS NOT NULL"
+    )
+    while rows := result.fetchmany(CHUNK_SIZE):
+        pairs = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows)).reshape(-1, 2)
+        offset = pairs[:, 1] - min_year
+        # (patient_id, year)가 중복 없으므로 연도별로 나누면 patient_id도 중복 없음 -> 단순 인덱싱 OR
+        for o in np.unique(offset):
+            masks[pairs[offset == o, 0], o // 64] |= np.uint64(1) << np.uint64(o % 64)
+    return min_year, masks
+
+def _has_bit(masks, offset):
+    return (masks[:, offset // 64] >> np.uint64(offset % 64)) & np.uint64(1) == 1
+
+def revisit_person_stats(conn):
+    min_year, masks = load_year_masks(conn)
+    counts = popcount(masks).sum(axis=1).astype(np.int64)
+    visited = counts > 0
+
+    # 연속 연도 방문 여부 (워드 경계를 넘는 연속 비트 포함)
+    consecutive = ((masks & (masks >> np.uint64(1))) != 0).any(axis=1)
+    if masks.shape[1] > 1:
+        carry = (masks[:, :-1] >> np.uint64(63)) & masks[:, 1:] & np.uint64(1)
+        consecutive |= (carry != 0).any(axis=1)
+
+    freq = np.bincount(counts[visited])
+    yearly_stats = []
+    if min_year is not None:
+        for offset in range(masks.shape[1] * 64 - 1, -1, -1):
+            curr = _has_bit(masks, offset)
+            total = int(curr.sum())
+            if not total: continue
+            retained = int((curr & _has_bit(masks, offset - 1)).sum()) if offset else 0
+            yearly_stats.append({
+                "year": min_year + offset,
+                "total": total,
+                "retained": retained,
+                "retained_rate": round(retained / total * 100, 1) if total > 0 else 0
+            })
+
+    return {
+        "total_people": int(visited.sum()),
+        "biennial_visitors": int(((counts > 1) & ~consecutive).sum()),
+        "frequency_distribution": {int(n): int(c) for n, c in enumerate(freq) if c},
+        "yearly_retention": yearly_stats
+    }
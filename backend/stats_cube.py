@@ -0,0 +1,113 @@
+# stats_cube.py
+# 대시보드(/api/stats) 집계 큐브: tb_stats_cube (표준 사업장 x 연 x 월 x 검진분류) -> 매출 / 건수
+# - 적재 시: 영향받은 연도만 재계산
+# - 사업장 매핑 변경 시: 영향받은 표준 사업장만 재계산
+# - 분류 규칙 변경 시: 재분류(classifier.reclassify_checkups) 후 전체 재계산
+# - 제외 사업장은 조회 시점에 필터링하므로 재계산 불필요
+import calendar
+import re
+
+from sqlalchemy import select, delete, insert, func
+
+from models import Checkup, CompanyMap, StatsCube
+from classifier import DEFAULT_CATEGORY
+
+NO_COMPANY = ''  # 사업장명이 NULL인 접수의 standard_name (제외 목록이 있으면 SQL NOT IN처럼 함께 제외)
+
+# ---------------------------------------------------------
+# [재계산] 범위(연도 / 표준 사업장)를 지우고 원본에서 다시 집계
+# ---------------------------------------------------------
+def refresh_cube(conn, years=None, names=None):
+    """
+    years: 재계산할 연도 목록 (검진일 불명 행(year=0)은 항상 함께 재계산)
+    names: 재계산할 표준 사업장명 목록
+    둘 다 None이면 전체 재계산
+    """
+    final_name = func.coalesce(CompanyMap.standard_name, Checkup.company_name, NO_COMPANY)
+    year = func.coalesce(Checkup.year, 0)
+    month = func.coalesce(Checkup.month, 0)
+    category = func.coalesce(Checkup.category, DEFAULT_CATEGORY)
+    q = select(
+        final_name, year, month, category,
+        func.sum(Checkup.total_price),
+        func.count(Checkup.receipt_no),
+    ).outerjoin(CompanyMap, Checkup.company_name == CompanyMap.original_name)
+    d = delete(StatsCube)
+
+    if years is not None:
+        years = sorted(set(years) | {0})
+        q = q.where((Checkup.year.in_(years)) | (Checkup.year.is_(None)))
+        d = d.where(StatsCube.year.in_(years))
+    if names is not None:
+        names = sorted(set(names))
+        q = q.where(final_name.in_(names))
+        d = d.where(StatsCube.standard_name.in_(names))
+
+    cells = conn.execute(q.group_by(final_name, year, month, category)).all()
+    conn.execute(d)
+    if cells:
+        conn.execute(insert(StatsCube), [
+            {"standard_name": name, "year": y, "month": m, "category": cat, "rev": rev or 0, "cnt": cnt}
+            for name, y, m, cat, rev, cnt in cells
+        ])
+    return len(cells)
+
+# ---------------------------------------------------------
+# [조회] /api/stats 응답 (YT / MO / CL)
+# ---------------------------------------------------------
+_MONTH_START = re.compile(r'^(\d{4})-(\d{2})-01$')
+_DAY = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+def month_range(start_date, end_date):
+    """
+    큐브로 처리 가능한 기간인지 판단
+    - 기간 조건 없음: ()
+    - 월 단위로 정렬된 기간 (YYYY-MM-01 ~ 해당 월 말일): (YYYYMM, YYYYMM)
+    - 그 외 (일 단위 기간 등): None -> 원본 테이블에서 집계
+    """
+    if not start_date and not end_date:
+        return ()
+    s = _MONTH_START.match(start_date or '')
+    e = _DAY.match(end_date or '')
+    if not s or not e:
+        return None
+    ey, em, ed = int(e.group(1)), int(e.group(2)), int(e.group(3))
+    if not 1 <= em <= 12 or ed != calendar.monthrange(ey, em)[1]:
+        return None
+    return (int(s.group(1)) * 100 + int(s.group(2)), ey * 100 + em)
+
+def dashboard_stats(db, years=None, ym_range=(), excludes=None):
+    def scoped(q):
+        if years: q = q.filter(StatsCube.year.in_(years))
+        if ym_range: q = q.filter((StatsCube.year * 100 + StatsCube.month).between(*ym_range))
+        if excludes: q = q.filter(StatsCube.standard_name.not_in(list(excludes) + [NO_COMPANY]))  # 원본 조회의 excluded = 0과 같음
+        return q
+
+    # (1) YT
+    yt_rows = scoped(db.query(
+        StatsCube.year, func.sum(StatsCube.rev), func.sum(StatsCube.cnt)
+    ).filter(StatsCube.year > 0)).group_by(StatsCube.year).order_by(StatsCube.year).all()
+    YT = {y: {"rev": rev or 0, "cnt": cnt or 0} for y, rev, cnt in yt_rows}
+
+    # (2) MO
+    MO = {y: [0]*12 for y in YT.keys()}
+    mo_rows = scoped(db.query(
+        StatsCube.year, StatsCube.month, func.sum(StatsCube.rev)
+    ).filter(StatsCube.year > 0)).group_by(StatsCube.year, StatsCube.month).all()
+    for y, m, rev in mo_rows:
+        if y not in MO: MO[y] = [0]*12
+        if 1 <= m <= 12: MO[y][m-1] = rev or 0
+
+    # (3) CL
+    cl_rows = scoped(db.query(
+        StatsCube.standard_name, StatsCube.year, func.sum(StatsCube.rev), func.sum(StatsCube.cnt)
+    )).group_by(StatsCube.standard_name, StatsCube.year).order_by(StatsCube.standard_name, StatsCube.year).all()
+    CL = {}
+    for name, year, amt, cnt in cl_rows:
+        name = name or "기타"
+        if name not in CL: CL[name] = {"t": 0, "y": {}, "c": {}}
+        CL[name]["t"] += amt or 0
+        CL[name]["y"][year] = amt or 0
+        CL[name]["c"][year] = cnt or 0
+
+    return {"CL": CL, "MO": MO, "YT": YT}
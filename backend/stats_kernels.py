@@ -0,0 +1,429 @@
+# stats_kernels.py
+# 무거운 통계 계산 함수 (대시보드 / 고객 유지 / 사업장 상세 / 기간 / 개인 재방문)
+# main.py의 API와 workers.py의 프로세스 풀이 공용으로 사용합니다.
+# 워커 프로세스에서 그대로 import 되도록 앱 / DB 초기화 같은 부수 효과 없이 유지합니다.
+# 모든 함수는 첫 인자로 조회용 세션을 받고, 결과는 JSON으로 바로 변환 가능한 dict / list입니다.
+import heapq
+import os
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from models import Checkup, CompanyMap, Patient, CompanyExclude, CompanyDim
+import columnar
+import stats_cube
+from classifier import get_classifier
+from revisit import revisit_person_stats
+
+# 통계 엔진: sql (기본, SQLite 집계) / columnar (인메모리 NumPy 컬럼 저장소, columnar.py)
+STATS_ENGINE = os.environ.get("BIZHEALTH_STATS_ENGINE", "sql").lower()
+
+# ---------------------------------------------------------
+# 대시보드 (/api/stats)
+# ---------------------------------------------------------
+def company_columns(CL):
+    """
+    CL {사업장명: {"t": 합계, "y": {연도: 매출}, "c": {연도: 건수}}} -> 나란한 배열 (사업장 수가 많을 때 응답 크기 절감)
+    {"names": [...], "years": [...], "t": [사업장별], "y": [연도별 [사업장별]], "c": [연도별 [사업장별]]} (해당 연도 기록 없음 = null)
+    """
+    names = list(CL)
+    years = sorted({y for v in CL.values() for y in v["y"]})
+    return {
+        "names": names,
+        "years": years,
+        "t": [CL[n]["t"] for n in names],
+        "y": [[CL[n]["y"].get(y) for n in names] for y in years],
+        "c": [[CL[n]["c"].get(y) for n in names] for y in years],
+    }
+
+def compute_dashboard_stats(db: Session, start_date=None, end_date=None, years=None, exclude_companies=None):
+    company_expr = func.coalesce(CompanyDim.standard_name, Checkup.company_name).label("final_name")
+    
+    # [GLOBAL FILTER] Fetch Excludes from DB
+    db_excludes = [r.company_name for r in db.query(CompanyExclude).all()]
+    if exclude_companies: 
+        db_excludes.extend(exclude_companies)
+
+    if STATS_ENGINE == "columnar":
+        return columnar.get_store(db.connection()).dashboard_stats(start_date, end_date, years, db_excludes)
+
+    # 기간 조건이 없거나 월 단위이면 집계 큐브(tb_stats_cube)에서 바로 응답
+    ym_range = stats_cube.month_range(start_date, end_date)
+    if ym_range is not None:
+        return stats_cube.dashboard_stats(db, years=years, ym_range=ym_range, excludes=db_excludes)
+    
+    def apply_filters(query):
+        if start_date: query = query.filter(Checkup.checkup_date >= start_date)
+        if end_date: query = query.filter(Checkup.checkup_date <= end_date)
+        if years: query = query.filter(Checkup.year.in_(years))
+        if db_excludes: query = query.filter(CompanyDim.excluded == 0)  # 제외 플래그 (NULL 사업장도 제외)
+        if exclude_companies: query = query.filter(company_expr.not_in(exclude_companies))
+        return query
+
+    # (1) YT
+    q_yt = db.query(
+        Checkup.year.label("year"),
+        func.sum(Checkup.total_price).label("rev"),
+        func.count(Checkup.receipt_no).label("cnt")
+    ).outerjoin(CompanyDim, Checkup.company_id == CompanyDim.id)
+    q_yt = apply_filters(q_yt)
+    q_yt = q_yt.group_by("year")
+    yt_results = q_yt.all()
+    YT = {int(r.year): {"rev": r.rev or 0, "cnt": r.cnt or 0} for r in yt_results if r.year}
+
+    # (2) MO
+    # 검진일은 적재/마이그레이션 시 정규화되어 year, month 정수 컬럼으로 저장됨
+    q_mo = db.query(
+        Checkup.year.label("year"),
+        Checkup.month.label("month"),
+        func.sum(Checkup.total_price).label("rev")
+    ).outerjoin(CompanyDim, Checkup.company_id == CompanyDim.id)
+    q_mo = apply_filters(q_mo)
+    q_mo = q_mo.group_by("year", "month")
+    mo_results = q_mo.all()
+    MO = {y: [0]*12 for y in YT.keys()}
+    for r in mo_results:
+        if r.year and r.month:
+            y, m, rev = int(r.year), int(r.month), r.rev or 0
+            if y not in MO: MO[y] = [0]*12
+            if 1 <= m <= 12: MO[y][m-1] = rev
+
+    # (3) CL
+    q_cl = db.query(
+        company_expr.label("name"),
+        Checkup.year.label("year"),
+        func.sum(Checkup.total_price).label("amt"),
+        func.count(Checkup.receipt_no).label("cnt")
+    ).outerjoin(CompanyDim, Checkup.company_id == CompanyDim.id)
+    q_cl = apply_filters(q_cl)
+    q_cl = q_cl.group_by("name", "year")
+    cl_results = q_cl.all()
+    CL = {}
+    for r in cl_results:
+        name = r.name or "기타"
+        year = int(r.year) if r.year else 0
+        amt = r.amt or 0
+        cnt = r.cnt or 0
+        if name not in CL: CL[name] = {"t": 0, "y": {}, "c": {}}
+        CL[name]["t"] += amt
+        CL[name]["y"][year] = amt
+        CL[name]["c"][year] = cnt
+
+    return {"CL": CL, "MO": MO, "YT": YT}
+
+# ---------------------------------------------------------
+# 고객 유지 / 이탈 (/api/stats/retention)
+# ---------------------------------------------------------
+# 상세 목록 정렬 키 (paging.py와 같은 규칙: (정렬값, 사업장명) 오름차순, 내림차순은 음수)
+RETENTION_SORTS = {
+    "new": lambda x: (-x["val"], x["name"]),    # 매출 큰 순
+    "churn": lambda x: (-x["val"], x["name"]),  # 전년 매출 큰 순
+    "up": lambda x: (-x["diff"], x["name"]),    # 증가액 큰 순
+    "down": lambda x: (x["diff"], x["name"]),   # 감소액 큰 순
+    "val": lambda x: (-x["val"], x["name"]),
+    "name": lambda x: (x["name"],),
+}
+
+def revenue_by_year(db: Session, min_y: int, max_y: int):
+    """Query Company Revenue by Year -> full_data[year][name] = revenue"""
+    company_expr = func.coalesce(CompanyDim.standard_name, Checkup.company_name).label("name")
+    
+    q = db.query(
+        Checkup.year.label("year"),
+        company_expr,
+        func.sum(Checkup.total_price).label("rev")
+    ).outerjoin(CompanyDim, Checkup.company_id == CompanyDim.id)\
+     .filter(Checkup.year.between(min_y, max_y))\
+     .group_by(Checkup.year, company_expr)
+     
+    rows = q.all()
+    
+    full_data = {} 
+    for r in rows:
+        y = int(r.year)
+        name = r.name or "미지정"
+        rev = int(r.rev or 0)
+        
+        if y not in full_data: full_data[y] = {}
+        full_data[y][name] = rev
+    return full_data
+
+def compute_retention_stats(db: Session, years):
+    sorted_years = sorted(years)
+    if not sorted_years:
+        return {"waterfall": {}, "details": {}, "years": []}
+
+    # Fetch (Min Year - 1) ~ Max Year to enable calculation for the first selected year
+    min_y = min(sorted_years)
+    max_y = max(sorted_years)
+
+    if STATS_ENGINE == "columnar":
+        full_data = columnar.get_store(db.connection()).revenue_by_year(min_y - 1, max_y)
+    else:
+        full_data = revenue_by_year(db, min_y - 1, max_y)
+        
+    threshold = 5000000 
+    
+    waterfall = {}
+    details = {} 
+    
+    # Calculate Metrics for Selected Years
+    for y in sorted_years:
+        prev_y = y - 1
+        
+        curr_map = full_data.get(y, {})
+        prev_map = full_data.get(prev_y, {})
+        
+        # Valid Companies (Above Threshold)
+        curr_set = {k for k, v in curr_map.items() if v > threshold}
+        prev_set = {k for k, v in prev_map.items() if v > threshold}
+        
+        maintained = list(curr_set & prev_set)
+        
+        # New & Churn with Amounts
+        new_comps = [{"name": c, "val": curr_map[c]} for c in (curr_set - prev_set)]
+        churn_comps = [{"name": c, "val": prev_map[c]} for c in (prev_set - curr_set)]
+        
+        # Revenue Change for Maintained
+        up = []
+        down = []
+        for c in maintained:
+            curr_r = curr_map.get(c, 0)
+            prev_r = prev_map.get(c, 0)
+            if curr_r > prev_r: up.append({"name": c, "diff": curr_r - prev_r, "val": curr_r})
+            elif curr_r < prev_r: down.append({"name": c, "diff": curr_r - prev_r, "val": curr_r})
+            
+        # Sort Lists (동률은 사업장명 순)
+        new_comps.sort(key=RETENTION_SORTS["new"])
+        churn_comps.sort(key=RETENTION_SORTS["churn"])
+        up.sort(key=RETENTION_SORTS["up"])
+        down.sort(key=RETENTION_SORTS["down"])
+        
+        details[y] = {
+            "new": new_comps,
+            "churn": churn_comps,
+            "up": up,
+            "down": down
+        }
+        
+        waterfall[y] = {
+            "new": len(new_comps),
+            "churn": len(churn_comps),
+            "retained": len(maintained)
+        }
+        
+    return {
+        "waterfall": waterfall,
+        "details": details,
+        "years": sorted_years,
+        "stickiness": [], # Legacy
+        "total_users": 0  # Legacy
+    }
+
+# ---------------------------------------------------------
+# 사업장 상세 (/api/company/{name}/stats)
+# ---------------------------------------------------------
+def compute_company_stats(db: Session, name: str, years=None):
+    related_names = [name]
+    mapped = db.query(CompanyMap.original_name).filter(CompanyMap.standard_name == name).all()
+    for m in mapped: related_names.append(m.original_name)
+
+    # 필요한 컬럼만 DB에서 그룹 집계 (검진일 불명 행은 제외)
+    def scoped(q):
+        q = q.filter(Checkup.company_name.in_(related_names)).filter(Checkup.year > 0)
+        if years:
+            q = q.filter(Checkup.year.in_(years))
+        return q
+
+    cY = {}
+    cM = {} 
+    cPkg = {} 
+    cType = {c: 0 for c in get_classifier(db).categories}
+    
+    total_rev = 0
+    total_cnt = 0
+
+    # Annual / Monthly Stats
+    ym_rows = scoped(db.query(
+        Checkup.year, Checkup.month, func.sum(Checkup.total_price), func.count(Checkup.receipt_no)
+    )).group_by(Checkup.year, Checkup.month).order_by(Checkup.year, Checkup.month).all()
+
+    for y, month, amt, cnt in ym_rows:
+        amt = amt or 0
+        m = (month or 0) - 1
+        total_rev += amt
+        total_cnt += cnt
+
+        if y not in cY: cY[y] = {'r': 0, 'c': 0}
+        cY[y]['r'] += amt
+        cY[y]['c'] += cnt
+
+        if y not in cM: cM[y] = {'r': [0]*12, 'c': [0]*12}
+        if 0 <= m < 12: 
+            cM[y]['r'][m] += amt
+            cM[y]['c'][m] += cnt
+
+    # Package Stats (같은 패키지코드 문자열은 한 번만 분리)
+    pkg_rows = scoped(db.query(
+        Checkup.package_code, func.count(Checkup.receipt_no)
+    )).filter(Checkup.package_code.isnot(None)).group_by(Checkup.package_code).all()
+
+    for package_code, cnt in pkg_rows:
+        for p in package_code.split(','):
+            p = p.strip()
+            if p: cPkg[p] = (cPkg.get(p, 0)) + cnt
+
+    # Exam Type Classification (적재 시 분류된 검진분류)
+    type_rows = scoped(db.query(
+        Checkup.category, func.count(Checkup.receipt_no)
+    )).group_by(Checkup.category).all()
+
+    for category, cnt in type_rows:
+        found_key = category or "기타"
+        cType[found_key] = cType.get(found_key, 0) + cnt
+    
+    # Calculate Avg Price per Year
+    for y, d in cY.items():
+        d['avg'] = int(d['r'] / d['c']) if d['c'] > 0 else 0
+
+    # Demographics
+    cDemo = {'20': {'M': 0, 'F': 0}, '30': {'M': 0, 'F': 0}, '40': {'M': 0, 'F': 0}, '50': {'M': 0, 'F': 0}, '60': {'M': 0, 'F': 0}}
+    
+    q_demo = db.query(Checkup.age, Patient.gender, func.count(Checkup.receipt_no))\
+        .join(Patient, Checkup.patient_id == Patient.id)\
+        .filter(Checkup.company_name.in_(related_names))
+    
+    if years: q_demo = q_demo.filter(Checkup.year.in_(years))
+        
+    demo_res = q_demo.group_by(Checkup.age, Patient.gender).all()
+    
+    max_age_group = '-' 
+    
+    for age, sex, cnt in demo_res:
+        if not age: age = 0
+        a_key = '60'
+        if age < 30: a_key = '20'
+        elif age < 40: a_key = '30'
+        elif age < 50: a_key = '40'
+        elif age < 60: a_key = '50'
+        s_key = 'M'
+        if sex and ('여' in sex or 'F' in sex.upper()): s_key = 'F'
+        cDemo[a_key][s_key] += cnt
+
+    age_totals = {k: v['M'] + v['F'] for k, v in cDemo.items()}
+    if age_totals:
+        max_k = max(age_totals, key=age_totals.get)
+        max_age_group = max_k + "대" if age_totals[max_k] > 0 else "-"
+
+    avg_price_total = int(total_rev / total_cnt) if total_cnt > 0 else 0
+
+    return {
+        "summary": {"rev": total_rev, "cnt": total_cnt, "avg_price": avg_price_total, "max_age": max_age_group},
+        "annual": cY,
+        "monthly": cM,
+        "packages": cPkg,
+        "exam_types": cType,
+        "demographics": cDemo
+    }
+
+# ---------------------------------------------------------
+# 기간 분석 (/api/stats/period, /api/stats/periods)
+# ---------------------------------------------------------
+MAX_PERIODS = 12  # 한 번에 비교할 수 있는 기간 수
+BIZ_TOP = 50      # byBiz 기본 응답 사업장 수 (매출순)
+
+def _period_result(rows, categories, biz_limit=BIZ_TOP):
+    """(검진분류, 사업장명, 금액, 건수) 그룹 행 -> total / byType / byBiz (biz_limit=None이면 모든 사업장)"""
+    total_count = 0
+    total_amount = 0
+    by_type = {}
+    by_biz = {}
+    
+    # Initialize buckets (to ensure order in JSON if frontend relies on keys)
+    for name in categories:
+        by_type[name] = {"count": 0, "amount": 0}
+        
+    for category, company_name, amt, cnt in rows:
+        amt = amt or 0
+        total_count += cnt
+        total_amount += amt
+        
+        # Type Aggregation
+        found_key = category or "기타"
+        if found_key not in by_type: by_type[found_key] = {"count": 0, "amount": 0}
+        by_type[found_key]["count"] += cnt
+        by_type[found_key]["amount"] += amt
+        
+        # Company Aggregation
+        c_name = company_name or "미지정"
+        if c_name not in by_biz: by_biz[c_name] = {"count": 0, "amount": 0}
+        by_biz[c_name]["count"] += cnt
+        by_biz[c_name]["amount"] += amt
+        
+    # Sort Biz by amount desc (상위 K개만 heap으로)
+    if biz_limit is not None:
+        by_biz = dict(heapq.nlargest(biz_limit, by_biz.items(), key=lambda item: item[1]['amount']))
+
+    return {
+        "total": {"count": total_count, "amount": total_amount},
+        "byType": by_type,
+        "byBiz": by_biz
+    }
+
+def compute_periods_stats(db: Session, periods, ignore_exclude: bool = False, biz_limit=BIZ_TOP):
+    """
+    여러 기간 [(start_date, end_date), ...]을 쿼리 1회로 집계 -> 기간 순서대로 결과 목록
+    기간마다 따로 그룹한 결과에 기간 번호를 붙여 UNION ALL 하므로 기간이 겹쳐도 각각 정확히 집계됩니다.
+    """
+    # [GLOBAL FILTER] Fetch Excludes from DB
+    db_excludes = [r.company_name for r in db.query(CompanyExclude).all()]
+    categories = get_classifier(db).categories
+
+    if STATS_ENGINE == "columnar":
+        store = columnar.get_store(db.connection())
+        return [store.period_stats(start, end, None if ignore_exclude else db_excludes, categories, biz_limit)
+                for start, end in periods]
+
+    # 1. 기간별 집계 (날짜 인덱스 범위 검색 -> 검진분류 x 사업장 id 그룹)를 기간 번호를 붙여 UNION ALL
+    #    정수 키로 그룹하고 표준 사업장명은 집계 후에 연결 (사업장 없는 행 -> None -> "미지정")
+    per_period = []
+    for i, (start, end) in enumerate(periods):
+        q = select(
+            literal(i).label('window'), Checkup.category, Checkup.company_id,
+            func.sum(Checkup.total_price).label('amount'), func.count(Checkup.receipt_no).label('count')
+        ).where(Checkup.checkup_date.between(start, end))
+        if db_excludes and not ignore_exclude:
+            # 제외 플래그 (사업장 없는 행도 제외)
+            q = q.join(CompanyDim, Checkup.company_id == CompanyDim.id).where(CompanyDim.excluded == 0)
+        per_period.append(q.group_by(Checkup.category, Checkup.company_id))
+    grouped = union_all(*per_period).subquery()
+    result = db.execute(
+        select(grouped.c.window, grouped.c.category, CompanyDim.standard_name, grouped.c.amount, grouped.c.count)
+        .outerjoin(CompanyDim, grouped.c.company_id == CompanyDim.id)
+    ).all()
+
+    # 기존 (검진분류, 사업장명) 그룹 순서 유지 -> 동률 사업장 / 추가 분류의 응답 순서가 단일 기간 쿼리와 같음
+    result.sort(key=lambda r: (r[1] is not None, r[1] or '', r[2] is not None, r[2] or ''))
+    buckets = [[] for _ in periods]
+    for window, category, company_name, amt, cnt in result:
+        buckets[window].append((category, company_name, amt, cnt))
+    return [_period_result(bucket, categories, biz_limit) for bucket in buckets]
+
+def compute_period_stats(db: Session, start_date: str, end_date: str, ignore_exclude: bool = False, biz_limit=BIZ_TOP):
+    return compute_periods_stats(db, [(start_date, end_date)], ignore_exclude, biz_limit)[0]
+
+def _load_columnar_store(db: Session):
+    columnar.get_store(db.connection())
+
+if STATS_ENGINE == "columnar":
+    # 컬럼 저장소는 API 프로세스에 하나만 두고 기간 통계는 요청 스레드에서 계산 (워커마다 전체 적재 방지)
+    # 적재(세대가 바뀐 뒤 첫 요청)는 작업 제한 시간 밖에서 먼저 실행 (workers.py in_process_warmup)
+    compute_periods_stats.in_process_warmup = _load_columnar_store
+    compute_period_stats.in_process_warmup = _load_columnar_store
+
+# ---------------------------------------------------------
+# 개인 재방문 (/api/stats/revisit/person)
+# ---------------------------------------------------------
+def compute_revisit_person_stats(db: Session):
+    # 환자별 방문 연도 비트마스크로 계산 (revisit.py)
+    return revisit_person_stats(db.connection())
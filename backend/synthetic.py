@@ -0,0 +1,216 @@
+# synthetic.py
+# 결정적(seed 고정) 합성 검진 데이터 생성 - init_db.py / 업로드 적재가 읽는 파일 구성 그대로
+#   python synthetic.py --rows 1000000 --out ./synthetic_1m     (csv2021.csv ~ csv2025.csv + code.csv + config.json)
+# 같은 인자면 항상 같은 파일이 만들어지므로 벤치마크(bench_*.py) 결과를 시점별로 비교할 수 있습니다.
+# 실제 원본 파일의 특징을 그대로 넣습니다.
+# - 검진일: YYYYMMDD / YYYY-MM-DD / YYYYMMDD.0 (엑셀 저장 시 실수) / YYYY.MM.DD 혼재, LifeCode도 일부 '.0'
+# - 패키지코드 / 검진항목메모: 쉼표로 이어 붙인 코드 목록
+# - 사업장명: 같은 사업장의 표기 변형("주식회사 ...", "(주) ...", 뒤 공백 등) -> 사업장명 매핑(CompanyMap) 필요
+# - 통계 제외 사업장(개인종합검진 + 일부 사업장), 사업장별 건수 편중(상위 사업장에 몰림), 접수번호 중복 일부
+# 10M 행도 메모리에 올리지 않도록 CHUNK_ROWS 행씩 나눠서 파일에 이어 씁니다.
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+YEARS = (2021, 2022, 2023, 2024, 2025)
+CHUNK_ROWS = 500_000
+N_CODES = 200
+INDIVIDUAL = "개인종합검진"  # 개인 수검자 (운영에서도 통계 제외 대상)
+
+COLUMNS = ['LifeCode', '주민번호', '성명', '성별', '접수번호', '검진일', '패키지', '패키지코드', '발송구분', '비고',
+           '나이', '거래처명', '부서', '검진종류', '검사금액', '본인금액', '회사금액', '공단금액', '검진항목메모']
+CHECKUP_TYPES = np.array(['종합검진', '기업검진', '기업검진,채용', '특수검진', '공단검진', '공단검진,추가',
+                          'VIP종합', '생활습관', '추가검사', ''])
+EXAM_RULES = [  # (분류명, 키워드, 우선순위) - 관리자 화면에서 저장하는 검진분류 규칙 예시
+    ("종합검진", "종합,VIP", 1),
+    ("특수검진", "특수", 2),
+    ("공단검진", "공단", 3),
+    ("기업검진", "기업,채용", 4),
+    ("기타", "", 99),
+]
+DATE_FORMATS = ('ymd', 'iso', 'float', 'dotted')
+DATE_FORMAT_P = (0.45, 0.4, 0.1, 0.05)
+
+# ---------------------------------------------------------
+# [사업장] 표준명 / 표기 변형 / 제외 목록
+# ---------------------------------------------------------
+def company_names(companies, seed=42):
+    """
+    사업장 id -> 표준명, 표기 변형, 제외 목록
+    - 15%의 사업장은 원본 파일에 다른 표기로도 적힘 (변형 -> 표준명 매핑)
+    - 1%의 사업장 + 개인종합검진은 통계 제외
+    """
+    rng = np.random.default_rng([seed, 1])
+    standard = [f"(주)사업장{i:05d}" for i in range(companies)]
+    forms = [lambda i: f"주식회사 사업장{i:05d}", lambda i: f"(주) 사업장{i:05d}",
+             lambda i: f"사업장{i:05d}", lambda i: f"(주)사업장{i:05d} "]
+    variants = {}
+    for i in np.flatnonzero(rng.random(companies) < 0.15):
+        variants[int(i)] = forms[int(rng.integers(len(forms)))](int(i))
+    excluded = sorted(standard[int(i)] for i in np.flatnonzero(rng.random(companies) < 0.01))
+    return standard, variants, [INDIVIDUAL] + excluded
+
+def company_config(companies, seed=42):
+    """/api/config/sync 본문 형식의 매핑 / 제외 목록"""
+    standard, variants, excludes = company_names(companies, seed)
+    maps = [{"original_name": name, "standard_name": standard[i]} for i, name in sorted(variants.items())]
+    return {"maps": maps, "excludes": excludes}
+
+def _company_weights(companies):
+    """상위 사업장에 건수가 몰리는 분포 (순위 r의 비중 ~ 1 / (r + 10))"""
+    w = 1.0 / (np.arange(companies) + 10.0)
+    return w / w.sum()
+
+# ---------------------------------------------------------
+# [검진 내역] CSV 생성
+# ---------------------------------------------------------
+def _format_dates(rng, year, month, day):
+    ymd = year * 10000 + month * 100 + day
+    s = pd.Series(ymd).astype(str)
+    kind = rng.choice(len(DATE_FORMATS), size=len(s), p=DATE_FORMAT_P)
+    out = s.copy()
+    out[kind == 1] = s.str[:4] + '-' + s.str[4:6] + '-' + s.str[6:]
+    out[kind == 2] = s + '.0'
+    out[kind == 3] = s.str[:4] + '.' + s.str[4:6] + '.' + s.str[6:]
+    return out
+
+def _code_lists(rng, codes, rows, low, high):
+    """행마다 low ~ high개의 코드를 쉼표로 이어 붙인 문자열 (0개면 빈 문자열)"""
+    n = rng.integers(low, high + 1, rows)
+    picked = codes[rng.integers(0, len(codes), (rows, high))]
+    out = pd.Series('', index=range(rows))
+    for k in range(1, high + 1):
+        col = pd.Series(picked[:, k - 1])
+        has = n >= k
+        out[has] = col[has] if k == 1 else out[has] + ',' + col[has]
+    return out
+
+def _checkup_chunk(rng, rows, receipt_start, years, patients, standard, variants, weights, individual_p):
+    codes = np.array([f"A{i:03d}" for i in range(N_CODES)])
+    pid = rng.integers(0, patients, rows)
+    year = np.asarray(years)[rng.integers(0, len(years), rows)]
+    month = rng.integers(1, 13, rows)
+    day = rng.integers(1, 29, rows)
+    price = rng.integers(1, 300, rows) * 10000
+
+    receipt = np.arange(receipt_start, receipt_start + rows)
+    dup = np.flatnonzero(rng.random(rows) < 0.001)
+    receipt[dup[dup > 0]] = receipt[dup[dup > 0] - 1]  # 바로 앞 행과 같은 접수번호 (재전송된 행)
+
+    company = rng.choice(len(standard), size=rows, p=weights)
+    names = np.asarray(standard, dtype=object)[company]
+    if variants:
+        has_variant = np.isin(company, list(variants)) & (rng.random(rows) < 0.3)
+        names[has_variant] = [variants[int(c)] for c in company[has_variant]]
+    names[rng.random(rows) < individual_p] = INDIVIDUAL
+
+    life_code = pd.Series(100000 + pid).astype(str)
+    life_code[rng.random(rows) < 0.1] += '.0'
+    return pd.DataFrame({
+        'LifeCode': life_code,
+        '주민번호': pd.Series(pid).map(lambda p: f"{800000 + p % 200000:06d}-{p % 2 + 1}"),
+        '성명': 'N' + pd.Series(pid).astype(str),
+        '성별': np.where(pid % 2 == 0, '남', '여'),
+        '접수번호': pd.Series(receipt).map(lambda i: f"R{i:09d}"),
+        '검진일': _format_dates(rng, year, month, day),
+        '패키지': 'PKG' + pd.Series(rng.integers(1, 20, rows)).astype(str),
+        '패키지코드': _code_lists(rng, codes, rows, 1, 3),
+        '발송구분': np.where(rng.random(rows) < 0.8, '우편', '이메일'),
+        '비고': '',
+        '나이': rng.integers(20, 70, rows),
+        '거래처명': names,
+        '부서': '',
+        '검진종류': CHECKUP_TYPES[rng.integers(0, len(CHECKUP_TYPES), rows)],
+        '검사금액': pd.Series(price).map('{:,}'.format),
+        '본인금액': 0,
+        '회사금액': price,
+        '공단금액': 0,
+        '검진항목메모': _code_lists(rng, codes, rows, 0, 5),
+    }, columns=COLUMNS)
+
+def make_checkup_csv(path, rows, seed=42, companies=3000, receipt_start=0, years=YEARS, patients=None,
+                     individual_p=0.05):
+    """
+    검진 내역 CSV 1개 (rows행, 검진일은 years 안에서 고르게)
+    - patients: 수검자 수 (기본 rows // 3 -> 재방문 수검자 포함)
+    - receipt_start: 접수번호 시작 값 (파일 여러 개를 만들 때 겹치지 않게)
+    """
+    patients = patients or max(rows // 3, 1)
+    standard, variants, _ = company_names(companies, seed)
+    weights = _company_weights(companies)
+    written = 0
+    for chunk_no, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        n = min(CHUNK_ROWS, rows - start)
+        rng = np.random.default_rng([seed, receipt_start, chunk_no])
+        df = _checkup_chunk(rng, n, receipt_start + start, years, patients, standard, variants, weights, individual_p)
+        df.to_csv(path, mode='w' if chunk_no == 0 else 'a', header=chunk_no == 0, index=False)
+        written += n
+    return written
+
+def make_code_csv(path, seed=42):
+    """검사 코드 마스터 (코드, 명칭, 검진종류) - init_db.py load_codes 형식"""
+    rng = np.random.default_rng([seed, 2])
+    kinds = np.array(['혈액', '영상', '내시경', '기능', '기타'])
+    pd.DataFrame({
+        '코드': [f"A{i:03d}" for i in range(N_CODES)],
+        '명칭': [f"검사{i:03d}" for i in range(N_CODES)],
+        '검진종류': kinds[rng.integers(0, len(kinds), N_CODES)],
+    }).to_csv(path, index=False)
+
+def make_dataset(directory, rows, seed=42, companies=None, years=YEARS):
+    """
+    연도별 csv{연도}.csv + code.csv + config.json(사업장 매핑 / 제외 목록)
+    companies 기본값은 규모에 맞게 rows / 300 (최소 100, 최대 30,000)
+    -> {"files": [...], "code_csv": ..., "config": {...}, "rows": ..., "companies": ...}
+    """
+    os.makedirs(directory, exist_ok=True)
+    companies = companies or int(min(max(rows // 300, 100), 30000))
+    patients = max(rows // 3, 1)
+    files, start = [], 0
+    for i, year in enumerate(years):
+        n = rows // len(years) + (1 if i < rows % len(years) else 0)
+        path = os.path.join(directory, f"csv{year}.csv")
+        make_checkup_csv(path, n, seed=seed, companies=companies, receipt_start=start, years=(year,), patients=patients)
+        files.append(path)
+        start += n
+    code_csv = os.path.join(directory, "code.csv")
+    make_code_csv(code_csv, seed)
+    config = company_config(companies, seed)
+    with open(os.path.join(directory, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=1)
+    return {"files": files, "code_csv": code_csv, "config": config, "rows": rows, "companies": companies}
+
+# ---------------------------------------------------------
+# [설정] 사업장 매핑 / 제외 / 검진분류 규칙 등록 (적재 전에 넣으면 적재 시 바로 반영)
+# ---------------------------------------------------------
+def apply_config(engine, config, rules=EXAM_RULES):
+    from sqlalchemy.orm import Session
+    from models import CompanyMap, CompanyExclude, ExamRule
+    from company_dim import resolve_company_dim
+
+    with Session(engine) as db:
+        db.query(CompanyMap).delete()
+        db.query(CompanyExclude).delete()
+        db.add_all(CompanyMap(original_name=m["original_name"], standard_name=m["standard_name"]) for m in config["maps"])
+        db.add_all(CompanyExclude(company_name=name) for name in config["excludes"])
+        if rules is not None:
+            db.query(ExamRule).delete()
+            db.add_all(ExamRule(category_name=n, keywords=k, priority=p) for n, k, p in rules)
+        db.flush()
+        resolve_company_dim(db.connection())
+        db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000, help='전체 검진 건수 (연도별 파일로 나눔)')
+    parser.add_argument('--out', default='synthetic_data', help='출력 폴더')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--companies', type=int, default=None, help='사업장 수 (기본: 규모에 맞게 자동)')
+    args = parser.parse_args()
+
+    spec = make_dataset(args.out, args.rows, seed=args.seed, companies=args.companies)
+    print(f"✅ {spec['rows']:,}행 / 사업장 {spec['companies']:,}곳 -> {args.out} "
+          f"(매핑 {len(spec['config']['maps'])}건, 제외 {len(spec['config']['excludes'])}건)")
@@ -0,0 +1,48 @@
+# test_cache.py
+# cache.py ETag / If-None-Match 단위 테스트 (pytest - 서버 / DB 불필요)
+import pytest
+from starlette.requests import Request
+
+import cache
+from cache import _encode, _respond, etag_matches
+
+def request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/api/stats", "query_string": b"",
+                    "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),                   # 약한 비교
+    ('"x", "abc"', True),                # 목록
+    ('"x",W/"abc" ', True),
+    ('*', True),
+    ('"ab"', False),                     # 부분 문자열은 일치 아님
+    ('"abc-gzip"', False),
+    ('"abcd", "zabc"', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches('"abc"', header) is matches
+
+@pytest.fixture
+def entry(monkeypatch):
+    monkeypatch.setattr(cache, "GZIP_MIN_SIZE", 16)
+    return _encode({"rows": list(range(100))})
+
+def test_etag_differs_per_encoding(entry):
+    plain = _respond(request(), entry)
+    gzipped = _respond(request(accept_encoding="gzip, br"), entry)
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    assert plain.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+
+def test_not_modified_only_for_same_encoding(entry):
+    plain_tag = _respond(request(), entry).headers["etag"]
+    gzip_tag = _respond(request(accept_encoding="gzip"), entry).headers["etag"]
+
+    assert _respond(request(if_none_match=plain_tag), entry).status_code == 304
+    assert _respond(request(accept_encoding="gzip", if_none_match=f'"old", W/{gzip_tag}'), entry).status_code == 304
+    # 다른 인코딩의 ETag로는 304가 아님 (압축 안 된 클라이언트에 gzip 본문 캐시를 재사용하지 않도록)
+    assert _respond(request(if_none_match=gzip_tag), entry).status_code == 200
+    assert _respond(request(accept_encoding="gzip", if_none_match=plain_tag), entry).status_code == 200
@@ -0,0 +1,94 @@
+# test_classifier.py
+# classifier.py 단위 테스트 (pytest, 임시 SQLite DB - 서버 불필요)
+# 정규식 alternation + 규칙 번호 표(ExamClassifier)가 기존 방식(우선순위 순으로 규칙을 돌며 키워드 포함 검사)과 같은지 확인
+import random
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from models import Base
+from classifier import DEFAULT_CATEGORY, ExamClassifier, get_classifier, load_rules
+
+def legacy_classify(rules, checkup_type):
+    """기존 main.py의 분류 루프 (rules: 우선순위 순 [(분류명, 키워드 문자열)])"""
+    c_type = (checkup_type or "").strip()
+    found_key = "기타"
+    if c_type:
+        for category_name, keywords in rules:
+            keywords = [k.strip() for k in keywords.split(',') if k.strip()]
+            if any(k in c_type for k in keywords):
+                found_key = category_name
+                break
+    return found_key
+
+def parsed(rules):
+    return [(name, [k.strip() for k in keywords.split(',') if k.strip()]) for name, keywords in rules]
+
+RULES = [
+    ("특수검진", "특수,  야간 ,"),     # 공백 / 빈 키워드
+    ("종합검진", "종합, 특수종합"),     # "특수종합"은 앞 규칙의 "특수"에 먼저 걸림
+    ("채용검진", "채용,종합채용"),      # "종합채용"은 앞 규칙의 "종합"에 먼저 걸림
+    ("공단검진", "공단,특수"),          # 같은 키워드 -> 앞선 규칙
+    ("기업검진", " 기업 ,,,"),
+    ("빈규칙", ""),                    # 키워드 없음 -> 걸리지 않음
+]
+
+@pytest.mark.parametrize("checkup_type, expected", [
+    ("종합검진", "종합검진"),
+    ("기업검진,채용", "채용검진"),     # 앞선 규칙(채용)이 뒤에 나와도 우선
+    ("채용 기업", "채용검진"),
+    ("VIP종합특수", "특수검진"),       # 문자열 안의 위치와 무관하게 우선순위
+    ("특수종합", "특수검진"),
+    ("종합채용", "종합검진"),
+    ("공단검진", "공단검진"),
+    ("야간", "특수검진"),              # 앞뒤 공백이 제거된 키워드
+    (" 기업 ", "기업검진"),            # 입력 앞뒤 공백 제거
+    ("생활습관", "기타"),              # 아무 키워드도 없음
+    ("", "기타"),                      # 빈 값 / None -> 기타
+    ("   ", "기타"),
+    (None, "기타"),
+    ("빈규칙", "기타"),
+])
+def test_table(checkup_type, expected):
+    clf = ExamClassifier(parsed(RULES))
+    assert legacy_classify(RULES, checkup_type) == expected
+    assert clf.classify(checkup_type) == expected
+    assert clf.classify(checkup_type) == expected  # 메모이즈된 결과
+
+def test_matches_legacy_loop_on_random_rules():
+    rnd = random.Random(7)
+    alphabet = "가나다라마"
+    for _ in range(200):
+        rules = []
+        for i in range(rnd.randint(1, 6)):
+            words = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 3))) for _ in range(rnd.randint(0, 4))]
+            rules.append((f"규칙{i}", ", ".join(words) + rnd.choice(["", ",", " , "])))
+        clf = ExamClassifier(parsed(rules))
+        for _ in range(50):
+            c_type = "".join(rnd.choice(alphabet + " ,") for _ in range(rnd.randint(0, 8)))
+            assert clf.classify(c_type) == legacy_classify(rules, c_type), (rules, c_type)
+
+def test_default_category_always_listed():
+    assert ExamClassifier(parsed([("종합검진", "종합")])).categories == ["종합검진", DEFAULT_CATEGORY]
+    assert ExamClassifier(parsed([("기타", ""), ("종합검진", "종합")])).categories == ["기타", "종합검진"]
+    assert ExamClassifier([]).classify("종합") == DEFAULT_CATEGORY
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        yield conn
+
+def test_load_rules_order_and_keywords(conn):
+    assert get_classifier(conn).classify("VIP종합") == "종합검진"  # 규칙 테이블이 비면 기본 규칙
+    conn.execute(text("INSERT INTO tb_exam_rule (category_name, keywords, priority) VALUES (:n, :k, :p)"), [
+        {"n": "종합검진", "k": " 종합 ,, 정밀", "p": 2},
+        {"n": "특수검진", "k": "특수", "p": 1},
+        {"n": "기타", "k": None, "p": 99},
+    ])
+    assert load_rules(conn) == [("특수검진", ["특수"]), ("종합검진", ["종합", "정밀"]), ("기타", [])]
+    clf = get_classifier(conn)
+    assert clf.classify("종합특수") == "특수검진"
+    assert clf.classify("정밀") == "종합검진"
+    assert get_classifier(conn) is clf  # 규칙이 같으면 재사용
@@ -0,0 +1,89 @@
+# test_company_dim.py
+# company_dim.sync_company_config 단위 테스트 (pytest, 임시 SQLite DB - 서버 불필요)
+# - 이름 변경 / 삭제 / 변경 없음: 변경 내역, 사업장 차원, 부분 재계산한 집계 큐브 = 전체 재계산 결과
+import pytest
+from sqlalchemy import create_engine, text
+
+from models import Base
+from company_dim import assign_company_ids, resolve_company_dim, sync_company_config
+from stats_cube import refresh_cube
+
+CHECKUPS = [
+    # (접수번호, 사업장, 연, 월, 금액)
+    ("R1", "A", 2024, 1, 100), ("R2", "(주)A", 2024, 1, 200), ("R3", "(주)A", 2025, 3, 300),
+    ("R4", "B", 2024, 2, 400), ("R5", "C", 2025, 5, 500), ("R6", "D", 2024, 7, 600),
+]
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        ids = assign_company_ids(conn, [c for _, c, _, _, _ in CHECKUPS])
+        conn.execute(text(
+            "INSERT INTO tb_checkup (receipt_no, company_name, company_id, year, month, total_price, category) "
+            "VALUES (:r, :c, :i, :y, :m, :p, '종합검진')"
+        ), [{"r": r, "c": c, "i": ids[c], "y": y, "m": m, "p": p} for r, c, y, m, p in CHECKUPS])
+        apply(conn, {"(주)A": "A"}, ["C"])
+        refresh_cube(conn)
+        yield conn
+
+def apply(conn, maps, excludes):
+    """/api/config/sync와 같은 순서: 차이 반영 -> 사업장 차원 -> 영향받은 표준 사업장만 큐브 재계산"""
+    changes = sync_company_config(conn, maps, excludes)
+    if changes["mapped_names"] or changes["excluded_names"]:
+        resolve_company_dim(conn)
+    if changes["mapped_names"]:
+        refresh_cube(conn, names=changes["mapped_names"])
+    return changes
+
+def cube(conn):
+    return sorted(conn.execute(text(
+        "SELECT standard_name, year, month, category, rev, cnt FROM tb_stats_cube")).all())
+
+def assert_cube_matches_full_refresh(conn):
+    partial = cube(conn)
+    refresh_cube(conn)
+    assert partial == cube(conn)
+
+def dim(conn):
+    return {o: (s, e) for o, s, e in conn.execute(text(
+        "SELECT original_name, standard_name, excluded FROM tb_company_dim"))}
+
+def test_rename(conn):
+    changes = apply(conn, {"(주)A": "A그룹", "B": "A그룹"}, ["C", "A그룹"])
+
+    assert changes["maps"] == {"added": ["B"], "updated": ["(주)A"], "removed": []}
+    assert changes["excludes"] == {"added": ["A그룹"], "removed": []}
+    assert changes["mapped_names"] == ["A", "A그룹", "B"]
+    assert changes["excluded_names"] == ["A그룹"]
+    assert dim(conn) == {"A": ("A", 0), "(주)A": ("A그룹", 1), "B": ("A그룹", 1), "C": ("C", 1), "D": ("D", 0)}
+    assert {r[0] for r in cube(conn)} == {"A", "A그룹", "C", "D"}
+    assert_cube_matches_full_refresh(conn)
+
+def test_removal(conn):
+    changes = apply(conn, {}, [])
+
+    assert changes["maps"] == {"added": [], "updated": [], "removed": ["(주)A"]}
+    assert changes["excludes"] == {"added": [], "removed": ["C"]}
+    assert changes["mapped_names"] == ["(주)A", "A"]
+    assert conn.execute(text("SELECT count(*) FROM tb_company_map")).scalar() == 0
+    assert conn.execute(text("SELECT count(*) FROM tb_company_exclude")).scalar() == 0
+    assert all(s == o and e == 0 for o, (s, e) in dim(conn).items())
+    assert_cube_matches_full_refresh(conn)
+
+def test_noop_sync_writes_nothing(conn):
+    before_dim, before_cube = dim(conn), cube(conn)
+    driver = conn.connection.dbapi_connection
+    writes = driver.total_changes
+
+    changes = sync_company_config(conn, {"(주)A": "A"}, ["C", "C"])
+
+    assert changes == {
+        "maps": {"added": [], "updated": [], "removed": []},
+        "excludes": {"added": [], "removed": []},
+        "mapped_names": [],
+        "excluded_names": [],
+    }
+    assert driver.total_changes == writes
+    assert dim(conn) == before_dim and cube(conn) == before_cube
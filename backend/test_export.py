@@ -0,0 +1,99 @@
+# test_export.py
+# export.py 스트리밍 단위 테스트 (pytest, 임시 SQLite DB - 서버 불필요)
+# - CSV: BOM은 헤더 조각에만, 여러 배치를 이어 붙이면 원래 행
+# - Parquet (pyarrow 있을 때만): 빈 결과 / 여러 배치(row group) 결과를 pq.read_table로 다시 읽기
+import csv
+import io
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+from company_dim import assign_company_ids, resolve_company_dim, sync_company_config
+import export
+
+BOM = "\ufeff".encode("utf-8")
+CHECKUPS = [
+    # (접수번호, 사업장, 검진일, 금액)
+    ("R1", "가나상사", "2024-01-05", 100), ("R2", "(주)가나상사", "2024-02-01", 200), ("R3", "가나상사", "2025-03-09", 300),
+    ("R4", "다라전자", "2024-04-20", 400), ("R5", "다라전자", "2024-05-05", 500), ("R6", "제외회사", "2024-06-07", 600),
+    ("R7", None, "2024-07-07", 700), ("R8", "마바, \"따옴표\"", "2024-08-31", 800),
+]
+
+@pytest.fixture(autouse=True)
+def read_db(tmp_path, monkeypatch):
+    """export._batches가 여는 읽기 세션을 임시 DB로 (배치 2행)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        ids = assign_company_ids(conn, [c for _, c, _, _ in CHECKUPS if c])
+        conn.execute(text(
+            "INSERT INTO tb_checkup (receipt_no, company_name, company_id, checkup_date, year, month, total_price, category) "
+            "VALUES (:r, :c, :i, :d, :y, :m, :p, '종합검진')"
+        ), [{"r": r, "c": c, "i": ids.get(c), "d": d, "y": int(d[:4]), "m": int(d[5:7]), "p": p} for r, c, d, p in CHECKUPS])
+        sync_company_config(conn, {"(주)가나상사": "가나상사"}, ["제외회사"])
+        resolve_company_dim(conn)
+    monkeypatch.setattr(export, "ReadSessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(export, "BATCH_ROWS", 2)
+    yield
+    engine.dispose()
+
+def receipts(filters):
+    """같은 필터로 고른 접수번호 (스트리밍 없이 한 번에)"""
+    db = export.ReadSessionLocal()
+    try:
+        return [row.receipt_no for row in db.execute(export.export_query(db, **filters))]
+    finally:
+        db.close()
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, ["R1", "R2", "R3", "R4", "R5", "R8"]),                 # 제외 목록 적용 (NULL 사업장도 제외)
+    ({"ignore_exclude": True}, [r for r, _, _, _ in CHECKUPS]),
+    ({"companies": ["가나상사"], "years": [2024]}, ["R1", "R2"]),   # 매핑된 원본명 포함
+    ({"years": [1999]}, []),
+])
+def test_csv_bom_only_on_header_chunk(filters, expected):
+    assert sorted(receipts(filters)) == expected
+    chunks = list(export.stream_csv(filters))
+    assert len(chunks) == 1 + (len(expected) + 1) // 2  # 헤더 + 배치마다 한 조각
+    assert chunks[0].startswith(BOM)
+    assert not any(BOM in chunk for chunk in chunks[1:])
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode(export.CSV_ENCODING))))
+    assert rows[0] == export.NAMES
+    by_receipt = {row[0]: dict(zip(export.NAMES, row)) for row in rows[1:]}
+    assert sorted(by_receipt) == expected
+    for r, c, d, p in CHECKUPS:
+        if r in by_receipt:
+            assert by_receipt[r]["company_name"] == (c or "")
+            assert by_receipt[r]["checkup_date"] == d and by_receipt[r]["total_price"] == str(p)
+    if "R2" in by_receipt:
+        assert by_receipt["R2"]["standard_name"] == "가나상사"
+
+def read_parquet(filters):
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = list(export.stream_parquet(filters))
+    return pq.read_table(io.BytesIO(b"".join(chunks))), pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+
+def test_parquet_empty_result():
+    table, file = read_parquet({"years": [1999]})
+    assert table.num_rows == 0
+    assert table.column_names == export.NAMES
+    assert file.metadata.num_row_groups == 0
+
+def test_parquet_multi_batch_round_trip():
+    filters = {"ignore_exclude": True}
+    table, file = read_parquet(filters)
+    assert file.metadata.num_row_groups == (len(CHECKUPS) + 1) // 2  # 배치 하나 = row group 하나
+    assert table.column_names == export.NAMES
+    assert str(table.schema.field("total_price").type) == "int64"
+    assert str(table.schema.field("year").type) == "int32"
+
+    rows = {row["receipt_no"]: row for row in table.to_pylist()}
+    assert sorted(rows) == sorted(receipts(filters))
+    for r, c, d, p in CHECKUPS:
+        assert rows[r]["company_name"] == c
+        assert rows[r]["checkup_date"] == d and rows[r]["total_price"] == p and rows[r]["year"] == int(d[:4])
+    assert rows["R2"]["standard_name"] == "가나상사"
+    assert rows["R7"]["standard_name"] is None
@@ -0,0 +1,135 @@
+# test_item_codes.py
+# item_codes.py 단위 테스트 (pytest, 임시 SQLite DB - 서버 불필요)
+# - 컨테이너 인코딩 왕복 (배열 / 비트맵), 코드별 접수 목록 교집합 = 접수별 코드 배열 기준 결과
+# - convert_detail_table: 기존 tb_checkup_detail과 같은 (접수, 코드) 쌍
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from models import Base
+from item_codes import (ARRAY_MAX, BITMAP_BYTES, CHUNK_SIZE, ITEMS, LEGACY_DETAIL, codes_of_receipt,
+                        convert_detail_table, decode_container, encode_container, item_ids_with_code,
+                        receipts_with_code, unpack_codes, write_item_codes)
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        yield conn
+
+def pairs_of(conn):
+    """압축 테이블 -> {(접수번호, 코드)} (접수별 코드 배열 기준)"""
+    names = dict(conn.execute(text("SELECT id, code FROM tb_code_dict")).all())
+    return {(receipt, names[int(i)])
+            for receipt, blob in conn.execute(text(f"SELECT receipt_no, codes FROM {ITEMS}"))
+            for i in unpack_codes(blob)}
+
+def assert_postings_match(conn, codes):
+    """코드별 접수 목록 = 접수별 코드 배열에서 뒤집은 목록"""
+    names = dict(conn.execute(text("SELECT id, code FROM tb_code_dict")).all())
+    expected = {code: set() for code in codes}
+    for item_id, blob in conn.execute(text(f"SELECT id, codes FROM {ITEMS}")):
+        for i in unpack_codes(blob):
+            expected.setdefault(names[int(i)], set()).add(item_id)
+    for code, ids in expected.items():
+        assert item_ids_with_code(conn, code).tolist() == sorted(ids)
+
+# ---------------------------------------------------------
+# [형식] 배열 / 비트맵 컨테이너
+# ---------------------------------------------------------
+@pytest.mark.parametrize("n, size", [
+    (0, 0),
+    (1, 2),
+    (ARRAY_MAX - 1, (ARRAY_MAX - 1) * 2),  # 배열 최대
+    (ARRAY_MAX, BITMAP_BYTES),             # 여기부터 비트맵
+    (CHUNK_SIZE, BITMAP_BYTES),            # 구간 전체
+])
+def test_container_round_trip(n, size):
+    rng = np.random.default_rng(n)
+    lows = np.sort(rng.choice(CHUNK_SIZE, size=n, replace=False)).astype(np.uint16)
+    blob = encode_container(lows)
+    assert len(blob) == size
+    decoded = decode_container(blob)
+    assert decoded.dtype == np.uint16
+    assert decoded.tolist() == lows.tolist()
+
+def test_container_edges():
+    for lows in ([0], [CHUNK_SIZE - 1], [0, CHUNK_SIZE - 1] + list(range(1, ARRAY_MAX))):
+        lows = sorted(lows)
+        assert decode_container(encode_container(lows)).tolist() == lows
+
+# ---------------------------------------------------------
+# [적재 / 조회] 코드별 접수 목록 교집합
+# ---------------------------------------------------------
+def _details(receipt_codes):
+    return pd.DataFrame([(r, c) for r, codes in receipt_codes.items() for c in codes],
+                        columns=['receipt_no', 'medical_code'])
+
+@pytest.mark.parametrize("receipts", [300, 3 * CHUNK_SIZE // 2])  # 배열만 / 비트맵 + 두 번째 구간
+def test_posting_intersection(conn, receipts):
+    rng = np.random.default_rng(receipts)
+    codes = ["A", "B", "C", "D"]
+    share = {"A": 0.9, "B": 0.5, "C": 0.05, "D": 0.001}  # 비트맵 / 배열 컨테이너가 섞이도록
+    receipt_codes = {f"R{k:06d}": [c for c in codes if rng.random() < share[c]] for k in range(receipts)}
+    write_item_codes(conn, _details(receipt_codes))
+
+    sizes = {len(r[0]) for r in conn.execute(text("SELECT bits FROM tb_code_posting"))}
+    if receipts > CHUNK_SIZE:
+        assert BITMAP_BYTES in sizes and any(s < BITMAP_BYTES for s in sizes)
+        assert conn.execute(text("SELECT max(chunk) FROM tb_code_posting")).scalar() == 1
+    assert_postings_match(conn, codes)
+
+    ids = dict(conn.execute(text(f"SELECT receipt_no, id FROM {ITEMS}")).all())
+    for a, b in [("A", "B"), ("A", "C"), ("B", "D"), ("C", "D")]:
+        both = np.intersect1d(item_ids_with_code(conn, a), item_ids_with_code(conn, b))
+        expected = sorted(ids[r] for r, cs in receipt_codes.items() if a in cs and b in cs)
+        assert both.tolist() == expected
+
+    receipt = next(r for r, cs in receipt_codes.items() if cs)
+    assert codes_of_receipt(conn, receipt) == sorted(receipt_codes[receipt])
+    page, total = receipts_with_code(conn, "C", limit=5, offset=2)
+    with_c = [r for r, cs in receipt_codes.items() if "C" in cs]
+    assert total == len(with_c) and page == with_c[2:7]
+
+def test_upsert_replaces_codes(conn):
+    write_item_codes(conn, _details({"R1": ["A", "B"], "R2": ["B"], "R3": ["C"]}))
+    conn.execute(text("CREATE TEMP TABLE _ingest_receipt (receipt_no TEXT PRIMARY KEY)"))
+    conn.execute(text("INSERT INTO _ingest_receipt VALUES ('R1'), ('R3'), ('R4')"))
+    write_item_codes(conn, _details({"R1": ["C"], "R4": ["A"]}), replace=True)
+
+    assert pairs_of(conn) == {("R1", "C"), ("R2", "B"), ("R4", "A")}
+    assert_postings_match(conn, ["A", "B", "C"])
+    ids = dict(conn.execute(text(f"SELECT receipt_no, id FROM {ITEMS}")).all())
+    assert ids["R1"] == 1 and ids["R4"] == 4  # 같은 접수는 id 유지, 새 접수는 최대 id 뒤에
+
+# ---------------------------------------------------------
+# [변환] tb_checkup_detail -> 압축 테이블
+# ---------------------------------------------------------
+LEGACY_ROWS = [
+    ("R1", "A"), ("R1", " B "), ("R1", "A"),  # 중복 / 앞뒤 공백
+    ("R2", ""), ("R2", "   "),                # 코드 없는 접수 -> 기록 안 함
+    ("R3", "C"), ("R3", "M1"),
+    ("R4", "B"),
+    ("R1", "C"),                              # 떨어져 저장된 같은 접수 -> 기존 행과 합침
+    ("R5", "Z9"),                             # 코드 마스터에 없는 코드
+]
+
+def test_convert_detail_table_matches_legacy(conn, monkeypatch):
+    conn.execute(text("INSERT INTO tb_medical_code (code, name) VALUES ('M1', '마스터'), ('A', '검사A')"))
+    conn.execute(text(f"CREATE TABLE {LEGACY_DETAIL} (id INTEGER PRIMARY KEY, receipt_no TEXT, medical_code TEXT)"))
+    conn.exec_driver_sql(f"INSERT INTO {LEGACY_DETAIL} (receipt_no, medical_code) VALUES (?, ?)", LEGACY_ROWS)
+    legacy = {(r, c) for r, c in conn.execute(text(
+        f"SELECT receipt_no, trim(medical_code) FROM {LEGACY_DETAIL} WHERE trim(medical_code) <> ''"))}
+
+    monkeypatch.setattr("item_codes.CONVERT_ROWS", 3)  # 읽기 묶음 경계에 걸친 접수도 확인
+    convert_detail_table(conn)
+
+    assert pairs_of(conn) == legacy
+    assert conn.execute(text(f"SELECT count(*) FROM {ITEMS} WHERE receipt_no = 'R2'")).scalar() == 0
+    assert not conn.execute(text(
+        f"SELECT 1 FROM sqlite_master WHERE name = '{LEGACY_DETAIL}'")).first()
+    assert_postings_match(conn, ["A", "B", "C", "M1", "Z9"])
+    for receipt in ("R1", "R3", "R4", "R5"):
+        assert codes_of_receipt(conn, receipt) == sorted(c for r, c in legacy if r == receipt)
@@ -0,0 +1,76 @@
+# test_jobs.py
+# jobs.py 단위 테스트 (pytest - 서버 / DB 불필요)
+# - 업로드 중 오류 시 임시 파일 삭제 (defer 여부와 무관)
+# - 서버 종료 시 대기 중인 작업: 실패로 표시 + 임시 파일 삭제 / 시작 시 남은 *.part 정리
+import asyncio
+import os
+import threading
+
+import pytest
+
+from jobs import JobManager, save_upload, sweep_partial_uploads
+
+class FakeUpload:
+    """UploadFile 대신: chunks를 차례로 돌려주고, 다 읽으면 fail이 있으면 예외"""
+    def __init__(self, chunks, fail=None):
+        self.chunks = list(chunks)
+        self.fail = fail
+
+    async def read(self, size):
+        if self.chunks:
+            return self.chunks.pop(0)
+        if self.fail:
+            raise self.fail
+        return b''
+
+def leftovers(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.part'))
+
+@pytest.mark.parametrize("defer", [False, True])
+def test_save_upload_success(tmp_path, defer):
+    path = str(tmp_path / "csv2024.csv")
+    digest, size, saved = asyncio.run(save_upload(FakeUpload([b"a,b\n", b"1,2\n"]), path, defer=defer))
+    assert size == 8
+    assert (saved == path) is not defer
+    assert open(saved, 'rb').read() == b"a,b\n1,2\n"
+    assert os.path.exists(path) is not defer
+
+@pytest.mark.parametrize("defer", [False, True])
+def test_save_upload_error_removes_partial(tmp_path, defer):
+    path = str(tmp_path / "csv2024.csv")
+    with pytest.raises(OSError):
+        asyncio.run(save_upload(FakeUpload([b"a,b\n"], fail=OSError(28, "No space left on device")), path, defer=defer))
+    assert leftovers(tmp_path) == []
+    assert not os.path.exists(path)
+
+def test_shutdown_fails_queued_jobs_and_removes_staged(tmp_path):
+    manager = JobManager()
+    started, release = threading.Event(), threading.Event()
+
+    def blocked_run(job):  # 첫 작업이 오래 걸리는 상황
+        job.status = 'running'
+        started.set()
+        release.wait(10)
+        job.status = 'done'
+    manager._run = blocked_run
+
+    staged = tmp_path / "csv2025.csv.1234abcd.part"
+    staged.write_bytes(b"x")
+    first = manager.submit(str(tmp_path / "csv2024.csv"), "h1")
+    assert started.wait(10)
+    second = manager.submit(str(tmp_path / "csv2025.csv"), "h2", staged=str(staged))
+
+    manager.shutdown()
+    assert second.status == 'failed' and second.error
+    assert second.staged is None and not staged.exists()
+    assert first.status == 'running'  # 실행 중인 작업은 그대로 진행
+    release.set()
+    first.future.result(10)
+    assert first.status == 'done'
+
+def test_sweep_partial_uploads(tmp_path):
+    for name in ("csv2024.csv.1234abcd.part", "code.csv.part", "csv2024.csv", "healthcare.db"):
+        (tmp_path / name).write_bytes(b"x")
+    removed = sweep_partial_uploads(str(tmp_path))
+    assert [os.path.basename(p) for p in removed] == ["code.csv.part", "csv2024.csv.1234abcd.part"]
+    assert sorted(os.listdir(tmp_path)) == ["csv2024.csv", "healthcare.db"]
@@ -0,0 +1,106 @@
+# test_paging.py
+# paging.py 단위 테스트 (pytest - 서버 / DB 불필요)
+# - 동률 정렬 키, 잘못된 / 지난 cursor (400), offset + cursor
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from paging import decode_cursor, encode_cursor, is_paged, paginate
+
+# (사업장명, 매출) - 매출 동률이 많도록
+ITEMS = [(f"회사{i:02d}", [300, 100, 100, 200, 100][i % 5]) for i in range(23)]
+BY_REV = lambda item: (-item[1], item[0])
+BY_NAME = lambda item: (item[0],)
+
+def walk(items, key, limit, offset=0):
+    """cursor로 끝까지 넘기며 모은 항목 + 페이지 정보 목록"""
+    seen, infos, cursor = [], [], None
+    while True:
+        page, info = paginate(items, key, limit, offset if cursor is None else 0, cursor)
+        seen += page
+        infos.append(info)
+        cursor = info["next_cursor"]
+        if cursor is None:
+            return seen, infos
+
+def raw_cursor(payload: bytes):
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 7, 23, 50])
+def test_ties_cursor_walk_matches_full_sort(limit):
+    seen, infos = walk(ITEMS, BY_REV, limit)
+    assert seen == sorted(ITEMS, key=BY_REV)  # 동률 사이에서 빠지거나 겹치는 항목 없음
+    assert [info["offset"] for info in infos] == list(range(0, len(ITEMS), limit))
+    assert all(info["total"] == len(ITEMS) for info in infos)
+
+@pytest.mark.parametrize("limit", [1, 4, 9])
+def test_ties_offset_pages_match_cursor_pages(limit):
+    by_offset = []
+    for offset in range(0, len(ITEMS), limit):
+        page, info = paginate(ITEMS, BY_REV, limit, offset)
+        assert info["offset"] == offset
+        by_offset += page
+    assert by_offset == walk(ITEMS, BY_REV, limit)[0]
+
+def test_last_page_has_no_cursor():
+    page, info = paginate(ITEMS, BY_REV, limit=len(ITEMS))
+    assert len(page) == len(ITEMS) and info["next_cursor"] is None
+    page, info = paginate(ITEMS, BY_REV, limit=5, offset=100)
+    assert page == [] and info["next_cursor"] is None
+    page, info = paginate([], BY_REV, limit=5)
+    assert page == [] and info == {"total": 0, "offset": 0, "limit": 5, "next_cursor": None}
+
+def test_offset_with_cursor_uses_cursor():
+    """cursor가 있으면 offset은 무시 (응답의 offset은 cursor 앞 항목 수)"""
+    first, info = paginate(ITEMS, BY_REV, limit=4)
+    page, info2 = paginate(ITEMS, BY_REV, limit=4, offset=10, cursor=info["next_cursor"])
+    assert page == sorted(ITEMS, key=BY_REV)[4:8]
+    assert info2["offset"] == 4
+
+def test_stale_cursor_continues_after_its_key():
+    """cursor의 항목이 사라지거나 새 항목이 생겨도 정렬 키 기준으로 그 뒤부터"""
+    _, info = paginate(ITEMS, BY_REV, limit=6)
+    last = sorted(ITEMS, key=BY_REV)[5]
+    changed = [item for item in ITEMS if item != last] + [("회사00A", 300), ("새회사", 100)]
+    page, info2 = paginate(changed, BY_REV, limit=6, cursor=info["next_cursor"])
+    expected = [item for item in sorted(changed, key=BY_REV) if BY_REV(item) > BY_REV(last)][:6]
+    assert page == expected
+    assert info2["offset"] == len(changed) - len([i for i in changed if BY_REV(i) > BY_REV(last)])
+
+GARBLED = [
+    "!!!",                                     # base64 아님
+    "a",                                       # 길이가 맞지 않는 base64
+    "한글",                                    # ASCII 아님
+    raw_cursor(b"not json"),
+    raw_cursor(b"\xff\xfe\xfa"),               # UTF-8 아님
+    raw_cursor(b"5"),                          # 목록이 아닌 JSON
+    raw_cursor(b"null"),
+    raw_cursor(b'"abc"'),
+    raw_cursor(b'{"a": 1}'),
+    raw_cursor(b"[]"),
+    raw_cursor(b'[[1], "x"]'),                 # 중첩 값
+    raw_cursor(b'[{"a": 1}, "x"]'),
+    raw_cursor(b"[" * 100_000 + b"]" * 100_000),  # 깊은 중첩
+]
+
+@pytest.mark.parametrize("cursor", GARBLED, ids=range(len(GARBLED)))
+def test_garbled_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        paginate(ITEMS, BY_REV, limit=5, cursor=cursor)
+    assert e.value.status_code == 400
+
+def test_cursor_from_other_sort_is_400():
+    _, info = paginate(ITEMS, BY_NAME, limit=5)
+    with pytest.raises(HTTPException) as e:
+        paginate(ITEMS, BY_REV, limit=5, cursor=info["next_cursor"])
+    assert e.value.status_code == 400
+
+def test_cursor_round_trip():
+    for key in [(-300, "회사00"), ("이름",), (-1.5, 0, "a b/c+=")]:
+        assert decode_cursor(encode_cursor(key)) == key
+
+def test_is_paged():
+    assert not is_paged()
+    assert is_paged(limit=1) and is_paged(offset=1) and is_paged(cursor="x") and is_paged(sort="name")
+    assert not is_paged(cursor="")
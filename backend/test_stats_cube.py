@@ -0,0 +1,45 @@
+# test_stats_cube.py
+# stats_cube.py 단위 테스트 (pytest, 임시 SQLite DB - 서버 불필요)
+# 집계 큐브 응답 = 원본 행에서 계산한 응답 (컬럼 저장소, SQL 경로와 같은 결과) - 사업장명 NULL 행 / 제외 목록 포함
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from models import Base
+from columnar import ColumnarStore
+from stats_cube import dashboard_stats, refresh_cube
+
+CHECKUPS = [
+    # (접수번호, 사업장, 검진일, 금액)
+    ("R1", "A", "2024-01-05", 100), ("R2", "A", "2025-02-01", 200), ("R3", "(주)A", "2024-03-09", 300),
+    ("R4", "B", "2024-01-20", 400), ("R5", None, "2024-05-05", 500), ("R6", None, "2025-07-07", 600),
+    ("R7", "C", "2025-12-31", 700), ("R8", None, None, 800),
+]
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO tb_checkup (receipt_no, company_name, checkup_date, year, month, total_price, category) "
+            "VALUES (:r, :c, :d, :y, :m, :p, '종합검진')"
+        ), [{"r": r, "c": c, "d": d, "y": int(d[:4]) if d else None, "m": int(d[5:7]) if d else None, "p": p}
+            for r, c, d, p in CHECKUPS])
+        conn.execute(text("INSERT INTO tb_company_map (original_name, standard_name) VALUES ('(주)A', 'A')"))
+        refresh_cube(conn)
+        yield conn
+
+@pytest.mark.parametrize("excludes", [None, ["B"], ["없는회사"], ["A", "C"]])
+@pytest.mark.parametrize("years", [None, [2024]])
+def test_cube_matches_row_level_stats(conn, excludes, years):
+    cube = dashboard_stats(Session(bind=conn), years=years, excludes=excludes)
+    rows = ColumnarStore(conn, 0).dashboard_stats(years=years, excludes=excludes)
+    assert cube == rows
+
+def test_null_company_rows_dropped_only_with_excludes(conn):
+    db = Session(bind=conn)
+    assert dashboard_stats(db)["CL"]["기타"]["t"] == 500 + 600 + 800  # 제외 목록 없음 -> 기타로 포함
+    stats = dashboard_stats(db, excludes=["B"])
+    assert "기타" not in stats["CL"]
+    assert stats["YT"] == {2024: {"rev": 400, "cnt": 2}, 2025: {"rev": 900, "cnt": 2}}
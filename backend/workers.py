@@ -0,0 +1,181 @@
+# workers.py
+# 무거운 통계 계산(stats_kernels.py)을 별도 프로세스 풀에서 실행
+# API 스레드는 결과를 기다리기만 하므로, 오래 걸리는 조회가 GIL을 잡고 다른 사용자의 대시보드를 늦추지 않습니다.
+# - 대기열 상한: 실행 중 + 대기 중 작업이 MAX_PENDING개를 넘으면 바로 거절 (PoolBusy -> 503)
+# - 작업 시간 제한: TIMEOUT초가 지나면 응답은 504, 워커 쪽 SQLite 쿼리도 중단 (progress handler)
+# - 지표: 함수별 작업 수 / 대기 시간(큐) / 계산 시간 / 거절 / 시간 초과 / 오류 (/api/workers/stats, /metrics)
+#   요청의 Server-Timing 헤더에도 queue / pool 구간으로 표시
+# - 함수에 in_process_warmup(db)가 붙어 있으면 (columnar 엔진의 기간 통계) 풀로 보내지 않고 요청 스레드에서 계산
+#   API 프로세스의 공유 데이터(컬럼 저장소)를 쓰기 위함 - 준비 함수는 제한 시간 밖에서 먼저 실행 (load 구간)
+# 환경 변수
+#   BIZHEALTH_STATS_WORKERS  워커 프로세스 수 (기본: CPU 수, 최대 4 / 0이면 프로세스 없이 요청 스레드에서 계산)
+#   BIZHEALTH_STATS_QUEUE    동시 작업 상한 (기본: 워커 수 x 4)
+#   BIZHEALTH_STATS_TIMEOUT  작업당 제한 시간(초, 기본 60)
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from database import ReadSessionLocal
+
+WORKERS = int(os.environ.get("BIZHEALTH_STATS_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_PENDING = int(os.environ.get("BIZHEALTH_STATS_QUEUE", max(1, WORKERS) * 4))
+TIMEOUT = float(os.environ.get("BIZHEALTH_STATS_TIMEOUT", "60"))
+
+class PoolBusy(Exception):
+    """대기열이 가득 참"""
+
+class JobTimeout(Exception):
+    """작업 시간 제한 초과"""
+
+# ---------------------------------------------------------
+# [워커 쪽] 조회 세션을 열어 계산 함수 실행
+# ---------------------------------------------------------
+def _run_job(func, args, submitted, deadline):
+    """(결과, 대기 시간, 계산 시간) - 워커 프로세스(또는 WORKERS=0이면 요청 스레드)에서 실행"""
+    started = time.time()
+    job = metrics.track_job(func.__name__)  # 느린 쿼리 로그에 함수 이름 표시
+    db = ReadSessionLocal()
+    raw = db.connection().connection.dbapi_connection
+    # 제한 시간이 지나면 진행 중인 SQLite 쿼리를 중단 (결과를 기다리는 쪽은 이미 504 응답)
+    raw.set_progress_handler(lambda: time.time() > deadline, 10000)
+    try:
+        result = func(db, *args)
+    finally:
+        raw.set_progress_handler(None, 0)
+        db.close()
+        metrics.finish_job(job)
+    return result, started - submitted, time.time() - started
+
+def _warm_up(warmup):
+    """제한 시간을 세기 전에 계산에 필요한 공유 데이터 준비 (요청 스레드)"""
+    db = ReadSessionLocal()
+    try:
+        warmup(db)
+    finally:
+        db.close()
+
+# ---------------------------------------------------------
+# [API 쪽] 제출 / 대기 / 지표
+# ---------------------------------------------------------
+class StatsPool:
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, timeout=TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self._metrics = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: 부모의 DB 연결 / 스레드 상태를 물려받지 않는 새 프로세스 (윈도우와 동일 동작)
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _metric(self, name):
+        return self._metrics.setdefault(name, {
+            "jobs": 0, "rejected": 0, "timeouts": 0, "errors": 0,
+            "queue_wait": 0.0, "queue_wait_max": 0.0, "compute": 0.0, "compute_max": 0.0,
+        })
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func, *args):
+        """func(db, *args)를 풀에서 실행하고 결과 반환 (PoolBusy / JobTimeout)"""
+        name = func.__name__
+        warmup = getattr(func, "in_process_warmup", None)
+        if warmup is not None:
+            t = time.perf_counter()
+            await run_in_threadpool(_warm_up, warmup)
+            metrics.add_timing("load", time.perf_counter() - t)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self._metric(name)["rejected"] += 1
+                raise PoolBusy(f"통계 계산 대기열이 가득 찼습니다 ({self.max_pending}건)")
+            self.pending += 1
+
+        submitted = time.time()
+        deadline = submitted + self.timeout
+        try:
+            if self.workers > 0 and warmup is None:
+                future = self._get_executor().submit(_run_job, func, args, submitted, deadline)
+                # 슬롯은 워커가 실제로 끝났을 때 반납 (시간 초과 후에도 계산 중이면 대기열에 포함)
+                future.add_done_callback(self._release)
+                waiter = asyncio.wrap_future(future)
+            else:
+                future = None
+                waiter = asyncio.ensure_future(run_in_threadpool(_run_job, func, args, submitted, deadline))
+                waiter.add_done_callback(self._release)
+        except BaseException:
+            self._release()
+            raise
+
+        try:
+            result, queue_wait, compute = await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if future is not None:
+                future.cancel()  # 아직 대기 중이면 취소, 실행 중이면 progress handler가 중단
+            with self._lock:
+                self._metric(name)["timeouts"] += 1
+            raise JobTimeout(f"통계 계산이 {self.timeout:g}초 안에 끝나지 않았습니다")
+        except BrokenProcessPool:
+            with self._lock:
+                self._metric(name)["errors"] += 1
+                self._executor = None  # 워커가 비정상 종료됨 -> 다음 요청에서 새 풀 생성
+            raise
+        except Exception:
+            with self._lock:
+                self._metric(name)["errors"] += 1
+            raise
+
+        with self._lock:
+            m = self._metric(name)
+            m["jobs"] += 1
+            m["queue_wait"] += queue_wait
+            m["queue_wait_max"] = max(m["queue_wait_max"], queue_wait)
+            m["compute"] += compute
+            m["compute_max"] = max(m["compute_max"], compute)
+        metrics.add_timing("queue", queue_wait)
+        metrics.add_timing("pool", compute, name)
+        return result
+
+    def stats(self):
+        with self._lock:
+            kernels = {}
+            for name, m in self._metrics.items():
+                jobs = m["jobs"] or 1
+                kernels[name] = {
+                    "jobs": m["jobs"], "rejected": m["rejected"], "timeouts": m["timeouts"], "errors": m["errors"],
+                    "queue_wait_avg_ms": round(m["queue_wait"] / jobs * 1000, 1),
+                    "queue_wait_max_ms": round(m["queue_wait_max"] * 1000, 1),
+                    "compute_avg_ms": round(m["compute"] / jobs * 1000, 1),
+                    "compute_max_ms": round(m["compute_max"] * 1000, 1),
+                    "queue_wait_sec": round(m["queue_wait"], 3),
+                    "compute_sec": round(m["compute"], 3),
+                }
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "timeout": self.timeout,
+                "pending": self.pending,
+                "kernels": kernels,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+stats_pool = StatsPool()
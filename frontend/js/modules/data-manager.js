@@ -163,8 +163,21 @@ const DataManager = (function () {
                 body: formData
             });
 
+            if (res.status === 400) {
+                // 허용되지 않는 파일 (확장자 / 사용 중인 DB 파일) -> 서버가 보낸 사유 표시
+                const err = await res.json().catch(() => ({}));
+                statusDiv.innerHTML = '<span style="color: red;"></span>';
+                statusDiv.firstChild.textContent = `❌ 업로드 불가: ${err.detail || '허용되지 않는 파일입니다.'}`; // 파일 이름이 들어가므로 텍스트로
+                return;
+            }
             if (!res.ok) throw new Error("Upload Failed");
+            const data = await res.json();
 
+            if (data.job_id) {
+                statusDiv.innerHTML = '<span style="color: blue;">⏳ 파일을 받았습니다. 적재 대기 중...</span>';
+                pollJob(data.job_id, statusDiv); // 검진 CSV는 서버에서 바로 적재
+                return;
+            }
             statusDiv.innerHTML = '<span style="color: green;">✅ 파일이 서버에 성공적으로 저장되었습니다!</span>';
             setTimeout(() => { statusDiv.innerHTML = ''; }, 5000);
         } catch (e) {
@@ -172,6 +185,30 @@ const DataManager = (function () {
         }
     }
 
+    // 적재 작업 진행 상황 (2초마다 조회)
+    async function pollJob(jobId, statusDiv) {
+        try {
+            const res = await fetch(`${API_BASE_URL}/api/jobs/${jobId}`);
+            if (!res.ok) throw new Error("Job Not Found");
+            const job = await res.json();
+
+            if (job.status === 'queued' || job.status === 'running') {
+                const progress = job.total_rows ? `${job.rows.toLocaleString()} / ${job.total_rows.toLocaleString()}행 (${job.percent}%)` : '파일 확인 중';
+                statusDiv.innerHTML = `<span style="color: blue;">⏳ 데이터 적재 중... ${progress} · ${job.rows_per_sec.toLocaleString()} rows/s</span>`;
+                setTimeout(() => pollJob(jobId, statusDiv), 2000);
+            } else if (job.status === 'done') {
+                statusDiv.innerHTML = `<span style="color: green;">✅ 적재 완료: 신규 ${job.inserted.toLocaleString()}건 / 갱신 ${job.updated.toLocaleString()}건 (${job.elapsed}초)</span>`;
+            } else if (job.status === 'skipped') {
+                statusDiv.innerHTML = '<span style="color: green;">✅ 이미 적재된 파일입니다 (변경 없음)</span>';
+            } else {
+                const err = job.errors.length ? job.errors[0].error : '';
+                statusDiv.innerHTML = `<span style="color: red;">❌ 적재 중 오류 ${job.errors.length}건: ${err}</span>`;
+            }
+        } catch (e) {
+            statusDiv.innerHTML = '<span style="color: red;">❌ 적재 상태 확인 실패: 서버 로그를 확인해주세요.</span>';
+        }
+    }
+
     return {
         init,
         switchTab,
@@ -63,15 +63,15 @@ const PeriodStatusModule = (function () {
         }));
 
         try {
-            const [resA, resB] = await Promise.all([
-                fetch(`${API_BASE_URL}/api/stats/period?start_date=${startVal}&end_date=${endVal}&ignore_exclude=${includeExcluded}`),
-                fetch(`${API_BASE_URL}/api/stats/period?start_date=${compStartVal}&end_date=${compEndVal}&ignore_exclude=${includeExcluded}`)
-            ]);
+            // 분석 기간 + 비교 기간을 한 번에 조회 (서버에서 쿼리 1회로 집계)
+            const res = await fetch(`${API_BASE_URL}/api/stats/periods?period=${startVal},${endVal}&period=${compStartVal},${compEndVal}&ignore_exclude=${includeExcluded}`);
 
-            if (!resA.ok || !resB.ok) throw new Error("Backend API Failed");
+            if (!res.ok) throw new Error("Backend API Failed");
 
-            const dataA = await resA.json();
-            const dataB = await resB.json();
+            const { periods } = await res.json();
+            const pick = (s, e) => periods.find(p => p.start_date === s && p.end_date === e);
+            const dataA = pick(startVal, endVal);
+            const dataB = pick(compStartVal, compEndVal);
 
             updateView(dataA, dataB, {
                 s1: startVal, e1: endVal,